@@ -0,0 +1,88 @@
+from typing import TYPE_CHECKING
+
+from .lazy import lazy_exports
+
+# Names are imported from their module on first access, see lazy.py.
+_EXPORTS = {
+    "AsyncHTTPClient": ".aio",
+    "CacheBackend": ".cache",
+    "CacheEntry": ".cache",
+    "CacheStats": ".cache",
+    "DiskCache": ".cache",
+    "MemoryCache": ".cache",
+    "ResponseCache": ".cache",
+    "create_cache": ".cache",
+    "Catalog": ".catalog",
+    "Schema": ".construct",
+    "SchemaFactories": ".construct",
+    "schema_factory": ".construct",
+    "Clearance": ".cookies",
+    "CookieBackend": ".cookies",
+    "CookieStore": ".cookies",
+    "FileCookieBackend": ".cookies",
+    "SQLiteCookieBackend": ".cookies",
+    "create_cookie_store": ".cookies",
+    "CompactEpisodes": ".episodes",
+    "EpisodeList": ".episodes",
+    "EpisodeSequence": ".episodes",
+    "LazyEpisodes": ".episodes",
+    "DeadlineExceeded": ".exception",
+    "HTTPError": ".exception",
+    "ProviderError": ".exception",
+    "HTTPClient": ".http",
+    "Response": ".http",
+    "CallEvent": ".instrument",
+    "Instrument": ".instrument",
+    "Observer": ".instrument",
+    "PrometheusExporter": ".instrument",
+    "RequestEvent": ".instrument",
+    "AnimeAPI": ".multi",
+    "AsyncAnimeAPI": ".multi",
+    "normalize_title": ".multi",
+    "AnimeServer": ".server",
+    "Anime": ".schema",
+    "Episode": ".schema",
+    "Link": ".schema",
+    "HostStats": ".limiter",
+    "RateLimiter": ".limiter",
+    "StreamCache": ".streams",
+    "StreamCacheStats": ".streams",
+    "AsyncSingleFlight": ".singleflight",
+    "SingleFlight": ".singleflight",
+    "coalesce": ".singleflight",
+}
+
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
+
+if TYPE_CHECKING:
+    from .aio import AsyncHTTPClient
+    from .cache import (
+        CacheBackend,
+        CacheEntry,
+        CacheStats,
+        DiskCache,
+        MemoryCache,
+        ResponseCache,
+        create_cache,
+    )
+    from .catalog import Catalog
+    from .construct import Schema, SchemaFactories, schema_factory
+    from .cookies import (
+        Clearance,
+        CookieBackend,
+        CookieStore,
+        FileCookieBackend,
+        SQLiteCookieBackend,
+        create_cookie_store,
+    )
+    from .episodes import CompactEpisodes, EpisodeList, EpisodeSequence, LazyEpisodes
+    from .exception import DeadlineExceeded, HTTPError, ProviderError
+    from .http import HTTPClient, Response
+    from .instrument import CallEvent, Instrument, Observer, PrometheusExporter, RequestEvent
+    from .limiter import HostStats, RateLimiter
+    from .multi import AnimeAPI, AsyncAnimeAPI, normalize_title
+    from .schema import Anime, Episode, Link
+    from .server import AnimeServer
+    from .singleflight import AsyncSingleFlight, SingleFlight, coalesce
+    from .streams import StreamCache, StreamCacheStats
@@ -0,0 +1,253 @@
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+from animeapi.cache import ResponseCache
+from animeapi.cookies import RELOAD_INTERVAL, Clearance, CookieStore
+from animeapi.deadline import clip, current, expired
+from animeapi.exception import DeadlineExceeded
+from animeapi.http import REQUEST_TIMEOUT, USER_AGENT, Response
+from animeapi.instrument import Instrument, RequestEvent, phase, received_bytes, record_request
+from animeapi.limiter import RateLimiter
+
+
+class AsyncHTTPClient(object):
+    """
+    Asyncio counterpart of HTTPClient built on ``aiohttp``, used by the async clients.
+
+    Unlike cloudscraper it does not solve anti-bot challenges by itself, pass a session
+    that already carries the clearance cookies when the site asks for one, or a cookie
+    store where a sync client saved them.
+
+    :param session (aiohttp.ClientSession): Optional session, it is not closed by the client.
+    :param cache (ResponseCache): Optional response cache, it may be shared with sync clients.
+    :param headers (Dict[str, str]): Default headers of every request.
+    :param cookie_store (CookieStore): Optional store of anti-bot clearances, only read by this client.
+    :param limiter (RateLimiter): Optional pacing of the requests per host, it may be shared with sync clients.
+    :param instrument (Instrument): Optional receiver of the requests, set by ``Instrument.attach``. The DNS and
+        connection times are only measured on the session created by the client.
+    :param provider (str): Provider the requests are tagged with.
+    :param timeout (float): Total timeout of the requests without one, in seconds, None to wait forever.
+        The deadline of the call in progress shortens it, see animeapi.deadline.
+    """
+
+    def __init__(
+        self,
+        session=None,
+        cache: Optional[ResponseCache] = None,
+        headers: Optional[Dict[str, str]] = None,
+        cookie_store: Optional[CookieStore] = None,
+        limiter: Optional[RateLimiter] = None,
+        instrument: Optional[Instrument] = None,
+        provider: Optional[str] = None,
+        timeout: Optional[float] = REQUEST_TIMEOUT,
+    ):
+        try:
+            import aiohttp
+        except ImportError as exc:
+            raise ImportError("The async clients require aiohttp, install it with: pip install aiohttp") from exc
+
+        self._aiohttp = aiohttp
+        self._session = session
+        self._owns_session = session is None
+        self._headers = {"User-Agent": USER_AGENT, **(headers or {})}
+        self.cache = cache
+        self.cookie_store = cookie_store
+        self.limiter = limiter
+        self.instrument = instrument
+        self.provider = provider
+        self.timeout = timeout
+        self._clearances = {}
+        self._checked = {}
+
+    def _get_session(self):
+        if self._session is None:
+            trace_configs = [_trace_config(self._aiohttp)] if self.instrument is not None else None
+            self._session = self._aiohttp.ClientSession(headers=self._headers, trace_configs=trace_configs)
+        return self._session
+
+    async def _fetch(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]],
+        timeout: Optional[float],
+        timings: Optional[Dict[str, float]] = None,
+    ) -> Response:
+        kwargs = {}
+        timeout = clip(timeout)
+        # An explicit total of None, the session's default timeout would apply otherwise.
+        kwargs["timeout"] = self._aiohttp.ClientTimeout(total=timeout)
+        if timings is not None:
+            kwargs["trace_request_ctx"] = timings
+        if self.cookie_store is not None:
+            headers = self._with_clearance(urlsplit(url).hostname or "", headers)
+
+        try:
+            async with self._get_session().get(url, headers=headers, **kwargs) as response:
+                body = await response.read()
+                text = body.decode(response.get_encoding())
+                return Response(str(response.url), response.status, text, dict(response.headers), size=len(body))
+        except Exception as exc:
+            # The request timed out because the call ran out of time, not because of the site.
+            if expired():
+                raise DeadlineExceeded(f"deadline exceeded requesting {url}") from exc
+            raise
+
+    async def get(
+        self,
+        url: str,
+        endpoint: Optional[str] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+    ) -> Response:
+        """
+        Send a GET request, serving it from the cache when possible.
+
+        :param url (str): URL to request.
+        :param endpoint (str): Endpoint type used to pick the cache TTL, None disables caching.
+        :param headers (Dict[str, str]): Extra request headers.
+        :param timeout (float): Total timeout of the request in seconds (default is the client's ``timeout``).
+        :return (Response):
+        """
+        if timeout is None:
+            timeout = self.timeout
+        if self.instrument is not None:
+            return await self._observed_get(url, endpoint, headers, timeout)
+        return (await self._get(url, endpoint, headers, timeout))[0]
+
+    async def _get(
+        self,
+        url: str,
+        endpoint: Optional[str],
+        headers: Optional[Dict[str, str]],
+        timeout: Optional[float],
+        timings: Optional[Dict[str, float]] = None,
+    ) -> Tuple[Response, Optional[str]]:
+        """
+        :return (Tuple[Response, Optional[str]]): The response and how the cache answered ("hit", "revalidation",
+            "miss"), or None when the request is not cacheable.
+        """
+        cache = self.cache
+        if cache is None or not cache.cacheable(endpoint):
+            return await self._send(url, headers, timeout, timings), None
+
+        entry = cache.lookup(url)
+        if entry is not None and entry.fresh:
+            cache.record("hit")
+            return Response.from_entry(entry), "hit"
+
+        headers = dict(headers or {})
+        if entry is not None:
+            headers.update(entry.validators)
+
+        response = await self._send(url, headers, timeout, timings)
+
+        if entry is not None and response.status_code == 304:
+            cache.record("revalidation")
+            return Response.from_entry(cache.refresh(entry, endpoint)), "revalidation"
+
+        cache.record("miss")
+        if response.status_code == 200:
+            cache.store(url, endpoint, response.status_code, response.text, response.headers)
+
+        return response, "miss"
+
+    async def _observed_get(
+        self,
+        url: str,
+        endpoint: Optional[str],
+        headers: Optional[Dict[str, str]],
+        timeout: Optional[float],
+    ) -> Response:
+        event = RequestEvent(self.provider, None, urlsplit(url).hostname or "", url, endpoint)
+        start = time.perf_counter()
+        try:
+            with phase("fetch"):
+                response, event.cache = await self._get(url, endpoint, headers, timeout, event.timings)
+        except BaseException as exc:
+            event.error = exc
+            raise
+        else:
+            event.status = response.status_code
+            if event.cache in (None, "miss"):
+                event.bytes = received_bytes(response)
+            return response
+        finally:
+            event.timings["total"] = time.perf_counter() - start
+            record_request(self.instrument, event)
+
+    async def _send(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]],
+        timeout: Optional[float],
+        timings: Optional[Dict[str, float]] = None,
+    ) -> Response:
+        if self.limiter is None:
+            return await self._fetch(url, headers, timeout, timings)
+
+        ticket = await self.limiter.acquire_async(urlsplit(url).hostname or "", current())
+        try:
+            response = await self._fetch(url, headers, timeout, timings)
+        except BaseException as exc:
+            self.limiter.release(ticket, error=exc)
+            raise
+        self.limiter.release(ticket, response.status_code, response.headers)
+
+        return response
+
+    def _with_clearance(self, host: str, headers: Optional[Dict[str, str]]) -> Optional[Dict[str, str]]:
+        """
+        Add the stored clearance of a host, and the User-Agent that solved it, to the request headers.
+        """
+        clearance = self._clearances.get(host)
+        if clearance is None or not clearance.fresh:
+            clearance = self._reload_clearance(host)
+        if clearance is None:
+            return headers
+
+        cookies = "; ".join(f"{cookie['name']}={cookie['value']}" for cookie in clearance.cookies)
+        return {**(headers or {}), "Cookie": cookies, "User-Agent": clearance.user_agent or self._headers["User-Agent"]}
+
+    def _reload_clearance(self, host: str) -> Optional[Clearance]:
+        now = time.monotonic()
+        if now - self._checked.get(host, -RELOAD_INTERVAL) < RELOAD_INTERVAL:
+            return None
+        self._checked[host] = now
+
+        clearance = self._clearances[host] = self.cookie_store.load(host)
+        return clearance
+
+    async def close(self) -> None:
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+        self._session = None
+
+
+def _trace_config(aiohttp):
+    """
+    aiohttp tracing of the DNS resolution, connection and response headers times into the
+    ``trace_request_ctx`` dict of each request.
+    """
+
+    def timer(timing: str):
+        async def start(session, context, params) -> None:
+            setattr(context, timing, time.perf_counter())
+
+        async def end(session, context, params) -> None:
+            timings = context.trace_request_ctx
+            if timings is not None and hasattr(context, timing):
+                timings[timing] = timings.get(timing, 0.0) + time.perf_counter() - getattr(context, timing)
+
+        return start, end
+
+    trace = aiohttp.TraceConfig()
+    for timing, (start, end) in {
+        "dns": (trace.on_dns_resolvehost_start, trace.on_dns_resolvehost_end),
+        "connect": (trace.on_connection_create_start, trace.on_connection_create_end),
+        "response": (trace.on_request_start, trace.on_request_end),
+    }.items():
+        on_start, on_end = timer(timing)
+        start.append(on_start)
+        end.append(on_end)
+    return trace
@@ -0,0 +1,299 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Optional, Union
+
+DEFAULT_TTL = {
+    "homepage": 60,
+    "directory": 3600,
+    "search": 600,
+    "anime": 3600,
+    "episodes": 1800,
+    "episode": 600,
+    "iframe": 300,
+    "schedule": 3600,
+}
+
+
+@dataclass
+class CacheEntry:
+    url: str
+    status_code: int
+    text: str
+    headers: Dict[str, str] = field(default_factory=dict)
+    stored_at: float = 0.0
+    expires_at: float = 0.0
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+    @property
+    def validators(self) -> Dict[str, str]:
+        """
+        Conditional request headers that allow the site to answer 304 Not Modified.
+
+        :return (Dict[str, str]): If-None-Match / If-Modified-Since headers for this entry.
+        """
+        headers = {}
+        if "ETag" in self.headers:
+            headers["If-None-Match"] = self.headers["ETag"]
+        if "Last-Modified" in self.headers:
+            headers["If-Modified-Since"] = self.headers["Last-Modified"]
+        return headers
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    revalidations: int = 0
+    evictions: int = 0
+    size: int = 0
+
+
+class CacheBackend(object):
+    """
+    Storage for cache entries. Subclasses must be safe to share between threads.
+    """
+
+    def __init__(self):
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        raise NotImplementedError
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+
+class MemoryCache(CacheBackend):
+    """
+    In-memory backend evicting the least recently used entry once ``max_entries`` is reached.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        super().__init__()
+        self._max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class DiskCache(CacheBackend):
+    """
+    On-disk backend storing one JSON file per entry, evicting the least recently used
+    files once ``max_entries`` is exceeded. Several processes may share the same directory.
+
+    The directory is only listed when the files written since the last listing may take it
+    past ``max_entries`` by a tenth, so a write does not cost a listing of every entry. Files
+    another process removes in the meantime are skipped.
+    """
+
+    def __init__(self, directory: str, max_entries: int = 10000):
+        super().__init__()
+        self._directory = directory
+        self._max_entries = max_entries
+        self._high_water = max_entries + max(1, max_entries // 10)
+        # Files in the directory at the last listing plus those written since, None before the first write.
+        self._count: Optional[int] = None
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self._directory, hashlib.sha256(key.encode()).hexdigest() + ".json")
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                entry = CacheEntry(**json.load(file))
+            os.utime(path)
+        except (OSError, ValueError, TypeError):
+            return None
+        return entry
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        fd, tmp = tempfile.mkstemp(dir=self._directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as file:
+            json.dump(asdict(entry), file)
+        os.replace(tmp, self._path(key))
+
+        with self._lock:
+            if self._count is None or self._count >= self._high_water:
+                self._evict()
+            else:
+                self._count += 1
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def clear(self) -> None:
+        for entry in self._files():
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    def _files(self):
+        return [entry for entry in os.scandir(self._directory) if entry.name.endswith(".json")]
+
+    def _evict(self) -> None:
+        files = []
+        for entry in self._files():
+            try:
+                files.append((entry.stat().st_mtime, entry.path))
+            except OSError:
+                # Removed by another process since the listing.
+                continue
+
+        self._count = len(files)
+        if len(files) <= self._max_entries:
+            return
+
+        files.sort()
+        for _, path in files[: len(files) - self._max_entries]:
+            try:
+                os.remove(path)
+                self.evictions += 1
+            except OSError:
+                pass
+            self._count -= 1
+
+    def __len__(self) -> int:
+        return len(self._files())
+
+
+class ResponseCache(object):
+    """
+    HTTP response cache shared by the AnimeFLV and JKAnime clients.
+
+    Every request is tagged with an endpoint type (``anime``, ``directory``, ``schedule``...)
+    whose TTL decides how long the response is served without contacting the site. Once an
+    entry expires it is revalidated with ETag / Last-Modified when the site provided them.
+
+    :param backend (CacheBackend): Where entries are stored (default is a MemoryCache).
+    :param ttl (Dict[str, float]): TTL in seconds per endpoint type, merged over DEFAULT_TTL.
+        Endpoint types with no TTL (or a TTL of 0) are never cached.
+    """
+
+    def __init__(self, backend: Optional[CacheBackend] = None, ttl: Optional[Dict[str, float]] = None):
+        self.backend = backend if backend is not None else MemoryCache()
+        self.ttl = {**DEFAULT_TTL, **(ttl or {})}
+        self._hits = 0
+        self._misses = 0
+        self._revalidations = 0
+        self._lock = threading.Lock()
+
+    def cacheable(self, endpoint: Optional[str]) -> bool:
+        return endpoint is not None and self.ttl.get(endpoint, 0) > 0
+
+    def lookup(self, url: str) -> Optional[CacheEntry]:
+        return self.backend.get(url)
+
+    def store(self, url: str, endpoint: str, status_code: int, text: str, headers: Dict[str, str]) -> CacheEntry:
+        now = time.time()
+        received = {name.lower(): value for name, value in headers.items()}
+        entry = CacheEntry(
+            url=url,
+            status_code=status_code,
+            text=text,
+            headers={name: received[name.lower()] for name in ("ETag", "Last-Modified", "Content-Type") if name.lower() in received},
+            stored_at=now,
+            expires_at=now + self.ttl[endpoint],
+        )
+        self.backend.set(url, entry)
+        return entry
+
+    def refresh(self, entry: CacheEntry, endpoint: str) -> CacheEntry:
+        now = time.time()
+        entry.stored_at = now
+        entry.expires_at = now + self.ttl[endpoint]
+        self.backend.set(entry.url, entry)
+        return entry
+
+    def record(self, outcome: str) -> None:
+        with self._lock:
+            if outcome == "hit":
+                self._hits += 1
+            elif outcome == "miss":
+                self._misses += 1
+            elif outcome == "revalidation":
+                self._revalidations += 1
+
+    def invalidate(self, url: str) -> None:
+        self.backend.delete(url)
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    @property
+    def stats(self) -> CacheStats:
+        return CacheStats(
+            hits=self._hits,
+            misses=self._misses,
+            revalidations=self._revalidations,
+            evictions=self.backend.evictions,
+            size=len(self.backend),
+        )
+
+
+def create_cache(backend: Union[str, CacheBackend] = "memory", ttl: Optional[Dict[str, float]] = None, **kwargs) -> ResponseCache:
+    """
+    Shortcut to build a ResponseCache.
+
+    :param backend (Union[str, CacheBackend]): ``"memory"``, ``"disk"`` or a CacheBackend instance.
+    :param ttl (Dict[str, float]): TTL in seconds per endpoint type.
+    :param **kwargs: Arguments of the backend, like ``max_entries`` or ``directory``.
+    :return (ResponseCache):
+    """
+    if backend == "memory":
+        backend = MemoryCache(**kwargs)
+    elif backend == "disk":
+        backend = DiskCache(**kwargs)
+    elif not isinstance(backend, CacheBackend):
+        raise ValueError(f"Unknown cache backend: {backend!r}")
+
+    return ResponseCache(backend, ttl)
@@ -0,0 +1,164 @@
+import itertools
+import re
+import sqlite3
+import threading
+import time
+from typing import Iterable, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+PAGE_SIZE = 24
+BATCH_SIZE = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS anime (
+    provider TEXT NOT NULL,
+    id TEXT NOT NULL,
+    title TEXT NOT NULL,
+    data TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    seen_at REAL NOT NULL,
+    PRIMARY KEY (provider, id)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS anime_fts USING fts5(
+    title,
+    content='anime',
+    content_rowid='rowid',
+    tokenize='unicode61 remove_diacritics 2',
+    prefix='1 2 3'
+);
+CREATE TRIGGER IF NOT EXISTS anime_fts_insert AFTER INSERT ON anime BEGIN
+    INSERT INTO anime_fts (rowid, title) VALUES (new.rowid, new.title);
+END;
+CREATE TRIGGER IF NOT EXISTS anime_fts_delete AFTER DELETE ON anime BEGIN
+    INSERT INTO anime_fts (anime_fts, rowid, title) VALUES ('delete', old.rowid, old.title);
+END;
+CREATE TRIGGER IF NOT EXISTS anime_fts_update AFTER UPDATE OF title ON anime WHEN old.title IS NOT new.title BEGIN
+    INSERT INTO anime_fts (anime_fts, rowid, title) VALUES ('delete', old.rowid, old.title);
+    INSERT INTO anime_fts (rowid, title) VALUES (new.rowid, new.title);
+END;
+"""
+
+_UPSERT = """
+INSERT INTO anime (provider, id, title, data, updated_at, seen_at) VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (provider, id) DO UPDATE SET
+    title = excluded.title,
+    data = excluded.data,
+    seen_at = excluded.seen_at,
+    updated_at = CASE WHEN anime.data = excluded.data THEN anime.updated_at ELSE excluded.updated_at END
+"""
+
+
+class Catalog(object):
+    """
+    Local index of the animes listed by the clients, stored in SQLite with an FTS5 full-text
+    index on the titles, so searches can be answered without contacting the site.
+
+    Animes are stored per provider (``jkanime``, ``animeflv``) as the JSON of their
+    AnimeShortInfo, the clients turn them back into their own schema.
+
+    :param path (str): Path of the SQLite database (default is an in-memory database).
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self._lock = threading.Lock()
+        self._stamp = 0.0
+        self._connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._lock, self._connection:
+            if path != ":memory:":
+                self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.executescript(_SCHEMA)
+
+    def upsert(self, provider: str, animes: Iterable[BaseModel]) -> int:
+        """
+        Insert or update animes, in batches of BATCH_SIZE.
+
+        :param provider (str): Provider the animes come from.
+        :param animes (Iterable[BaseModel]): AnimeShortInfo of the provider.
+        :return (int): Number of animes that were new or changed.
+        """
+        animes = iter(animes)
+        changed = 0
+
+        while True:
+            batch = list(itertools.islice(animes, BATCH_SIZE))
+            if not batch:
+                return changed
+
+            values = [(str(anime.id), anime.title, anime.model_dump_json()) for anime in batch]
+            with self._lock, self._connection:
+                # Strictly increasing, so the rows changed by this batch are told apart by their updated_at.
+                now = self._stamp = max(time.time(), self._stamp + 1e-6)
+                self._connection.executemany(_UPSERT, [(provider, *value, now, now) for value in values])
+                changed += self._connection.execute(
+                    "SELECT count(*) FROM anime WHERE provider = ? AND updated_at = ?",
+                    (provider, now),
+                ).fetchone()[0]
+
+    def search(self, provider: str, query: Optional[str] = None, page: int = 1, page_size: int = PAGE_SIZE) -> Tuple[List[str], int]:
+        """
+        Full-text search of the titles of a provider. Every word of the query matches as a prefix,
+        so ``"shin kyo"`` finds "Shingeki no Kyojin". Without a query every anime is listed by title.
+
+        :param provider (str): Provider to search.
+        :param query (str): Search query.
+        :param page (int): Page of the results, starting at 1.
+        :param page_size (int): Results per page.
+        :return (Tuple[List[str], int]): The JSON of the animes of the page, best match first, and the total of matches.
+        """
+        offset = (max(page, 1) - 1) * page_size
+
+        if query is None:
+            select = "SELECT data FROM anime WHERE provider = ? ORDER BY title LIMIT ? OFFSET ?"
+            count = "SELECT count(*) FROM anime WHERE provider = ?"
+            params = (provider,)
+        else:
+            terms = re.findall(r"\w+", query)
+            if not terms:
+                return [], 0
+
+            match = " ".join('"{}"*'.format(term) for term in terms)
+            select = (
+                "SELECT anime.data FROM anime_fts JOIN anime ON anime.rowid = anime_fts.rowid "
+                "WHERE anime_fts MATCH ? AND anime.provider = ? ORDER BY bm25(anime_fts), anime.title LIMIT ? OFFSET ?"
+            )
+            count = (
+                "SELECT count(*) FROM anime_fts JOIN anime ON anime.rowid = anime_fts.rowid "
+                "WHERE anime_fts MATCH ? AND anime.provider = ?"
+            )
+            params = (match, provider)
+
+        with self._lock:
+            rows = self._connection.execute(select, params + (page_size, offset)).fetchall()
+            total = self._connection.execute(count, params).fetchone()[0]
+
+        return [row[0] for row in rows], total
+
+    def prune(self, provider: str, before: float) -> int:
+        """
+        Remove the animes of a provider not seen since a given time, like the ones
+        missing from a complete crawl started at that time.
+
+        :param provider (str): Provider to prune.
+        :param before (float): Timestamp, as returned by ``time.time()``.
+        :return (int): Number of animes removed.
+        """
+        with self._lock, self._connection:
+            return self._connection.execute("DELETE FROM anime WHERE provider = ? AND seen_at < ?", (provider, before)).rowcount
+
+    def count(self, provider: Optional[str] = None) -> int:
+        with self._lock:
+            if provider is None:
+                return self._connection.execute("SELECT count(*) FROM anime").fetchone()[0]
+            return self._connection.execute("SELECT count(*) FROM anime WHERE provider = ?", (provider,)).fetchone()[0]
+
+    def clear(self, provider: Optional[str] = None) -> None:
+        with self._lock, self._connection:
+            if provider is None:
+                self._connection.execute("DELETE FROM anime")
+            else:
+                self._connection.execute("DELETE FROM anime WHERE provider = ?", (provider,))
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,67 @@
+import functools
+from typing import Any, Callable, Type, TypeVar
+
+from pydantic import BaseModel, ConfigDict
+
+Model = TypeVar("Model", bound=BaseModel)
+
+
+class Schema(BaseModel):
+    """
+    Base of the schemas. Their validators are built on first use instead of when the
+    schema is defined, so importing the schemas is cheap.
+    """
+
+    model_config = ConfigDict(defer_build=True)
+
+
+def schema_factory(model: Type[Model], trusted: bool = False) -> Callable[..., Model]:
+    """
+    Constructor of a schema, called with its fields as keyword arguments.
+
+    The validated constructor is the schema itself. The trusted one skips validation, for data
+    the parsers already shaped like the schema: the fields are stored as given, the missing
+    ones take their default and unknown ones are ignored. It is much faster, and builds an
+    object equal to the validated one as long as every field has the right type.
+
+    The trusted constructor is pydantic's ``model_construct``, which only checks the required
+    fields are given.
+
+    :param model (Type[BaseModel]): Schema to build.
+    :param trusted (bool): Whether to skip validation.
+    :return (Callable[..., BaseModel]):
+    """
+    return _trusted_factory(model) if trusted else model
+
+
+class SchemaFactories(dict):
+    """
+    The constructor of every schema, looked up by schema, like ``factories[AnimeInfo](**fields)``.
+    Built on first use by schema_factory.
+
+    :param trusted (bool): Whether the constructors skip validation.
+    """
+
+    def __init__(self, trusted: bool = False):
+        super().__init__()
+        self.trusted = trusted
+
+    def __missing__(self, model: Type[Model]) -> Callable[..., Model]:
+        factory = self[model] = schema_factory(model, self.trusted)
+        return factory
+
+
+@functools.lru_cache(maxsize=None)
+def _trusted_factory(model: Type[Model]) -> Callable[..., Model]:
+    construct = model.model_construct
+    required = frozenset(name for name, field in model.model_fields.items() if field.is_required())
+    if not required:
+        return construct
+
+    def trusted(**fields: Any) -> Model:
+        if not required <= fields.keys():
+            missing = required - fields.keys()
+            raise ValueError(f"{model.__name__} requires {', '.join(sorted(missing))}")
+        return construct(**fields)
+
+    return trusted
@@ -0,0 +1,202 @@
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Union
+
+CLEARANCE_COOKIE = "cf_clearance"
+
+# Lifetime of a clearance whose cookie carries no expiry.
+CLEARANCE_TTL = 1800
+
+# Minimum seconds between two lookups of the store for a host whose session has no clearance.
+RELOAD_INTERVAL = 30
+
+
+@dataclass
+class Clearance:
+    host: str
+    user_agent: str
+    cookies: List[Dict[str, Any]] = field(default_factory=list)
+    stored_at: float = 0.0
+    expires_at: float = 0.0
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+    @property
+    def token(self) -> Optional[str]:
+        for cookie in self.cookies:
+            if cookie["name"] == CLEARANCE_COOKIE:
+                return cookie["value"]
+        return None
+
+
+class CookieBackend(object):
+    """
+    Storage for clearances, keyed by host. Subclasses must be safe to share between threads.
+    """
+
+    def get(self, host: str) -> Optional[Clearance]:
+        raise NotImplementedError
+
+    def set(self, host: str, clearance: Clearance) -> None:
+        raise NotImplementedError
+
+    def delete(self, host: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class FileCookieBackend(CookieBackend):
+    """
+    Backend storing one JSON file per host. Files are replaced atomically, so several
+    processes may share the same directory.
+    """
+
+    def __init__(self, directory: str):
+        self._directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, host: str) -> str:
+        return os.path.join(self._directory, re.sub(r"[^A-Za-z0-9.-]", "_", host) + ".json")
+
+    def get(self, host: str) -> Optional[Clearance]:
+        try:
+            with open(self._path(host), "r", encoding="utf-8") as file:
+                return Clearance(**json.load(file))
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def set(self, host: str, clearance: Clearance) -> None:
+        fd, tmp = tempfile.mkstemp(dir=self._directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as file:
+            json.dump(asdict(clearance), file)
+        os.replace(tmp, self._path(host))
+
+    def delete(self, host: str) -> None:
+        try:
+            os.remove(self._path(host))
+        except OSError:
+            pass
+
+    def clear(self) -> None:
+        for entry in os.scandir(self._directory):
+            if entry.name.endswith(".json"):
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+
+
+class SQLiteCookieBackend(CookieBackend):
+    """
+    Backend storing the clearances in a SQLite database. The database runs in WAL mode,
+    so several processes may share the same file.
+    """
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("CREATE TABLE IF NOT EXISTS clearance (host TEXT PRIMARY KEY, data TEXT NOT NULL)")
+
+    def get(self, host: str) -> Optional[Clearance]:
+        with self._lock:
+            row = self._connection.execute("SELECT data FROM clearance WHERE host = ?", (host,)).fetchone()
+        try:
+            return Clearance(**json.loads(row[0])) if row else None
+        except (ValueError, TypeError):
+            return None
+
+    def set(self, host: str, clearance: Clearance) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO clearance (host, data) VALUES (?, ?)",
+                (host, json.dumps(asdict(clearance))),
+            )
+
+    def delete(self, host: str) -> None:
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM clearance WHERE host = ?", (host,))
+
+    def clear(self) -> None:
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM clearance")
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+class CookieStore(object):
+    """
+    Anti-bot clearance cookies shared by the AnimeFLV and JKAnime clients, so a new process
+    reuses the clearance solved by another one instead of solving the challenge again.
+
+    A clearance is saved along with the User-Agent that solved it, since the site only
+    accepts it from that User-Agent. Expired clearances are ignored; the next challenge is
+    solved as usual and its clearance replaces the stored one.
+
+    :param backend (CookieBackend): Where clearances are stored.
+    :param ttl (float): Lifetime in seconds of a clearance whose cookie has no expiry.
+    """
+
+    def __init__(self, backend: CookieBackend, ttl: float = CLEARANCE_TTL):
+        self.backend = backend
+        self.ttl = ttl
+
+    def load(self, host: str) -> Optional[Clearance]:
+        clearance = self.backend.get(host)
+        return clearance if clearance is not None and clearance.fresh else None
+
+    def save(self, host: str, user_agent: str, cookies: List[Dict[str, Any]]) -> Clearance:
+        now = time.time()
+        expires = [cookie["expires"] for cookie in cookies if cookie["name"] == CLEARANCE_COOKIE and cookie.get("expires")]
+        clearance = Clearance(
+            host=host,
+            user_agent=user_agent,
+            cookies=cookies,
+            stored_at=now,
+            expires_at=expires[0] if expires else now + self.ttl,
+        )
+        self.backend.set(host, clearance)
+        return clearance
+
+    def invalidate(self, host: str) -> None:
+        self.backend.delete(host)
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def close(self) -> None:
+        self.backend.close()
+
+
+def create_cookie_store(backend: Union[str, CookieBackend] = "file", ttl: float = CLEARANCE_TTL, **kwargs) -> CookieStore:
+    """
+    Shortcut to build a CookieStore.
+
+    :param backend (Union[str, CookieBackend]): ``"file"``, ``"sqlite"`` or a CookieBackend instance.
+    :param ttl (float): Lifetime in seconds of a clearance whose cookie has no expiry.
+    :param **kwargs: Arguments of the backend, ``directory`` for files or ``path`` for SQLite.
+    :return (CookieStore):
+    """
+    if backend == "file":
+        backend = FileCookieBackend(**kwargs)
+    elif backend == "sqlite":
+        backend = SQLiteCookieBackend(**kwargs)
+    elif not isinstance(backend, CookieBackend):
+        raise ValueError(f"Unknown cookie backend: {backend!r}")
+    return CookieStore(backend, ttl)
@@ -0,0 +1,154 @@
+import contextlib
+import functools
+import inspect
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Iterator, Optional
+
+from animeapi.exception import DeadlineExceeded
+
+# Monotonic time by which the call in progress must end. Worker threads started with
+# contextvars.copy_context() and tasks inherit it, so every request of a call shares it.
+_deadline: ContextVar[Optional[float]] = ContextVar("animeapi_deadline", default=None)
+
+
+def expiry(timeout: Optional[float]) -> Optional[float]:
+    """
+    :param timeout (Optional[float]): Seconds from now, or None.
+    :return (Optional[float]): The monotonic time they end at, or None.
+    """
+    return None if timeout is None else time.monotonic() + timeout
+
+
+@contextlib.contextmanager
+def deadline(timeout: Optional[float]) -> Iterator[Optional[float]]:
+    """
+    Bound the requests made in the block, those of the worker threads and tasks it starts
+    included, to ``timeout`` seconds from now. A deadline already in force is only shortened,
+    never extended, and None keeps it as it is.
+
+    :param timeout (Optional[float]): Seconds left to the block, or None.
+    :return (Optional[float]): The monotonic time of the deadline in force, or None.
+    """
+    with _deadline_at(expiry(timeout)) as at:
+        yield at
+
+
+@contextlib.contextmanager
+def _deadline_at(at: Optional[float]) -> Iterator[Optional[float]]:
+    current = _deadline.get()
+    if at is None or (current is not None and current <= at):
+        yield current
+        return
+
+    token = _deadline.set(at)
+    try:
+        yield at
+    finally:
+        _deadline.reset(token)
+
+
+def current() -> Optional[float]:
+    """
+    :return (Optional[float]): The monotonic time of the deadline in force, or None.
+    """
+    return _deadline.get()
+
+
+def remaining() -> Optional[float]:
+    """
+    :return (Optional[float]): Seconds left before the deadline in force, negative once it passed, or None.
+    """
+    at = _deadline.get()
+    return None if at is None else at - time.monotonic()
+
+
+def expired() -> bool:
+    """
+    :return (bool): Whether the deadline in force passed.
+    """
+    at = _deadline.get()
+    return at is not None and time.monotonic() >= at
+
+
+def clip(timeout: Optional[float]) -> Optional[float]:
+    """
+    Timeout of a request: the given one, shortened to the time left before the deadline.
+
+    :param timeout (Optional[float]): Timeout of the request in seconds, None for no timeout.
+    :return (Optional[float]):
+    :raise DeadlineExceeded: When the deadline already passed.
+    """
+    left = remaining()
+    if left is None:
+        return timeout
+    if left <= 0:
+        raise DeadlineExceeded("deadline exceeded before the request was sent")
+    return left if timeout is None else min(timeout, left)
+
+
+def bounded(method: Callable) -> Callable:
+    """
+    Decorator of the public methods of the clients. It adds a ``timeout`` keyword argument,
+    the overall deadline of the call in seconds, which defaults to the ``call_timeout`` of
+    the client. Every request of the call is then bounded by the time left, and raises
+    DeadlineExceeded once it passed. Iterators are bounded as a whole, from the call.
+
+    Deadlines are checked before and bound each request, so a call may overrun its deadline
+    by the parsing done after the last request.
+    """
+
+    def _timeout(self: Any, timeout: Optional[float]) -> Optional[float]:
+        return timeout if timeout is not None else getattr(self, "_call_timeout", None)
+
+    if inspect.isasyncgenfunction(method):
+
+        @functools.wraps(method)
+        async def async_iterator(self, *args, timeout: Optional[float] = None, **kwargs):
+            at = expiry(_timeout(self, timeout))
+            iterator = method(self, *args, **kwargs)
+            try:
+                while True:
+                    with _deadline_at(at):
+                        try:
+                            item = await iterator.__anext__()
+                        except StopAsyncIteration:
+                            return
+                    yield item
+            finally:
+                await iterator.aclose()
+
+        return async_iterator
+
+    if inspect.isgeneratorfunction(method):
+
+        @functools.wraps(method)
+        def iterator(self, *args, timeout: Optional[float] = None, **kwargs):
+            at = expiry(_timeout(self, timeout))
+            generator = method(self, *args, **kwargs)
+            with contextlib.closing(generator):
+                while True:
+                    with _deadline_at(at):
+                        try:
+                            item = next(generator)
+                        except StopIteration:
+                            return
+                    yield item
+
+        return iterator
+
+    if inspect.iscoroutinefunction(method):
+
+        @functools.wraps(method)
+        async def async_wrapper(self, *args, timeout: Optional[float] = None, **kwargs):
+            with deadline(_timeout(self, timeout)):
+                return await method(self, *args, **kwargs)
+
+        return async_wrapper
+
+    @functools.wraps(method)
+    def wrapper(self, *args, timeout: Optional[float] = None, **kwargs):
+        with deadline(_timeout(self, timeout)):
+            return method(self, *args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,255 @@
+import copy
+import threading
+from array import array
+from collections.abc import Sequence
+from itertools import repeat
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Type
+
+from pydantic import BaseModel
+from pydantic_core import core_schema
+
+
+class EpisodeSequence(Sequence):
+    """
+    Base of the episode containers that ``AnimeInfo.episodes`` accepts in place of a list.
+    They are stored as they are, and serialized like a list of EpisodeInfo.
+    """
+
+    __slots__ = ()
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, (EpisodeSequence, list)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+
+class EpisodeList(object):
+    """
+    Annotation of the ``episodes`` fields: a ``List[EpisodeInfo]`` that also accepts an
+    EpisodeSequence, kept without iterating it, like ``Annotated[List[EpisodeInfo], EpisodeList()]``.
+    """
+
+    def __get_pydantic_core_schema__(self, source: Any, handler: Callable) -> core_schema.CoreSchema:
+        list_schema = handler(source)
+
+        def validate(value: Any, validate_list: Callable) -> Any:
+            return value if isinstance(value, EpisodeSequence) else validate_list(value)
+
+        def serialize(value: Any) -> list:
+            return list(value) if isinstance(value, EpisodeSequence) else value
+
+        return core_schema.no_info_wrap_validator_function(
+            validate,
+            list_schema,
+            serialization=core_schema.plain_serializer_function_ser_schema(serialize, return_schema=list_schema),
+        )
+
+
+class LazyEpisodes(EpisodeSequence):
+    """
+    Episodes loaded page by page on first access, through indexing, slicing, iteration
+    or ``len``. Loaded pages are kept, every page is fetched at most once.
+
+    Every page but the last one must hold as many episodes as the first one, so ``len`` only
+    needs the first and last pages and an index only needs the first page and the one holding it.
+
+    :param loader (Callable[[int], Sequence]): Returns the episodes of a page, starting at 1.
+    :param pages (int): Number of pages.
+    """
+
+    def __init__(self, loader: Callable[[int], Sequence], pages: int):
+        self._loader = loader
+        self._pages = pages
+        self._per_page: Optional[int] = None
+        self._loaded: Dict[int, Sequence] = {}
+        self._locks: Dict[int, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def pages(self) -> int:
+        return self._pages
+
+    @property
+    def loaded_pages(self) -> List[int]:
+        return sorted(self._loaded)
+
+    @property
+    def per_page(self) -> int:
+        """
+        Episodes per page, those of the first page fetched that is not the last one.
+        """
+        if self._per_page is None:
+            full = next((page for page in sorted(self._loaded) if page < self._pages), 1)
+            self._per_page = max(len(self.page(full)), 1)
+        return self._per_page
+
+    def page(self, page: int) -> Sequence:
+        """
+        Episodes of a page, loading it on first access.
+
+        :param page (int): Page number, starting at 1.
+        :return (Sequence):
+        """
+        episodes = self._loaded.get(page)
+        if episodes is not None:
+            return episodes
+
+        with self._lock:
+            lock = self._locks.setdefault(page, threading.Lock())
+        with lock:
+            episodes = self._loaded.get(page)
+            if episodes is None:
+                episodes = self._loaded[page] = self._loader(page)
+        return episodes
+
+    def __len__(self) -> int:
+        if self._pages == 0:
+            return 0
+        return (self._pages - 1) * self.per_page + len(self.page(self._pages))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._slice(index)
+
+        if index < 0:
+            index += len(self)
+        page, offset = divmod(index, self.per_page)
+        if index < 0 or page >= self._pages:
+            raise IndexError("episode index out of range")
+
+        episodes = self.page(page + 1)
+        if offset >= len(episodes):
+            raise IndexError("episode index out of range")
+        return episodes[offset]
+
+    def _slice(self, index: slice) -> List[Any]:
+        start, stop, step = index.start or 0, index.stop, index.step or 1
+        if start < 0 or stop is None or stop < 0 or step < 0:
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        # Forward slices with known bounds only load the pages they cover.
+        per_page = self.per_page
+        first, last = start // per_page + 1, min(-(-stop // per_page), self._pages)
+        episodes = [episode for page in range(first, last + 1) for episode in self.page(page)]
+        offset = (first - 1) * per_page
+        return episodes[start - offset : stop - offset : step]
+
+    def __iter__(self) -> Iterator[Any]:
+        for page in range(1, self._pages + 1):
+            yield from self.page(page)
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "LazyEpisodes":
+        # The copy shares the loader, not the pages it loaded.
+        copied = LazyEpisodes(self._loader, self._pages)
+        copied._per_page = self._per_page
+        copied._loaded = copy.deepcopy(self._loaded, memo)
+        return copied
+
+    def __repr__(self) -> str:
+        return f"LazyEpisodes(pages={self._pages}, loaded={len(self._loaded)})"
+
+
+class CompactEpisodes(EpisodeSequence):
+    """
+    Episodes stored by columns instead of one model each: the ids in an array of integers
+    (a tuple when some id is not a plain integer), the fields shared by every episode once,
+    and the image previews built from a template when an episode is read. The EpisodeInfo
+    of an episode is built every time it is accessed, equal to but not the same object.
+
+    Slices and the concatenation of episodes of the same anime stay compact.
+
+    :param model (Type[BaseModel]): EpisodeInfo of the provider.
+    :param ids (Iterable[str]): Episode ids.
+    :param fields (Dict[str, Any]): Fields shared by every episode, like the anime id.
+    :param preview (str): Template of the image previews, formatted with ``id`` and ``image``.
+    :param images (Iterable[str]): Per episode value of ``image`` in the template, if any.
+    """
+
+    __slots__ = ("_model", "_ids", "_fields", "_preview", "_images")
+
+    def __init__(
+        self,
+        model: Type[BaseModel],
+        ids: Iterable[str],
+        fields: Dict[str, Any],
+        preview: Optional[str] = None,
+        images: Optional[Iterable[str]] = None,
+    ):
+        ids = [str(id) for id in ids]
+        self._model = model
+        self._ids = _compact_ids(ids)
+        self._fields = fields
+        self._preview = preview
+        self._images = tuple(images) if images is not None else None
+
+        if self._images is not None and len(self._images) != len(ids):
+            raise ValueError("every episode needs an image")
+
+    @classmethod
+    def _from_columns(cls, model, ids, fields, preview, images) -> "CompactEpisodes":
+        episodes = cls.__new__(cls)
+        episodes._model, episodes._ids, episodes._fields = model, ids, fields
+        episodes._preview, episodes._images = preview, images
+        return episodes
+
+    @property
+    def ids(self) -> List[str]:
+        return [str(id) for id in self._ids]
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            images = self._images[index] if self._images is not None else None
+            return self._from_columns(self._model, self._ids[index], self._fields, self._preview, images)
+
+        id = str(self._ids[index])
+        image = self._images[index] if self._images is not None else None
+        preview = self._preview.format(id=id, image=image) if self._preview is not None else None
+        return self._model(id=id, image_preview=preview, **self._fields)
+
+    def __iter__(self) -> Iterator[BaseModel]:
+        model, fields, preview = self._model, self._fields, self._preview
+        images = self._images if self._images is not None else repeat(None)
+        for id, image in zip(self._ids, images):
+            id = str(id)
+            yield model(id=id, image_preview=preview.format(id=id, image=image) if preview is not None else None, **fields)
+
+    def _joins(self, other: Any) -> bool:
+        return (
+            isinstance(other, CompactEpisodes)
+            and other._model is self._model
+            and other._fields == self._fields
+            and other._preview == self._preview
+            and (other._images is None) == (self._images is None)
+        )
+
+    def __add__(self, other: Any):
+        if self._joins(other):
+            ids = _compact_ids(self.ids + other.ids) if type(self._ids) is not type(other._ids) else self._ids + other._ids
+            images = self._images + other._images if self._images is not None else None
+            return self._from_columns(self._model, ids, self._fields, self._preview, images)
+        if isinstance(other, (EpisodeSequence, list)):
+            return self if not other else list(self) + list(other)
+        return NotImplemented
+
+    def __radd__(self, other: Any):
+        if isinstance(other, (EpisodeSequence, list)):
+            return self if not other else list(other) + list(self)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"CompactEpisodes({len(self._ids)} episodes)"
+
+
+def _compact_ids(ids: List[str]) -> Sequence:
+    # Only ids that read back the same, so "01" or "12.5" keep the tuple.
+    if all(id.isdigit() and str(int(id)) == id for id in ids):
+        try:
+            return array("q", (int(id) for id in ids))
+        except OverflowError:
+            pass
+    return tuple(ids)
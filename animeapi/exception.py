@@ -0,0 +1,20 @@
+class HTTPError(Exception):
+    pass
+
+
+class ProviderError(Exception):
+    """
+    Every provider of a multi-provider call failed.
+
+    :param errors (Dict[str, Exception]): Error of each provider.
+    """
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__("; ".join(f"{provider}: {error!r}" for provider, error in errors.items()) or "no provider")
+
+
+class DeadlineExceeded(TimeoutError):
+    """
+    The deadline of a call passed before it could complete.
+    """
@@ -0,0 +1,300 @@
+import json
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from animeapi.cache import CacheEntry, ResponseCache
+from animeapi.cookies import CLEARANCE_COOKIE, RELOAD_INTERVAL, CookieStore
+from animeapi.deadline import clip, current, expired
+from animeapi.exception import DeadlineExceeded, HTTPError
+from animeapi.instrument import Instrument, RequestEvent, phase, received_bytes, record_request
+from animeapi.limiter import RateLimiter
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+)
+
+# Default timeout of a request, in seconds.
+REQUEST_TIMEOUT = 30
+
+# Arrival time of each response of the request observed in this context, challenge pages included.
+_arrivals: ContextVar[Optional[List[float]]] = ContextVar("arrivals", default=None)
+
+
+class Response(object):
+    """
+    Minimal stand-in for ``requests.Response``, used for cached responses and by the async clients.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        status_code: int,
+        text: str,
+        headers: Optional[Dict[str, str]] = None,
+        from_cache: bool = False,
+        size: Optional[int] = None,
+    ):
+        self.url = url
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+        self.from_cache = from_cache
+        self.size = size
+
+    @classmethod
+    def from_entry(cls, entry: CacheEntry) -> "Response":
+        return cls(entry.url, entry.status_code, entry.text, entry.headers, from_cache=True)
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    def json(self, **kwargs) -> Any:
+        return json.loads(self.text, **kwargs)
+
+    def raise_for_status(self) -> None:
+        if not self.ok:
+            raise HTTPError(f"{self.status_code} Error for url: {self.url}")
+
+
+class HTTPClient(object):
+    """
+    Layer between the clients and their cloudscraper session. Every request of the
+    clients goes through ``get`` tagged with its endpoint type.
+
+    :param scraper: The cloudscraper session used to reach the site.
+    :param cache (ResponseCache): Optional response cache, it may be shared between clients.
+    :param cookie_store (CookieStore): Optional store of anti-bot clearances, it may be shared between clients and processes.
+    :param limiter (RateLimiter): Optional pacing of the requests per host, it may be shared between clients.
+    :param instrument (Instrument): Optional receiver of the requests, set by ``Instrument.attach``.
+    :param provider (str): Provider the requests are tagged with.
+    :param timeout (float): Timeout of the requests without one, in seconds, None to wait forever.
+        The deadline of the call in progress shortens it, see animeapi.deadline.
+    """
+
+    def __init__(
+        self,
+        scraper,
+        cache: Optional[ResponseCache] = None,
+        cookie_store: Optional[CookieStore] = None,
+        limiter: Optional[RateLimiter] = None,
+        instrument: Optional[Instrument] = None,
+        provider: Optional[str] = None,
+        timeout: Optional[float] = REQUEST_TIMEOUT,
+    ):
+        self._scraper = scraper
+        self.timeout = timeout
+        self.cache = cache
+        self.cookie_store = cookie_store
+        self.limiter = limiter
+        self.instrument = instrument
+        self.provider = provider
+        self._clearances = {}
+        self._checked = {}
+        self._cookie_lock = threading.Lock()
+
+        # cloudscraper calls its post hook on every response, those of the challenges it solves included.
+        if hasattr(scraper, "requestPostHook") and not getattr(scraper.requestPostHook, "timed", False):
+            scraper.requestPostHook = _timed_hook(scraper.requestPostHook)
+
+    def get(self, url: str, endpoint: Optional[str] = None, headers: Optional[Dict[str, str]] = None, **kwargs):
+        """
+        Send a GET request, serving it from the cache when possible.
+
+        :param url (str): URL to request.
+        :param endpoint (str): Endpoint type used to pick the cache TTL, None disables caching.
+        :param headers (Dict[str, str]): Extra request headers.
+        :param **kwargs: Extra arguments for the scraper, like ``timeout``.
+        :return: A ``requests.Response`` or a cached Response.
+        """
+        if self.instrument is not None:
+            return self._observed_get(url, endpoint, headers, **kwargs)
+        return self._get(url, endpoint, headers, **kwargs)[0]
+
+    def _get(self, url: str, endpoint: Optional[str], headers: Optional[Dict[str, str]], **kwargs) -> Tuple[Any, Optional[str]]:
+        """
+        :return (Tuple[Any, Optional[str]]): The response and how the cache answered ("hit", "revalidation",
+            "miss"), or None when the request is not cacheable.
+        """
+        cache = self.cache
+        if cache is None or not cache.cacheable(endpoint):
+            return self._send(url, headers, **kwargs), None
+
+        entry = cache.lookup(url)
+        if entry is not None and entry.fresh:
+            cache.record("hit")
+            return Response.from_entry(entry), "hit"
+
+        headers = dict(headers or {})
+        if entry is not None:
+            headers.update(entry.validators)
+
+        response = self._send(url, headers, **kwargs)
+
+        if entry is not None and response.status_code == 304:
+            cache.record("revalidation")
+            return Response.from_entry(cache.refresh(entry, endpoint)), "revalidation"
+
+        cache.record("miss")
+        if response.status_code == 200:
+            cache.store(url, endpoint, response.status_code, response.text, response.headers)
+
+        return response, "miss"
+
+    def _observed_get(self, url: str, endpoint: Optional[str], headers: Optional[Dict[str, str]], **kwargs):
+        event = RequestEvent(self.provider, None, urlsplit(url).hostname or "", url, endpoint)
+        arrivals = []
+        token = _arrivals.set(arrivals)
+        start = time.perf_counter()
+        try:
+            with phase("fetch"):
+                response, event.cache = self._get(url, endpoint, headers, **kwargs)
+        except BaseException as exc:
+            event.error = exc
+            raise
+        else:
+            event.status = response.status_code
+            if event.cache in (None, "miss"):
+                event.bytes = received_bytes(response)
+                if getattr(response, "elapsed", None) is not None:
+                    event.timings["response"] = response.elapsed.total_seconds()
+            return response
+        finally:
+            event.timings["total"] = time.perf_counter() - start
+            _arrivals.reset(token)
+            if len(arrivals) > 1:
+                # From the challenge page to the answer, the delay and requests solving it included.
+                event.timings["challenge"] = arrivals[-1] - arrivals[0]
+            record_request(self.instrument, event)
+
+    def close(self) -> None:
+        self._scraper.close()
+
+    def _send(self, url: str, headers: Optional[Dict[str, str]], **kwargs):
+        timeout = kwargs.pop("timeout", self.timeout)
+        if self.cookie_store is None and self.limiter is None:
+            return self._request(url, headers, timeout, **kwargs)
+
+        host = urlsplit(url).hostname or ""
+        if self.cookie_store is not None:
+            self._restore_clearance(host)
+
+        ticket = self.limiter.acquire(host, current()) if self.limiter is not None else None
+        try:
+            response = self._request(url, headers, timeout, **kwargs)
+        except Exception as exc:
+            if ticket is not None:
+                self.limiter.release(ticket, error=exc)
+            raise
+        if ticket is not None:
+            self.limiter.release(ticket, response.status_code, response.headers)
+
+        if self.cookie_store is not None:
+            self._save_clearance(host)
+
+        return response
+
+    def _request(self, url: str, headers: Optional[Dict[str, str]], timeout: Optional[float], **kwargs):
+        try:
+            return self._scraper.get(url, headers=headers, timeout=clip(timeout), **kwargs)
+        except DeadlineExceeded:
+            raise
+        except Exception as exc:
+            # The request timed out because the call ran out of time, not because of the site.
+            if expired():
+                raise DeadlineExceeded(f"deadline exceeded requesting {url}") from exc
+            raise
+
+    def _restore_clearance(self, host: str) -> None:
+        """
+        Load the stored clearance of a host into the session, unless the session already has a valid one.
+        """
+        if _session_cookies(self._scraper.cookies, host, CLEARANCE_COOKIE):
+            return
+
+        now = time.monotonic()
+        with self._cookie_lock:
+            if now - self._checked.get(host, -RELOAD_INTERVAL) < RELOAD_INTERVAL:
+                return
+            self._checked[host] = now
+
+        clearance = self.cookie_store.load(host)
+        if clearance is None:
+            return
+
+        for cookie in clearance.cookies:
+            self._scraper.cookies.set(
+                cookie["name"],
+                cookie["value"],
+                domain=cookie["domain"],
+                path=cookie["path"],
+                expires=cookie["expires"],
+                secure=cookie["secure"],
+            )
+        if clearance.user_agent:
+            self._scraper.headers["User-Agent"] = clearance.user_agent
+        self._clearances[host] = clearance.token
+
+    def _save_clearance(self, host: str) -> None:
+        """
+        Store the clearance of a host once the session solved a new challenge.
+        """
+        cookies = _session_cookies(self._scraper.cookies, host)
+        token = next((cookie["value"] for cookie in cookies if cookie["name"] == CLEARANCE_COOKIE), None)
+        if token is None or token == self._clearances.get(host):
+            return
+
+        self._clearances[host] = token
+        self.cookie_store.save(host, self._scraper.headers.get("User-Agent", ""), cookies)
+
+
+def _session_cookies(jar, host: str, name: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Unexpired cookies of a cookie jar sent to a host.
+
+    :param jar (http.cookiejar.CookieJar): Cookie jar of the session.
+    :param host (str): Host the cookies are sent to.
+    :param name (str): Only return the cookies with this name.
+    :return (List[Dict[str, Any]]):
+    """
+    now = time.time()
+    cookies = []
+    for cookie in jar:
+        domain = cookie.domain.lstrip(".")
+        if name is not None and cookie.name != name:
+            continue
+        if host != domain and not host.endswith("." + domain):
+            continue
+        if cookie.expires is not None and cookie.expires <= now:
+            continue
+        cookies.append(
+            {
+                "name": cookie.name,
+                "value": cookie.value,
+                "domain": cookie.domain,
+                "path": cookie.path,
+                "expires": cookie.expires,
+                "secure": cookie.secure,
+            }
+        )
+    return cookies
+
+
+def _timed_hook(hook: Optional[Any]) -> Any:
+    """
+    cloudscraper ``requestPostHook`` noting when each response arrives for the request observed,
+    then calling the hook it replaces.
+    """
+
+    def post_hook(scraper, response):
+        arrivals = _arrivals.get()
+        if arrivals is not None:
+            arrivals.append(time.perf_counter())
+        return hook(scraper, response) if hook is not None else response
+
+    post_hook.timed = True
+    return post_hook
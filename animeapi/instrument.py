@@ -0,0 +1,425 @@
+import functools
+import inspect
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+# Phases of a call, each one exclusive of the others: a schema built while parsing counts as schema only.
+CALL_PHASES = ("fetch", "parse", "extract", "schema")
+
+# Timings of a request. dns and connect are only measured by the async clients, on sessions they create.
+REQUEST_TIMINGS = ("dns", "connect", "response", "total")
+
+
+@dataclass
+class RequestEvent:
+    """
+    One request of a client, or its answer from the response cache.
+
+    ``timings`` holds the seconds of ``total`` and, for the requests sent, ``response``. The async
+    clients add ``dns`` and ``connect`` on the sessions they create; the sync clients cannot, as
+    requests does not expose them, and their ``response`` includes the connection. The sync
+    clients add ``challenge`` when cloudscraper solved an anti-bot challenge for the request.
+    """
+
+    provider: Optional[str]
+    method: Optional[str]
+    host: str
+    url: str
+    endpoint: Optional[str]
+    status: Optional[int] = None
+    bytes: int = 0
+    cache: Optional[str] = None
+    timings: Dict[str, float] = field(default_factory=dict)
+    error: Optional[BaseException] = None
+
+
+@dataclass
+class CallEvent:
+    """
+    One call of a client method, with the time spent in each phase by the requests and parsing done on its behalf.
+    The network timings of each request, and which clients report them, are in its RequestEvent.
+    """
+
+    provider: Optional[str]
+    method: str
+    duration: float
+    timings: Dict[str, float] = field(default_factory=dict)
+    requests: int = 0
+    bytes: int = 0
+    retries: int = 0
+    error: Optional[BaseException] = None
+
+
+class Observer(object):
+    """
+    Receiver of the events of an Instrument. Observers are called from the thread or task
+    that made the call, so they must be quick and safe to share between threads.
+    """
+
+    def on_request(self, event: RequestEvent) -> None:
+        pass
+
+    def on_call(self, event: CallEvent) -> None:
+        pass
+
+
+class _Callback(Observer):
+    def __init__(self, callback: Callable[[Union[RequestEvent, CallEvent]], None]):
+        self._callback = callback
+
+    def on_request(self, event: RequestEvent) -> None:
+        self._callback(event)
+
+    def on_call(self, event: CallEvent) -> None:
+        self._callback(event)
+
+
+class Instrument(object):
+    """
+    Reports the requests and method calls of the clients it is given to, as ``instrument=``,
+    to its observers. It may be shared between clients, sync or async.
+
+    Clients without an instrument are not wrapped at all, so instrumentation costs nothing
+    unless it is enabled.
+
+    :param observers (Union[Observer, Callable]): Observers, or callables receiving every event.
+    """
+
+    def __init__(self, *observers: Union[Observer, Callable[[Union[RequestEvent, CallEvent]], None]]):
+        self._observers: Tuple[Observer, ...] = ()
+        self._lock = threading.Lock()
+        for observer in observers:
+            self.subscribe(observer)
+
+    def subscribe(self, observer: Union[Observer, Callable[[Union[RequestEvent, CallEvent]], None]]) -> Observer:
+        """
+        Add an observer.
+
+        :param observer (Union[Observer, Callable]): Observer, or callable receiving every event.
+        :return (Observer): The observer, to unsubscribe it.
+        """
+        if not isinstance(observer, Observer):
+            observer = _Callback(observer)
+        with self._lock:
+            self._observers = self._observers + (observer,)
+        return observer
+
+    def unsubscribe(self, observer: Observer) -> None:
+        with self._lock:
+            self._observers = tuple(item for item in self._observers if item is not observer)
+
+    def emit(self, event: Union[RequestEvent, CallEvent]) -> None:
+        for observer in self._observers:
+            if isinstance(event, RequestEvent):
+                observer.on_request(event)
+            else:
+                observer.on_call(event)
+
+    def attach(self, client: Any, provider: str) -> None:
+        """
+        Wrap the public methods of a client so their calls are reported, and tag its requests
+        with the method that made them. Called by the clients given this instrument.
+
+        :param client: JKAnime, AnimeFLV or one of their async counterparts.
+        :param provider (str): Provider of the client, like ``jkanime``.
+        """
+        client._http.instrument = self
+        client._http.provider = provider
+
+        parser = getattr(client, "_parser", None)
+        if parser is not None:
+            client._parser = _TimedParser(parser)
+
+        for name, member in inspect.getmembers(type(client)):
+            if name.startswith("_") or name == "close" or not inspect.isfunction(member):
+                continue
+            # Generators are not wrapped, the calls they make on the client are reported on their own.
+            if inspect.isgeneratorfunction(member) or inspect.isasyncgenfunction(member):
+                continue
+            setattr(client, name, self._wrap(getattr(client, name), provider, name))
+
+    def _wrap(self, method: Callable, provider: str, name: str) -> Callable:
+        if inspect.iscoroutinefunction(method):
+
+            @functools.wraps(method)
+            async def async_observed(*args, **kwargs):
+                call = _Call(provider, name)
+                token = _current_call.set(call)
+                try:
+                    result = await method(*args, **kwargs)
+                except BaseException as exc:
+                    call.error = exc
+                    raise
+                finally:
+                    _current_call.reset(token)
+                    self.emit(call.event())
+                return result
+
+            return async_observed
+
+        @functools.wraps(method)
+        def observed(*args, **kwargs):
+            call = _Call(provider, name)
+            token = _current_call.set(call)
+            try:
+                return method(*args, **kwargs)
+            except BaseException as exc:
+                call.error = exc
+                raise
+            finally:
+                _current_call.reset(token)
+                self.emit(call.event())
+
+        return observed
+
+
+class _Call(object):
+    def __init__(self, provider: str, method: str):
+        self.provider = provider
+        self.method = method
+        self.start = time.perf_counter()
+        self.timings = dict.fromkeys(CALL_PHASES, 0.0)
+        self.requests = self.bytes = self.retries = 0
+        self.error = None
+        self._lock = threading.Lock()
+
+    def add(self, phase: str, elapsed: float) -> None:
+        with self._lock:
+            self.timings[phase] += elapsed
+
+    def add_request(self, size: int) -> None:
+        with self._lock:
+            self.requests += 1
+            self.bytes += size
+
+    def add_retry(self) -> None:
+        with self._lock:
+            self.retries += 1
+
+    def event(self) -> CallEvent:
+        with self._lock:
+            return CallEvent(
+                self.provider,
+                self.method,
+                time.perf_counter() - self.start,
+                dict(self.timings),
+                self.requests,
+                self.bytes,
+                self.retries,
+                self.error,
+            )
+
+
+_current_call: ContextVar[Optional[_Call]] = ContextVar("animeapi_call", default=None)
+_current_span: ContextVar[Optional["_Span"]] = ContextVar("animeapi_span", default=None)
+
+
+class _Span(object):
+    """
+    Times a phase of the current call, minus the phases nested in it.
+    """
+
+    __slots__ = ("call", "name", "start", "nested", "parent", "token")
+
+    def __init__(self, call: _Call, name: str):
+        self.call = call
+        self.name = name
+
+    def __enter__(self) -> "_Span":
+        self.parent = _current_span.get()
+        self.token = _current_span.set(self)
+        self.nested = 0.0
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        elapsed = time.perf_counter() - self.start
+        _current_span.reset(self.token)
+        self.call.add(self.name, elapsed - self.nested)
+        if self.parent is not None:
+            self.parent.nested += elapsed
+
+
+class _NoSpan(object):
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+
+_NO_SPAN = _NoSpan()
+
+
+def phase(name: str):
+    """
+    Context manager timing a phase (one of CALL_PHASES) of the instrumented call in progress,
+    it does nothing outside of one.
+
+    :param name (str): Phase name.
+    """
+    call = _current_call.get()
+    return _NO_SPAN if call is None else _Span(call, name)
+
+
+def record_retry() -> None:
+    """
+    Count a retried request in the instrumented call in progress, if any.
+    """
+    call = _current_call.get()
+    if call is not None:
+        call.add_retry()
+
+
+def record_request(instrument: Instrument, event: RequestEvent) -> None:
+    """
+    Tag a request with the instrumented call in progress, if any, and report it.
+
+    :param instrument (Instrument): Instrument of the client.
+    :param event (RequestEvent): The request.
+    """
+    call = _current_call.get()
+    if call is not None:
+        event.method = call.method
+        call.add_request(event.bytes)
+    instrument.emit(event)
+
+
+def received_bytes(response) -> int:
+    """
+    Size of the body of a response, a ``requests.Response`` or a Response of the async clients.
+
+    :return (int):
+    """
+    size = getattr(response, "size", None)
+    if size is None:
+        size = len(getattr(response, "content", None) or b"")
+    return size
+
+
+class _TimedParser(object):
+    """
+    Proxy of a parser timing its methods as the parse phase, and its schema constructors as the schema phase.
+    """
+
+    def __init__(self, parser):
+        schemas = getattr(parser, "_schemas", None)
+        self._parser = _copy_with_schemas(parser, schemas) if schemas is not None else parser
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._parser, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        def timed(*args, **kwargs):
+            with phase("parse"):
+                return attr(*args, **kwargs)
+
+        return timed
+
+
+class _TimedSchemas(dict):
+    def __init__(self, schemas: Dict[type, Callable]):
+        super().__init__()
+        self._schemas = schemas
+
+    def __missing__(self, model: type) -> Callable:
+        build = self._schemas[model]
+
+        @functools.wraps(build)
+        def timed(*args, **kwargs):
+            with phase("schema"):
+                return build(*args, **kwargs)
+
+        self[model] = timed
+        return timed
+
+
+def _copy_with_schemas(parser, schemas):
+    clone = object.__new__(type(parser))
+    clone.__dict__.update(parser.__dict__)
+    clone._schemas = _TimedSchemas(schemas)
+    return clone
+
+
+class PrometheusExporter(Observer):
+    """
+    Observer aggregating the events into counters, rendered in the Prometheus text exposition format.
+
+        exporter = PrometheusExporter()
+        jk = JKAnime(instrument=Instrument(exporter))
+        ...
+        exporter.render()  # serve it on /metrics
+
+    :param namespace (str): Prefix of the metric names.
+    """
+
+    def __init__(self, namespace: str = "animeapi"):
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Dict[Tuple[Tuple[str, str], ...], float]] = {}
+
+    def _add(self, name: str, labels: Dict[str, Any], value: float = 1.0) -> None:
+        key = tuple((label, "" if label_value is None else str(label_value)) for label, label_value in labels.items())
+        series = self._metrics.setdefault(name, {})
+        series[key] = series.get(key, 0.0) + value
+
+    def on_request(self, event: RequestEvent) -> None:
+        labels = {"provider": event.provider, "method": event.method, "host": event.host}
+        with self._lock:
+            self._add("requests_total", {**labels, "endpoint": event.endpoint, "status": event.status, "cache": event.cache})
+            self._add("received_bytes_total", labels, event.bytes)
+            if event.error is not None:
+                self._add("request_errors_total", {**labels, "error": type(event.error).__name__})
+            for timing, value in event.timings.items():
+                self._add("request_seconds_sum", {**labels, "timing": timing}, value)
+                self._add("request_seconds_count", {**labels, "timing": timing})
+
+    def on_call(self, event: CallEvent) -> None:
+        labels = {"provider": event.provider, "method": event.method}
+        with self._lock:
+            self._add("calls_total", {**labels, "outcome": "ok" if event.error is None else "error"})
+            self._add("call_seconds_sum", labels, event.duration)
+            self._add("call_seconds_count", labels)
+            self._add("retries_total", labels, event.retries)
+            for name, value in event.timings.items():
+                self._add("phase_seconds_total", {**labels, "phase": name}, value)
+
+    def render(self) -> str:
+        """
+        :return (str): Every metric in the Prometheus text exposition format.
+        """
+        types = {
+            "requests_total": "counter",
+            "received_bytes_total": "counter",
+            "request_errors_total": "counter",
+            "request_seconds": "summary",
+            "calls_total": "counter",
+            "call_seconds": "summary",
+            "retries_total": "counter",
+            "phase_seconds_total": "counter",
+        }
+        with self._lock:
+            metrics = {name: dict(series) for name, series in self._metrics.items()}
+
+        lines: List[str] = []
+        for family, kind in types.items():
+            names = [name for name in (family, f"{family}_sum", f"{family}_count") if name in metrics]
+            if not names:
+                continue
+            lines.append(f"# TYPE {self.namespace}_{family} {kind}")
+            for name in names:
+                for labels, value in sorted(metrics[name].items()):
+                    rendered = ",".join(f'{label}="{_escape(label_value)}"' for label, label_value in labels)
+                    lines.append(f"{self.namespace}_{name}{{{rendered}}} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
@@ -0,0 +1,30 @@
+import importlib
+from typing import Any, Callable, Dict, List, Tuple
+
+
+def lazy_exports(package: str, exports: Dict[str, str]) -> Tuple[Callable[[str], Any], Callable[[], List[str]]]:
+    """
+    Module ``__getattr__`` and ``__dir__`` (PEP 562) of a package whose names are imported
+    from their submodule on first access, so importing the package only loads what is used:
+
+        __getattr__, __dir__ = lazy_exports(__name__, {"JKAnime": ".jkanime", ...})
+
+    :param package (str): Name of the package, its ``__name__``.
+    :param exports (Dict[str, str]): Submodule of every exported name, relative to the package.
+    :return (Tuple[Callable, Callable]): The ``__getattr__`` and ``__dir__`` of the package.
+    """
+    namespace = importlib.import_module(package).__dict__
+
+    def __getattr__(name: str) -> Any:
+        module = exports.get(name)
+        if module is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(module, package), name)
+        # Later lookups find it in the package without going through __getattr__.
+        namespace[name] = value
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(namespace) | set(exports))
+
+    return __getattr__, __dir__
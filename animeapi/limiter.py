@@ -0,0 +1,257 @@
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Dict, Mapping, Optional
+
+from animeapi.exception import DeadlineExceeded
+
+THROTTLE_STATUS = (429, 503)
+
+# Longest Retry-After honoured, in seconds.
+MAX_RETRY_AFTER = 60
+
+# How often async waiters look for a free concurrency slot, in seconds.
+POLL_INTERVAL = 0.01
+
+
+@dataclass
+class HostStats:
+    requests: int = 0
+    throttled: int = 0
+    errors: int = 0
+    in_flight: int = 0
+    concurrency: float = 0.0
+    rate: float = 0.0
+    waited: float = 0.0
+
+
+@dataclass
+class Ticket:
+    host: str
+    started: float
+
+
+class _Host(object):
+    def __init__(self, rate: float, burst: int, concurrency: int):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.max_concurrency = concurrency
+        self.concurrency = float(concurrency)
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self.last_decrease = 0.0
+        self.stats = HostStats()
+
+    def try_acquire(self, now: float) -> Optional[float]:
+        """
+        Take a token and a concurrency slot.
+
+        :return (Optional[float]): 0 when both were taken, the seconds until a token is available,
+            or None when every concurrency slot is in use.
+        """
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.in_flight >= max(1, int(self.concurrency)):
+            return None
+
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1:
+            return (1 - self.tokens) / self.rate
+
+        self.tokens -= 1
+        self.in_flight += 1
+        return 0.0
+
+
+class RateLimiter(object):
+    """
+    Request pacing shared by the AnimeFLV and JKAnime clients, one state per host.
+
+    Every host has a token bucket, refilled at ``rate`` requests per second up to ``burst``
+    tokens, and a limit of requests in flight. Both adapt AIMD-style: they grow by
+    ``increase`` per window of successful requests up to their configured value, and are
+    multiplied by ``decrease`` when the site answers 429/503 or an anti-bot challenge. A
+    Retry-After header also pauses the host for that long.
+
+    :param rate (float): Maximum requests per second per host.
+    :param burst (int): Requests that can be sent at once after an idle period.
+    :param concurrency (int): Maximum requests in flight per host.
+    :param min_rate (float): Floor of the rate when backing off.
+    :param min_concurrency (int): Floor of the requests in flight when backing off.
+    :param increase (float): Additive increase per window of successful requests.
+    :param decrease (float): Multiplicative decrease on throttling, between 0 and 1.
+    :param hosts (Mapping[str, Dict[str, float]]): Per host overrides of ``rate``, ``burst`` and ``concurrency``.
+    """
+
+    def __init__(
+        self,
+        rate: float = 5.0,
+        burst: int = 5,
+        concurrency: int = 8,
+        min_rate: float = 0.2,
+        min_concurrency: int = 1,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        hosts: Optional[Mapping[str, Dict[str, float]]] = None,
+    ):
+        if rate <= 0 or not 0 < decrease < 1:
+            raise ValueError("rate must be positive and decrease between 0 and 1")
+
+        self.rate = rate
+        self.burst = burst
+        self.concurrency = concurrency
+        self.min_rate = min_rate
+        self.min_concurrency = min_concurrency
+        self.increase = increase
+        self.decrease = decrease
+        self._overrides = dict(hosts or {})
+        self._hosts = {}
+        self._condition = threading.Condition()
+
+    def _host(self, host: str) -> _Host:
+        state = self._hosts.get(host)
+        if state is None:
+            options = {"rate": self.rate, "burst": self.burst, "concurrency": self.concurrency, **self._overrides.get(host, {})}
+            state = self._hosts[host] = _Host(**options)
+        return state
+
+    def acquire(self, host: str, deadline: Optional[float] = None) -> Ticket:
+        """
+        Block until a request to the host may be sent.
+
+        :param host (str): Host of the request.
+        :param deadline (float): Monotonic time after which the request is not worth sending.
+        :return (Ticket): To hand back to release once the response arrived.
+        :raise DeadlineExceeded: When the request could not be sent before the deadline.
+        """
+        start = time.monotonic()
+        with self._condition:
+            state = self._host(host)
+            while True:
+                now = time.monotonic()
+                wait = state.try_acquire(now)
+                if wait == 0:
+                    return self._granted(state, host, start, now)
+                self._condition.wait(_until(wait, now, deadline, host))
+
+    async def acquire_async(self, host: str, deadline: Optional[float] = None) -> Ticket:
+        """
+        Coroutine counterpart of acquire.
+
+        :param host (str): Host of the request.
+        :param deadline (float): Monotonic time after which the request is not worth sending.
+        :return (Ticket): To hand back to release once the response arrived.
+        :raise DeadlineExceeded: When the request could not be sent before the deadline.
+        """
+        # Only loaded by the async clients, importing asyncio slows down the sync ones.
+        import asyncio
+
+        start = time.monotonic()
+        while True:
+            with self._condition:
+                state = self._host(host)
+                now = time.monotonic()
+                wait = state.try_acquire(now)
+                if wait == 0:
+                    return self._granted(state, host, start, now)
+            await asyncio.sleep(_until(POLL_INTERVAL if wait is None else wait, now, deadline, host))
+
+    def _granted(self, state: _Host, host: str, start: float, now: float) -> Ticket:
+        state.stats.requests += 1
+        state.stats.waited += now - start
+        return Ticket(host, now)
+
+    def release(
+        self,
+        ticket: Ticket,
+        status_code: Optional[int] = None,
+        headers: Optional[Mapping[str, str]] = None,
+        error: Optional[BaseException] = None,
+    ) -> None:
+        """
+        Hand back the slot of a request and adapt the host limits to its outcome.
+
+        :param ticket (Ticket): Returned by acquire.
+        :param status_code (int): Status of the response, None if the request failed.
+        :param headers (Mapping[str, str]): Headers of the response.
+        :param error (BaseException): Error raised by the request, if any.
+        """
+        now = time.monotonic()
+        with self._condition:
+            state = self._host(ticket.host)
+            state.in_flight -= 1
+
+            if throttled(status_code, headers, error):
+                state.stats.throttled += 1
+                # Requests sent before the last decrease saw the old limits, they do not decrease them again.
+                if ticket.started >= state.last_decrease:
+                    state.concurrency = max(self.min_concurrency, state.concurrency * self.decrease)
+                    state.rate = max(self.min_rate, state.rate * self.decrease)
+                    state.tokens = min(state.tokens, 0.0)
+                    state.last_decrease = now
+                state.blocked_until = max(state.blocked_until, now + _retry_after(headers))
+            elif error is not None:
+                # A cancelled request, or one out of time, is neither an error of the site nor a success.
+                if isinstance(error, Exception) and not isinstance(error, DeadlineExceeded):
+                    state.stats.errors += 1
+            else:
+                state.concurrency = min(state.max_concurrency, state.concurrency + self.increase / state.concurrency)
+                state.rate = min(state.max_rate, state.rate + self.increase / state.rate)
+
+            self._condition.notify_all()
+
+    @property
+    def stats(self) -> Dict[str, HostStats]:
+        with self._condition:
+            return {
+                host: replace(state.stats, in_flight=state.in_flight, concurrency=state.concurrency, rate=state.rate)
+                for host, state in self._hosts.items()
+            }
+
+
+def _until(wait: Optional[float], now: float, deadline: Optional[float], host: str) -> Optional[float]:
+    """
+    Time to wait for a token or slot, shortened to the deadline.
+
+    :raise DeadlineExceeded: When the wait ends after the deadline, for a token, or the deadline passed.
+    """
+    if deadline is None:
+        return wait
+    if now >= deadline or (wait is not None and now + wait > deadline):
+        raise DeadlineExceeded(f"deadline exceeded waiting for the rate limit of {host}")
+    return deadline - now if wait is None else wait
+
+
+def throttled(status_code: Optional[int], headers: Optional[Mapping[str, str]], error: Optional[BaseException] = None) -> bool:
+    """
+    Whether a response, or the error of a request, means the site is throttling the client.
+
+    :param status_code (int): Status of the response.
+    :param headers (Mapping[str, str]): Headers of the response.
+    :param error (BaseException): Error raised by the request.
+    :return (bool):
+    """
+    if error is not None:
+        # cloudscraper raises its own errors when it meets a challenge it cannot solve.
+        return type(error).__module__.startswith("cloudscraper")
+    if status_code in THROTTLE_STATUS:
+        return True
+    return status_code == 403 and _header(headers, "cf-mitigated") == "challenge"
+
+
+def _header(headers: Optional[Mapping[str, str]], name: str) -> Optional[str]:
+    for key, value in (headers or {}).items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+def _retry_after(headers: Optional[Mapping[str, str]]) -> float:
+    try:
+        return min(float(_header(headers, "retry-after") or 0), MAX_RETRY_AFTER)
+    except ValueError:
+        return 0.0
@@ -0,0 +1,366 @@
+import asyncio
+import contextvars
+import re
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from types import TracebackType
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional, Type, Union
+
+from animeapi.deadline import bounded
+from animeapi.exception import ProviderError
+from animeapi.schema import Anime, Episode, Link
+
+# Fields of Anime read from the AnimeShortInfo of every provider, when it has them.
+ANIME_FIELDS = ("type", "status", "rating", "poster", "banner", "synopsis")
+
+AnimeIds = Union[Anime, Mapping[str, str], str]
+
+
+def normalize_title(title: str) -> str:
+    """
+    Key of a title for deduplication: without accents, case or punctuation, so the
+    title of one provider matches the title or the id of the other.
+
+    :param title (str): Anime title or id, like 'Shingeki no Kyojin' or 'shingeki-no-kyojin'.
+    :return (str): Like 'shingeki no kyojin'.
+    """
+    decomposed = unicodedata.normalize("NFKD", title)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(re.split(r"[\W_]+", stripped.casefold())).strip()
+
+
+def _animes(provider: str, result: Any) -> List[Anime]:
+    return [
+        Anime(
+            title=anime.title,
+            sources={provider: str(anime.id)},
+            **{name: getattr(anime, name, None) for name in ANIME_FIELDS},
+        )
+        for anime in result.data
+    ]
+
+
+def _episodes(provider: str, result: Any) -> List[Episode]:
+    # JKAnime wraps its latest episodes in LastEpisodes, AnimeFLV returns the list.
+    episodes = getattr(result, "episodes", result)
+    normalized = []
+    for episode in episodes:
+        anime = getattr(episode, "anime_id", None) or episode.anime
+        normalized.append(Episode(id=str(episode.id), anime=anime, image_preview=episode.image_preview, sources={provider: anime}))
+    return normalized
+
+
+def _links(provider: str, result: Any) -> List[Link]:
+    # JKAnime returns EpisodeVideoUrls, AnimeFLV a list of DownloadLinkInfo.
+    if hasattr(result, "urls"):
+        return [Link(provider=provider, url=url) for url in result.urls if url]
+    return [Link(provider=provider, server=link.server, url=link.url) for link in result]
+
+
+def merge_animes(groups: List[List[Anime]]) -> List[Anime]:
+    """
+    Merge the animes of several providers, deduplicated by normalized title. The first
+    provider's fields win, the others fill the fields it lacks and add their ids.
+
+    :param groups (List[List[Anime]]): Animes of each provider, in order of preference.
+    :return (List[Anime]):
+    """
+    merged: Dict[str, Anime] = {}
+    for animes in groups:
+        for anime in animes:
+            key = normalize_title(anime.title)
+            known = merged.get(key)
+            if known is None:
+                merged[key] = anime.model_copy(update={"sources": dict(anime.sources)})
+                continue
+            for name in ANIME_FIELDS:
+                if getattr(known, name) is None:
+                    setattr(known, name, getattr(anime, name))
+            for provider, id in anime.sources.items():
+                known.sources.setdefault(provider, id)
+    return list(merged.values())
+
+
+def merge_episodes(groups: List[List[Episode]]) -> List[Episode]:
+    """
+    Merge the episodes of several providers, deduplicated by normalized anime and episode number.
+
+    :param groups (List[List[Episode]]): Episodes of each provider, in order of preference.
+    :return (List[Episode]):
+    """
+    merged: Dict[tuple, Episode] = {}
+    for episodes in groups:
+        for episode in episodes:
+            key = (normalize_title(episode.anime), episode.id)
+            known = merged.get(key)
+            if known is None:
+                merged[key] = episode.model_copy(update={"sources": dict(episode.sources)})
+                continue
+            if known.image_preview is None:
+                known.image_preview = episode.image_preview
+            for provider, anime in episode.sources.items():
+                known.sources.setdefault(provider, anime)
+    return list(merged.values())
+
+
+def merge_links(groups: List[List[Link]]) -> List[Link]:
+    """
+    Concatenate the links of several providers, without repeated urls.
+
+    :param groups (List[List[Link]]): Links of each provider, in order of preference.
+    :return (List[Link]):
+    """
+    merged: Dict[str, Link] = {}
+    for links in groups:
+        for link in links:
+            merged.setdefault(link.url, link)
+    return list(merged.values())
+
+
+def _default_providers(kwargs: Dict[str, Any], asynchronous: bool) -> Dict[str, Any]:
+    if asynchronous:
+        from animeflv.aio import AsyncAnimeFLV
+        from jkanime.aio import AsyncJKAnime
+
+        return {"animeflv": AsyncAnimeFLV(**kwargs), "jkanime": AsyncJKAnime(**kwargs)}
+
+    from animeflv.animeflv import AnimeFLV
+    from jkanime.jkanime import JKAnime
+
+    return {"animeflv": AnimeFLV(**kwargs), "jkanime": JKAnime(**kwargs)}
+
+
+def _anime_ids(anime: AnimeIds, providers: Mapping[str, Any]) -> Dict[str, str]:
+    if isinstance(anime, Anime):
+        anime = anime.sources
+    if isinstance(anime, str):
+        return {provider: anime for provider in providers}
+    return {provider: id for provider, id in anime.items() if provider in providers}
+
+
+class AnimeAPI(object):
+    """
+    Client of every provider at once. Each call goes out to the providers concurrently,
+    and their results are normalized into the schemas of animeapi.schema and merged.
+
+    With ``hedged=True`` a call returns the first useful answer, one with results, and
+    the slower requests are abandoned: cancelled if not started yet, their result
+    discarded otherwise, a sync request cannot be interrupted.
+
+    A provider that fails is left out of the result, ProviderError is only raised when
+    every provider failed.
+
+    Like the clients, every method accepts a ``timeout``, the deadline of the call in
+    seconds: the providers that did not answer by then are left out.
+
+    :param providers (Dict[str, Any]): Clients by provider name, in order of preference
+        (default is a new AnimeFLV and JKAnime, created with the other arguments).
+    :param call_timeout (float): Default deadline of every call, in seconds.
+    :param **kwargs: Arguments of the clients created, like ``cache`` or ``limiter``.
+    """
+
+    def __init__(self, *args, **kwargs):
+        providers = kwargs.pop("providers", None)
+        self._call_timeout = kwargs.get("call_timeout", None)
+        self._providers: Dict[str, Any] = dict(providers) if providers is not None else _default_providers(kwargs, False)
+
+    @property
+    def providers(self) -> Dict[str, Any]:
+        return dict(self._providers)
+
+    def close(self) -> None:
+        for client in self._providers.values():
+            client.close()
+
+    def __enter__(self) -> "AnimeAPI":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+    @bounded
+    def search(self, query: str, hedged: bool = False) -> List[Anime]:
+        """
+        Search every provider.
+
+        :param query (str): Query, like 'shingeki no kyojin'.
+        :param hedged (bool): Whether to return the first provider that found anything.
+        :return (List[Anime]): Animes of every provider, deduplicated by title.
+        """
+        calls = {provider: _call(_animes, provider, client.search, query) for provider, client in self._providers.items()}
+        return merge_animes(self._fan_out(calls, hedged))
+
+    @bounded
+    def get_latest_episodes(self, hedged: bool = False) -> List[Episode]:
+        """
+        Latest episodes of every provider.
+
+        :param hedged (bool): Whether to return the first provider that answered.
+        :return (List[Episode]): Episodes of every provider, deduplicated by anime and number.
+        """
+        calls = {provider: _call(_episodes, provider, client.get_latest_episodes) for provider, client in self._providers.items()}
+        return merge_episodes(self._fan_out(calls, hedged))
+
+    @bounded
+    def get_links(self, anime: AnimeIds, episode: Union[str, int] = 1, hedged: bool = False) -> List[Link]:
+        """
+        Video links of an episode on every provider.
+
+        :param anime (Union[Anime, Mapping[str, str], str]): An Anime of search, the anime id on
+            each provider, or an id shared by every provider.
+        :param episode (Union[str, int]): Episode number.
+        :param hedged (bool): Whether to return the first provider with links.
+        :return (List[Link]): Links of every provider, without repeated urls.
+        """
+        ids = _anime_ids(anime, self._providers)
+        calls = {provider: _call(_links, provider, self._providers[provider].get_links, id, episode) for provider, id in ids.items()}
+        return merge_links(self._fan_out(calls, hedged))
+
+    def _fan_out(self, calls: Dict[str, Callable[[], list]], hedged: bool) -> List[list]:
+        if not calls:
+            return []
+
+        results: Dict[str, list] = {}
+        errors: Dict[str, Exception] = {}
+        executor = ThreadPoolExecutor(max_workers=len(calls))
+        try:
+            futures = {executor.submit(contextvars.copy_context().run, call): provider for provider, call in calls.items()}
+            for future in as_completed(futures):
+                provider = futures[future]
+                try:
+                    results[provider] = future.result()
+                except Exception as exc:
+                    errors[provider] = exc
+                    continue
+                if hedged and results[provider]:
+                    return [results[provider]]
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return _ordered(calls, results, errors)
+
+
+class AsyncAnimeAPI(object):
+    """
+    Asyncio counterpart of AnimeAPI, with the same methods as coroutines. With
+    ``hedged=True`` the slower requests are cancelled once a provider answered.
+
+    :param providers (Dict[str, Any]): Async clients by provider name, in order of preference
+        (default is a new AsyncAnimeFLV and AsyncJKAnime, created with the other arguments).
+    :param call_timeout (float): Default deadline of every call, in seconds.
+    :param **kwargs: Arguments of the clients created, like ``cache`` or ``limiter``.
+    """
+
+    def __init__(self, *args, **kwargs):
+        providers = kwargs.pop("providers", None)
+        self._call_timeout = kwargs.get("call_timeout", None)
+        self._providers: Dict[str, Any] = dict(providers) if providers is not None else _default_providers(kwargs, True)
+
+    @property
+    def providers(self) -> Dict[str, Any]:
+        return dict(self._providers)
+
+    async def close(self) -> None:
+        for client in self._providers.values():
+            await client.close()
+
+    async def __aenter__(self) -> "AsyncAnimeAPI":
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        await self.close()
+
+    @bounded
+    async def search(self, query: str, hedged: bool = False) -> List[Anime]:
+        """
+        Search every provider.
+
+        :param query (str): Query, like 'shingeki no kyojin'.
+        :param hedged (bool): Whether to return the first provider that found anything.
+        :return (List[Anime]): Animes of every provider, deduplicated by title.
+        """
+        calls = {provider: _async_call(_animes, provider, client.search, query) for provider, client in self._providers.items()}
+        return merge_animes(await self._fan_out(calls, hedged))
+
+    @bounded
+    async def get_latest_episodes(self, hedged: bool = False) -> List[Episode]:
+        """
+        Latest episodes of every provider.
+
+        :param hedged (bool): Whether to return the first provider that answered.
+        :return (List[Episode]): Episodes of every provider, deduplicated by anime and number.
+        """
+        calls = {provider: _async_call(_episodes, provider, client.get_latest_episodes) for provider, client in self._providers.items()}
+        return merge_episodes(await self._fan_out(calls, hedged))
+
+    @bounded
+    async def get_links(self, anime: AnimeIds, episode: Union[str, int] = 1, hedged: bool = False) -> List[Link]:
+        """
+        Video links of an episode on every provider.
+
+        :param anime (Union[Anime, Mapping[str, str], str]): An Anime of search, the anime id on
+            each provider, or an id shared by every provider.
+        :param episode (Union[str, int]): Episode number.
+        :param hedged (bool): Whether to return the first provider with links.
+        :return (List[Link]): Links of every provider, without repeated urls.
+        """
+        ids = _anime_ids(anime, self._providers)
+        calls = {
+            provider: _async_call(_links, provider, self._providers[provider].get_links, id, episode) for provider, id in ids.items()
+        }
+        return merge_links(await self._fan_out(calls, hedged))
+
+    async def _fan_out(self, calls: Dict[str, Callable[[], Awaitable[list]]], hedged: bool) -> List[list]:
+        if not calls:
+            return []
+
+        results: Dict[str, list] = {}
+        errors: Dict[str, Exception] = {}
+        tasks = {asyncio.ensure_future(call()): provider for provider, call in calls.items()}
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    provider = tasks[task]
+                    if task.exception() is not None:
+                        errors[provider] = task.exception()
+                        continue
+                    results[provider] = task.result()
+                    if hedged and results[provider]:
+                        return [results[provider]]
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        return _ordered(calls, results, errors)
+
+
+def _call(normalize: Callable[[str, Any], list], provider: str, method: Callable, *args) -> Callable[[], list]:
+    return lambda: normalize(provider, method(*args))
+
+
+def _async_call(normalize: Callable[[str, Any], list], provider: str, method: Callable, *args) -> Callable[[], Awaitable[list]]:
+    async def call() -> list:
+        return normalize(provider, await method(*args))
+
+    return call
+
+
+def _ordered(calls: Dict[str, Any], results: Dict[str, list], errors: Dict[str, Exception]) -> List[list]:
+    if not results:
+        raise ProviderError(errors)
+    # Merged in order of preference, not of arrival, so the result does not depend on timing.
+    return [results[provider] for provider in calls if provider in results]
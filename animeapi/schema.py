@@ -0,0 +1,29 @@
+from typing import Dict, Optional
+
+from pydantic import Field
+
+from animeapi.construct import Schema
+
+
+class Anime(Schema):
+    title: str = Field(..., description="Anime title")
+    type: Optional[str] = Field(None, description="Anime type")
+    status: Optional[str] = Field(None, description="Anime status")
+    rating: Optional[str] = Field(None, description="Anime rating")
+    poster: Optional[str] = Field(None, description="Anime poster")
+    banner: Optional[str] = Field(None, description="Anime banner")
+    synopsis: Optional[str] = Field(None, description="Anime synopsis")
+    sources: Dict[str, str] = Field(..., description="Anime id on each provider", examples=[{"jkanime": "one-piece"}])
+
+
+class Episode(Schema):
+    id: str = Field(..., description="Episode number")
+    anime: str = Field(..., description="Anime id on the first provider")
+    image_preview: Optional[str] = Field(None, description="Episode image preview")
+    sources: Dict[str, str] = Field(..., description="Anime id on each provider")
+
+
+class Link(Schema):
+    provider: str = Field(..., description="Provider of the link")
+    server: Optional[str] = Field(None, description="Video server, when the provider names it")
+    url: str = Field(..., description="Video url")
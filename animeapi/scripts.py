@@ -0,0 +1,111 @@
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from animeapi.instrument import phase
+
+_TOKENS = re.compile(r"[\[\]{}\"'\\]")
+_STRING_TOKENS = {'"': re.compile(r'["\\]'), "'": re.compile(r"['\\]")}
+_PLAIN_END = re.compile(r"[;\n]")
+_OPENERS = {"[": "]", "{": "}"}
+
+
+@lru_cache(maxsize=None)
+def _declarations(names: Tuple[str, ...]) -> "re.Pattern":
+    return re.compile(r"\bvar\s+(" + "|".join(re.escape(name) for name in names) + r")\s*=\s*")
+
+
+def _string_end(text: str, position: int, quote: str) -> Optional[int]:
+    """
+    Find where the string literal whose content starts at ``position`` ends.
+
+    :return (Optional[int]): The index after the closing quote, or None if it is never closed.
+    """
+    pattern = _STRING_TOKENS[quote]
+    while True:
+        token = pattern.search(text, position)
+        if token is None:
+            return None
+        if token.group() == "\\":
+            position = token.end() + 1
+            continue
+        return token.end()
+
+
+def _literal_end(text: str, position: int) -> Optional[int]:
+    """
+    Find where the array or object literal opening at ``position`` ends, skipping strings.
+
+    :return (Optional[int]): The index after the closing bracket, or None if it is never closed.
+    """
+    stack = []
+    while True:
+        token = _TOKENS.search(text, position)
+        if token is None:
+            return None
+
+        char = token.group()
+        position = token.end()
+
+        if char in _STRING_TOKENS:
+            position = _string_end(text, position, char)
+            if position is None:
+                return None
+        elif char == "\\":
+            position += 1
+        elif char in _OPENERS:
+            stack.append(_OPENERS[char])
+        else:
+            if not stack or stack.pop() != char:
+                return None
+            if not stack:
+                return position
+
+
+def extract_variables(text: str, names: Iterable[str]) -> Dict[str, List[str]]:
+    """
+    Extract the values of JavaScript ``var`` declarations from a raw page in a single pass,
+    without building a DOM.
+
+    Array and object literals are returned as their source text, ready for ``json.loads``,
+    string literals are returned without their quotes and anything else up to the end of
+    the statement.
+
+    :param text (str): The raw page.
+    :param names (Iterable[str]): The variable names to extract, like ``videos`` or ``episodes``.
+    :return (Dict[str, List[str]]): The values of every declaration of each name, in page order.
+    """
+    with phase("extract"):
+        return _extract_variables(text, names)
+
+
+def _extract_variables(text: str, names: Iterable[str]) -> Dict[str, List[str]]:
+    found = {name: [] for name in names}
+    pattern = _declarations(tuple(sorted(found)))
+    position = 0
+
+    while True:
+        match = pattern.search(text, position)
+        if match is None:
+            return found
+
+        start = match.end()
+        char = text[start:start + 1]
+
+        if char in _OPENERS:
+            end = _literal_end(text, start)
+            value = text[start:end] if end is not None else None
+        elif char in _STRING_TOKENS:
+            end = _string_end(text, start + 1, char)
+            value = text[start + 1:end - 1] if end is not None else None
+        else:
+            plain = _PLAIN_END.search(text, start)
+            end = plain.start() if plain is not None else len(text)
+            value = text[start:end].strip()
+
+        if value is None:
+            position = start
+            continue
+
+        found[match.group(1)].append(value)
+        position = end
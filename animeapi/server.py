@@ -0,0 +1,577 @@
+"""
+JSON HTTP API of the async clients, built on asyncio streams:
+
+    python -m animeapi.server --port 8000
+
+    GET /                                       routes and their parameters
+    GET /jkanime/get_anime_info?id=tensei       any public method of a client
+    GET /animeflv/search?query=one&page=2
+    GET /jkanime/get_anime_info_many?ids=a,b    lists are comma separated
+    GET /all/search?query=naruto                AsyncAnimeAPI, both sites merged
+    GET /health
+    GET /metrics                                Prometheus text format
+
+Every method accepts a ``timeout`` parameter, the deadline of the call, shortened to
+the server's ``call_timeout``. The clients share one response cache and rate limiter,
+identical concurrent requests are answered by a single call, and at most
+``max_concurrency`` calls run at once.
+"""
+
+import argparse
+import asyncio
+import enum
+import functools
+import inspect
+import json
+import math
+import operator
+import signal
+import time
+import typing
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+from animeapi.cache import ResponseCache, create_cache
+from animeapi.deadline import deadline
+from animeapi.exception import DeadlineExceeded, HTTPError, ProviderError
+from animeapi.instrument import Instrument, PrometheusExporter
+from animeapi.limiter import RateLimiter
+from animeapi.singleflight import AsyncSingleFlight
+from animeapi.streams import StreamCache
+
+# Methods of the clients not exposed: they write, or do not return a result.
+EXCLUDED = ("close", "refresh_catalog")
+
+# Longest request head accepted, in bytes.
+MAX_HEAD = 16 * 1024
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    502: "Bad Gateway",
+    503: "Service Unavailable",
+    504: "Gateway Timeout",
+}
+
+
+class Route(NamedTuple):
+    method: Callable
+    parameters: Dict[str, inspect.Parameter]
+
+
+class Reply(NamedTuple):
+    status: int
+    body: bytes
+    content_type: str = "application/json"
+    headers: Tuple[Tuple[str, str], ...] = ()
+
+
+def jsonable(value: Any) -> Any:
+    """
+    Value of a client result that json can encode: schemas are dumped, errors of
+    methods like get_anime_info_many are turned into ``{"error": ..., "message": ...}``.
+
+    :param value (Any): A result of a client.
+    :return (Any):
+    """
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json")
+    if isinstance(value, BaseException):
+        return {"error": type(value).__name__, "message": str(value)}
+    if isinstance(value, dict):
+        return {str(key): jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [jsonable(item) for item in value]
+    if isinstance(value, enum.Enum):
+        return value.name
+    return value
+
+
+def routes(providers: Dict[str, Any]) -> Dict[str, Route]:
+    """
+    Routes of the public coroutine methods of the clients, like ``/jkanime/get_anime_info``.
+    Iterators are left out, their paginated counterparts are exposed.
+
+    :param providers (Dict[str, Any]): Clients by provider name.
+    :return (Dict[str, Route]): Routes by path.
+    """
+    found = {}
+    for provider, client in providers.items():
+        for name, function in inspect.getmembers(type(client), inspect.iscoroutinefunction):
+            if name.startswith("_") or name in EXCLUDED:
+                continue
+            parameters = {
+                parameter.name: parameter
+                for parameter in list(inspect.signature(function).parameters.values())[1:]
+                if parameter.kind not in (inspect.Parameter.VAR_POSITIONAL, inspect.Parameter.VAR_KEYWORD)
+            }
+            found[f"/{provider}/{name}"] = Route(getattr(client, name), parameters)
+    return found
+
+
+def convert(value: str, annotation: Any) -> Any:
+    """
+    Convert a query string value to the annotated type of a parameter.
+
+    :param value (str): The raw value.
+    :param annotation (Any): Annotation of the parameter. For a Union the first type
+        is used, ``Union[str, int]`` stays a string.
+    :return (Any):
+    :raise ValueError: When the value does not fit the type.
+    """
+    origin = typing.get_origin(annotation)
+    if origin is typing.Union:
+        annotation = next(arg for arg in typing.get_args(annotation) if arg is not type(None))
+        origin = typing.get_origin(annotation)
+    if origin is not None and origin is not typing.Union and issubclass(origin, typing.Iterable) and origin is not str:
+        return [item for item in value.split(",") if item]
+    if annotation is bool:
+        if value.lower() not in ("1", "true", "yes", "0", "false", "no"):
+            raise ValueError(f"not a boolean: {value!r}")
+        return value.lower() in ("1", "true", "yes")
+    if isinstance(annotation, type) and issubclass(annotation, enum.Flag):
+        return functools.reduce(operator.or_, (annotation[name] for name in value.split(",")))
+    if isinstance(annotation, type) and issubclass(annotation, enum.Enum):
+        return annotation[value]
+    if annotation in (int, float):
+        return annotation(value)
+    return value
+
+
+def status_of(error: BaseException) -> int:
+    """
+    :return (int): HTTP status answered for an error of a client.
+    """
+    if isinstance(error, DeadlineExceeded):
+        return 504
+    if isinstance(error, (HTTPError, ProviderError)) or type(error).__name__.endswith("ParseError"):
+        return 502
+    # The site could not be reached or answered garbage.
+    if type(error).__module__.split(".")[0] in ("aiohttp", "pydantic", "pydantic_core"):
+        return 502
+    if isinstance(error, ValueError):
+        return 400
+    return 500
+
+
+class AnimeServer(object):
+    """
+    JSON HTTP server exposing the public methods of AsyncAnimeFLV and AsyncJKAnime, and
+    AsyncAnimeAPI under ``/all``. Requests are served with HTTP/1.1 keep-alive.
+
+    Identical concurrent requests share a single call. At most ``max_concurrency`` calls run
+    at once, ``max_pending`` more wait for a slot, and further requests are answered 503.
+    On stop the server stops accepting connections, lets the requests in progress finish for
+    up to ``grace`` seconds, and closes the clients.
+
+        server = AnimeServer(port=8000)
+        await server.serve()  # until SIGINT or SIGTERM
+
+    :param host (str): Address to listen on.
+    :param port (int): Port to listen on, 0 for any free port.
+    :param providers (Dict[str, Any]): Async clients by provider name (default is a new
+        AsyncAnimeFLV and AsyncJKAnime sharing the cache, limiter and instrument).
+    :param cache (ResponseCache): Response cache of the clients created (default is in memory).
+    :param limiter (RateLimiter): Rate limiter of the clients created (default is a new one).
+    :param stream_cache (StreamCache): Cache of the resolved video streams of the clients created
+        (default is in memory).
+    :param exporter (PrometheusExporter): Metrics of the clients served on /metrics (default is
+        a new one, attached to the clients created).
+    :param max_concurrency (int): Calls running at once.
+    :param max_pending (int): Calls waiting for a slot before requests are refused.
+    :param call_timeout (float): Longest deadline of a call, in seconds, None for no limit.
+    :param grace (float): Seconds left to the requests in progress on stop.
+    :param keep_alive (float): Seconds an idle connection is kept open.
+    :param **kwargs: Arguments of the clients created, like ``trusted`` or ``request_timeout``.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        providers: Optional[Dict[str, Any]] = None,
+        cache: Optional[ResponseCache] = None,
+        limiter: Optional[RateLimiter] = None,
+        stream_cache: Optional[StreamCache] = None,
+        exporter: Optional[PrometheusExporter] = None,
+        max_concurrency: int = 16,
+        max_pending: int = 64,
+        call_timeout: Optional[float] = 30,
+        grace: float = 10,
+        keep_alive: float = 5,
+        **kwargs,
+    ):
+        from animeapi.multi import AsyncAnimeAPI
+
+        self.host = host
+        self.port = port
+        self.cache = cache if cache is not None else create_cache("memory")
+        self.limiter = limiter if limiter is not None else RateLimiter()
+        self.stream_cache = stream_cache if stream_cache is not None else StreamCache()
+        self.exporter = exporter if exporter is not None else PrometheusExporter()
+        self.max_concurrency = max_concurrency
+        self.max_pending = max_pending
+        self.call_timeout = call_timeout
+        self.grace = grace
+        self.keep_alive = keep_alive
+
+        if providers is None:
+            self._api = AsyncAnimeAPI(
+                cache=self.cache,
+                limiter=self.limiter,
+                stream_cache=self.stream_cache,
+                instrument=Instrument(self.exporter),
+                **kwargs,
+            )
+        else:
+            self._api = AsyncAnimeAPI(providers=providers)
+        self._routes = routes(self._api.providers)
+        self._routes.update(routes({"all": self._api}))
+
+        self._flights = AsyncSingleFlight()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self._closing = False
+        self._connections: Dict[asyncio.Task, asyncio.StreamWriter] = {}
+        self._busy: Set[asyncio.Task] = set()
+        self._calls: Set[asyncio.Task] = set()
+        self._running = 0
+        self._pending = 0
+        self._started = time.monotonic()
+        self._counts: Dict[Tuple[str, int], int] = {}
+
+    @property
+    def providers(self) -> Dict[str, Any]:
+        return self._api.providers
+
+    async def start(self) -> None:
+        """
+        Start listening. With ``port=0`` the port picked is then in ``self.port``.
+        """
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self._stopping = asyncio.Event()
+        self._server = await asyncio.start_server(self._serve_connection, self.host, self.port, limit=MAX_HEAD)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._started = time.monotonic()
+
+    async def stop(self) -> None:
+        """
+        Stop accepting connections, close the idle ones, give the requests in progress
+        ``grace`` seconds to finish, then close the clients.
+        """
+        if self._closing:
+            return
+        self._closing = True
+        if self._server is not None:
+            self._server.close()
+
+        # Idle connections see the end of the stream, busy ones close after their response.
+        for task, writer in list(self._connections.items()):
+            if task not in self._busy:
+                writer.close()
+        if self._connections:
+            _, pending = await asyncio.wait(list(self._connections), timeout=self.grace)
+            # Shared calls run in their own task, they are cancelled along with their connections.
+            pending |= self._calls
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        if self._server is not None:
+            await self._server.wait_closed()
+        await self._api.close()
+        if self._stopping is not None:
+            self._stopping.set()
+
+    async def serve(self) -> None:
+        """
+        Start the server and run it until SIGINT or SIGTERM, or until stop is called.
+        """
+        await self.start()
+        loop = asyncio.get_running_loop()
+        signals = []
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(signum, lambda: asyncio.ensure_future(self.stop()))
+                signals.append(signum)
+            except (NotImplementedError, RuntimeError):
+                # No signal handlers on Windows event loops, nor outside the main thread.
+                pass
+        try:
+            await self._stopping.wait()
+        finally:
+            for signum in signals:
+                loop.remove_signal_handler(signum)
+            await self.stop()
+
+    async def __aenter__(self) -> "AnimeServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.stop()
+
+    async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        self._connections[task] = writer
+        try:
+            while not self._closing:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.keep_alive)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    await self._write(writer, "GET", _error(413, "request head too large"), False)
+                    break
+
+                self._busy.add(task)
+                method, target, keep_alive, length = _parse_head(head)
+                if length:
+                    # Only GET and HEAD are served, a body is read and ignored.
+                    if length > MAX_HEAD:
+                        await self._write(writer, method, _error(413, "request body too large"), False)
+                        break
+                    await reader.readexactly(length)
+
+                reply = await self._handle(method, target)
+                keep_alive = keep_alive and not self._closing
+                await self._write(writer, method, reply, keep_alive)
+                self._busy.discard(task)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except asyncio.CancelledError:
+            # Cancelled by stop once the grace period is over, the connection is simply dropped.
+            pass
+        finally:
+            del self._connections[task]
+            self._busy.discard(task)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, asyncio.CancelledError):
+                pass
+
+    async def _write(self, writer: asyncio.StreamWriter, method: str, reply: Reply, keep_alive: bool) -> None:
+        lines = [
+            f"HTTP/1.1 {reply.status} {REASONS.get(reply.status, '')}",
+            f"Content-Type: {reply.content_type}",
+            f"Content-Length: {len(reply.body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        lines.extend(f"{name}: {value}" for name, value in reply.headers)
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        if method != "HEAD":
+            writer.write(reply.body)
+        await writer.drain()
+
+    async def _handle(self, method: str, target: str) -> Reply:
+        url = urlsplit(target)
+        path = url.path.rstrip("/") or "/"
+        if method not in ("GET", "HEAD"):
+            reply = _error(405, f"method {method} not allowed", (("Allow", "GET, HEAD"),))
+        elif path == "/health":
+            reply = self._health()
+        elif path == "/metrics":
+            reply = Reply(200, self.metrics().encode(), "text/plain; version=0.0.4")
+        elif path == "/":
+            reply = _json(200, {path: list(route.parameters) for path, route in self._routes.items()})
+        elif path in self._routes:
+            reply = await self._call(path, parse_qsl(url.query, keep_blank_values=True))
+        else:
+            reply = _error(404, f"no route {path}")
+
+        key = (path if path in self._routes or path in ("/", "/health", "/metrics") else "other", reply.status)
+        self._counts[key] = self._counts.get(key, 0) + 1
+        return reply
+
+    async def _call(self, path: str, query: List[Tuple[str, str]]) -> Reply:
+        route = self._routes[path]
+        try:
+            arguments = _arguments(route, query)
+            timeout = _timeout(arguments.pop("timeout", None), self.call_timeout)
+        except ValueError as exc:
+            return _error(400, str(exc))
+
+        if self._running + self._pending >= self.max_concurrency + self.max_pending:
+            return _error(503, "too many requests in progress", (("Retry-After", "1"),))
+
+        # The deadline is not part of the key, a shared call runs with the deadline of its first request.
+        # Each request still waits for it until its own deadline, and runs it again when the call ran
+        # out of the time of the first request but not of this one.
+        key = (path, tuple(sorted((name, value) for name, value in query if name != "timeout")))
+        try:
+            with deadline(timeout):
+                return await self._flights.do(key, self._admit, route, arguments, timeout)
+        except DeadlineExceeded as exc:
+            return _error(status_of(exc), str(exc), error=type(exc).__name__)
+
+    def _admit(self, route: Route, arguments: Dict[str, Any], timeout: Optional[float]) -> Awaitable[Reply]:
+        # Only called for the first request of a key, and counted at once, before the task of the call starts.
+        self._pending += 1
+        return self._run(route, arguments, timeout)
+
+    async def _run(self, route: Route, arguments: Dict[str, Any], timeout: Optional[float]) -> Reply:
+        task = asyncio.current_task()
+        self._calls.add(task)
+        task.add_done_callback(self._calls.discard)
+        try:
+            await self._slots.acquire()
+        finally:
+            self._pending -= 1
+
+        self._running += 1
+        try:
+            result = await route.method(**arguments, timeout=timeout)
+            return _json(200, jsonable(result))
+        except DeadlineExceeded:
+            # Left to the flight, which tells the requests still in time to run the call again.
+            raise
+        except Exception as exc:
+            return _error(status_of(exc), str(exc), error=type(exc).__name__)
+        finally:
+            self._running -= 1
+            self._slots.release()
+
+    def _health(self) -> Reply:
+        body = {
+            "status": "stopping" if self._closing else "ok",
+            "uptime": round(time.monotonic() - self._started, 3),
+            "running": self._running,
+            "pending": self._pending,
+            "connections": len(self._connections),
+            "providers": list(self.providers),
+        }
+        return _json(503 if self._closing else 200, body)
+
+    def metrics(self) -> str:
+        """
+        :return (str): Metrics of the server, the cache, the limiter and the clients, in the
+            Prometheus text exposition format.
+        """
+        namespace = self.exporter.namespace
+        lines = [f"# TYPE {namespace}_server_requests_total counter"]
+        for (path, status), count in sorted(self._counts.items()):
+            lines.append(f'{namespace}_server_requests_total{{path="{path}",status="{status}"}} {count}')
+
+        gauges = {
+            "server_running": self._running,
+            "server_pending": self._pending,
+            "server_connections": len(self._connections),
+        }
+        counters = {"server_calls_total": self._flights.calls, "server_coalesced_total": self._flights.shared}
+        stats = self.cache.stats
+        gauges["cache_entries"] = stats.size
+        for name in ("hits", "misses", "revalidations", "evictions"):
+            counters[f"cache_{name}_total"] = getattr(stats, name)
+        streams = self.stream_cache.stats
+        gauges["stream_cache_entries"] = streams.entries
+        gauges["stream_cache_bytes"] = streams.size
+        for name in ("hits", "partial", "misses", "refreshes", "evictions"):
+            counters[f"stream_cache_{name}_total"] = getattr(streams, name)
+
+        for kind, values in (("gauge", gauges), ("counter", counters)):
+            for name, value in values.items():
+                lines.append(f"# TYPE {namespace}_{name} {kind}")
+                lines.append(f"{namespace}_{name} {value:g}")
+
+        hosts = self.limiter.stats
+        for name, kind in (("rate", "gauge"), ("concurrency", "gauge"), ("in_flight", "gauge"), ("throttled", "counter")):
+            if hosts:
+                lines.append(f"# TYPE {namespace}_limiter_{name} {kind}")
+            for host, host_stats in sorted(hosts.items()):
+                lines.append(f'{namespace}_limiter_{name}{{host="{host}"}} {getattr(host_stats, name):g}')
+
+        return "\n".join(lines) + "\n" + self.exporter.render()
+
+
+def _parse_head(head: bytes) -> Tuple[str, str, bool, int]:
+    """
+    :return (Tuple[str, str, bool, int]): Method, target, whether to keep the connection open and body length.
+    """
+    request_line, *header_lines = head.decode("latin-1").split("\r\n")
+    method, target, version = (request_line.split(" ") + ["", ""])[:3]
+    headers = {}
+    for line in header_lines:
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    connection = headers.get("connection", "").lower()
+    keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        length = 0
+    return method.upper(), target or "/", keep_alive, length
+
+
+def _arguments(route: Route, query: List[Tuple[str, str]]) -> Dict[str, Any]:
+    arguments = {}
+    for name, value in query:
+        if name == "timeout":
+            arguments[name] = float(value)
+            continue
+        parameter = route.parameters.get(name)
+        if parameter is None:
+            raise ValueError(f"unknown parameter {name!r}, expected one of {list(route.parameters)}")
+        try:
+            arguments[name] = convert(value, parameter.annotation)
+        except (KeyError, ValueError) as exc:
+            raise ValueError(f"invalid value for {name!r}: {value!r}") from exc
+
+    missing = [name for name, parameter in route.parameters.items() if parameter.default is inspect.Parameter.empty and name not in arguments]
+    if missing:
+        raise ValueError(f"missing parameter {', '.join(map(repr, missing))}")
+    return arguments
+
+
+def _timeout(requested: Optional[float], limit: Optional[float]) -> Optional[float]:
+    if requested is None:
+        return limit
+    if not math.isfinite(requested) or requested <= 0:
+        raise ValueError("timeout must be a positive number of seconds")
+    return requested if limit is None else min(requested, limit)
+
+
+def _json(status: int, body: Any, headers: Tuple[Tuple[str, str], ...] = ()) -> Reply:
+    return Reply(status, json.dumps(body, ensure_ascii=False).encode(), "application/json; charset=utf-8", headers)
+
+
+def _error(status: int, message: str, headers: Tuple[Tuple[str, str], ...] = (), error: Optional[str] = None) -> Reply:
+    return _json(status, {"error": error or REASONS[status], "message": message}, headers)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m animeapi.server", description="JSON HTTP API of AnimeFLV and JKAnime.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-concurrency", type=int, default=16, help="calls running at once")
+    parser.add_argument("--max-pending", type=int, default=64, help="calls waiting for a slot before answering 503")
+    parser.add_argument("--call-timeout", type=float, default=30, help="longest deadline of a call, in seconds")
+    parser.add_argument("--grace", type=float, default=10, help="seconds left to the requests in progress on shutdown")
+    parser.add_argument("--cache-dir", help="keep the response cache on disk in this directory, instead of in memory")
+    parser.add_argument("--trusted", action="store_true", help="build the schemas without validation")
+    args = parser.parse_args(argv)
+
+    cache = create_cache("disk", directory=args.cache_dir) if args.cache_dir else None
+    server = AnimeServer(
+        host=args.host,
+        port=args.port,
+        cache=cache,
+        max_concurrency=args.max_concurrency,
+        max_pending=args.max_pending,
+        call_timeout=args.call_timeout,
+        grace=args.grace,
+        trusted=args.trusted,
+    )
+    asyncio.run(server.serve())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+import functools
+import inspect
+import threading
+from typing import Any, Callable, Hashable, Optional
+
+from animeapi.deadline import expired, remaining
+from animeapi.exception import DeadlineExceeded
+
+
+class _Call(object):
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """
+    Deduplicates concurrent identical calls: while a call for a key is running, other
+    threads asking for the same key wait for it and get its result, or its error, instead
+    of running the call again. Once the call finishes the next one for the key runs anew.
+
+    Every waiter keeps its own deadline (see animeapi.deadline): it stops waiting with
+    DeadlineExceeded once its deadline passed, and when the shared call ran out of the
+    time of the thread that started it, a waiter with time left runs the call again.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.shared = 0
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run ``fn(*args, **kwargs)``, or wait for the running call of the same key.
+
+        :param key (Hashable): Identity of the call.
+        :param fn (Callable): The function to call.
+        :return: The result of the call.
+        :raise DeadlineExceeded: When the deadline of the caller passed while waiting.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+                leader = True
+            else:
+                self.shared += 1
+                leader = False
+
+        if not leader:
+            left = remaining()
+            if not call.done.wait(None if left is None else max(0.0, left)):
+                raise DeadlineExceeded("deadline exceeded waiting for a shared call")
+            if isinstance(call.error, DeadlineExceeded) and not expired():
+                # The call ran out of the time of its leader, not of this caller.
+                return self.do(key, fn, *args, **kwargs)
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class AsyncSingleFlight(object):
+    """
+    Asyncio counterpart of SingleFlight. The shared call runs in its own task, so it
+    keeps running for the other waiters if the caller that started it is cancelled, or
+    stops waiting at its deadline. The task runs with the deadline of that caller.
+    """
+
+    def __init__(self):
+        self._tasks = {}
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Await ``fn(*args, **kwargs)``, or the running call of the same key.
+
+        :param key (Hashable): Identity of the call.
+        :param fn (Callable): The coroutine function to call.
+        :return: The result of the call.
+        :raise DeadlineExceeded: When the deadline of the caller passed while waiting.
+        """
+        import asyncio
+
+        task = self._tasks.get(key)
+        if task is None:
+            task = self._tasks[key] = asyncio.ensure_future(fn(*args, **kwargs))
+            task.add_done_callback(functools.partial(self._done, key))
+            self.calls += 1
+        else:
+            self.shared += 1
+
+        # Unlike awaiting it, waiting for the task does not cancel it when this caller is cancelled.
+        left = remaining()
+        done, _ = await asyncio.wait({task}, timeout=None if left is None else max(0.0, left))
+        if not done:
+            raise DeadlineExceeded("deadline exceeded waiting for a shared call")
+        try:
+            return task.result()
+        except DeadlineExceeded:
+            if expired():
+                raise
+            # The call ran out of the time of the caller that started it, not of this one.
+            return await self.do(key, fn, *args, **kwargs)
+
+
+    def _done(self, key: Hashable, task: Any) -> None:
+        self._tasks.pop(key, None)
+        # Its waiters may all have left at their deadline, the error must not be reported as never retrieved.
+        if not task.cancelled():
+            task.exception()
+
+
+def coalesce(method: Callable) -> Callable:
+    """
+    Decorator of client methods, sync or async, sharing the result of concurrent identical calls
+    through the client's ``_flights`` (a SingleFlight, an AsyncSingleFlight or None to disable it).
+
+    Calls are identical when they are made on the same client class with the same arguments,
+    given positionally or by name. Calls with unhashable arguments are never shared.
+    """
+    signature = inspect.signature(method)
+    var_keyword = next((parameter.name for parameter in signature.parameters.values() if parameter.kind is parameter.VAR_KEYWORD), None)
+
+    def key(self, args, kwargs) -> Optional[Hashable]:
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        if var_keyword is not None:
+            # Extra keyword arguments are bound as a dict, frozen so the key stays hashable.
+            bound.arguments[var_keyword] = tuple(sorted(bound.arguments[var_keyword].items()))
+        arguments = tuple(bound.arguments.items())[1:]
+        try:
+            hash(arguments)
+        except TypeError:
+            return None
+        return (type(self).__qualname__, method.__name__, arguments)
+
+    if inspect.iscoroutinefunction(method):
+
+        @functools.wraps(method)
+        async def async_wrapper(self, *args, **kwargs):
+            flights = self._flights
+            call_key = key(self, args, kwargs) if flights is not None else None
+            if call_key is None:
+                return await method(self, *args, **kwargs)
+            return await flights.do(call_key, method, self, *args, **kwargs)
+
+        return async_wrapper
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        flights = self._flights
+        call_key = key(self, args, kwargs) if flights is not None else None
+        if call_key is None:
+            return method(self, *args, **kwargs)
+        return flights.do(call_key, method, self, *args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,253 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from typing import Dict, Hashable, List, NamedTuple, Optional, Union
+from urllib.parse import parse_qsl, urlsplit
+
+from animeapi.exception import DeadlineExceeded
+
+# Query parameters signed stream URLs carry their expiry in, as a unix timestamp.
+EXPIRY_PARAMS = ("expires", "expire", "exp")
+
+# A resolved mirror: its stream URL, empty when the mirror has none, or the error it failed with.
+# Mirrors without a stream are answered as empty URLs, those that failed are left out.
+Resolved = Union[str, Exception]
+
+
+@dataclass
+class StreamCacheStats:
+    hits: int = 0
+    partial: int = 0
+    misses: int = 0
+    refreshes: int = 0
+    evictions: int = 0
+    entries: int = 0
+    size: int = 0
+
+
+@dataclass
+class _Mirror:
+    stream: Optional[str]
+    expires_at: float
+    refreshing: bool = False
+
+
+@dataclass
+class _Entry:
+    iframes: List[str]
+    mirrors: Dict[str, _Mirror] = field(default_factory=dict)
+    size: int = 0
+
+
+class CachedStreams(NamedTuple):
+    """
+    What the cache knows about the mirrors of an episode.
+
+    :param iframes (List[str]): Iframe URLs of every mirror, in the order of the episode page.
+    :param streams (Dict[str, str]): Stream URL of the mirrors that may be served, fresh or stale,
+        empty for the mirrors without a stream.
+    :param expired (List[str]): Mirrors to resolve before answering: never resolved, or expired for too long.
+    :param stale (List[str]): Mirrors served or left out as they are, to re-resolve in the background.
+    """
+
+    iframes: List[str]
+    streams: Dict[str, str]
+    expired: List[str]
+    stale: List[str]
+
+
+class StreamCache(object):
+    """
+    Cache of the stream URLs resolved by ``get_video_stream``, one entry per episode holding the
+    iframe URLs of the episode page and the stream of each mirror, each with its own expiry.
+
+    A resolved mirror is served for ``ttl`` seconds, or until the expiry signed in its URL when
+    sooner. A mirror that failed or had no stream is left out for ``failure_ttl`` seconds before
+    it is tried again. Once expired, a mirror is still served for ``max_stale`` seconds while the
+    client re-resolves it in the background, only the expired mirrors, without the episode page.
+
+    Entries are evicted least recently used first once their estimated size exceeds ``max_bytes``.
+    The cache is thread-safe and may be shared between sync and async clients.
+
+    :param ttl (float): Seconds a resolved stream URL is served.
+    :param failure_ttl (float): Seconds a mirror that failed, or had no stream, is left out.
+    :param max_stale (float): Seconds an expired mirror is still served while it is re-resolved
+        in the background, 0 to re-resolve it before answering.
+    :param max_bytes (int): Memory budget of the entries.
+    """
+
+    def __init__(self, ttl: float = 600, failure_ttl: float = 60, max_stale: float = 300, max_bytes: int = 8 * 1024 * 1024):
+        self.ttl = ttl
+        self.failure_ttl = failure_ttl
+        self.max_stale = max_stale
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._size = 0
+        self._stats = StreamCacheStats()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[CachedStreams]:
+        """
+        :param key (Hashable): The episode, like ``("jkanime", "one-piece", 1)``.
+        :return (Optional[CachedStreams]): None when the episode page must be fetched: the episode
+            is unknown, or every one of its mirrors expired for too long.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats.misses += 1
+                return None
+
+            streams, expired, stale = {}, [], []
+            for iframe in entry.iframes:
+                mirror = entry.mirrors.get(iframe)
+                if mirror is None or now >= mirror.expires_at + self.max_stale:
+                    expired.append(iframe)
+                    continue
+                if mirror.stream is not None:
+                    streams[iframe] = mirror.stream
+                if now >= mirror.expires_at and not mirror.refreshing:
+                    stale.append(iframe)
+
+            if len(expired) == len(entry.iframes):
+                self._drop(key)
+                self._stats.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            if expired or stale:
+                self._stats.partial += 1
+            else:
+                self._stats.hits += 1
+            return CachedStreams(list(entry.iframes), streams, expired, stale)
+
+    def claim(self, key: Hashable, iframes: List[str]) -> List[str]:
+        """
+        Mark mirrors as being re-resolved, so concurrent calls do not re-resolve them too.
+
+        :param key (Hashable): The episode.
+        :param iframes (List[str]): The stale mirrors of ``get``.
+        :return (List[str]): The mirrors this caller should re-resolve.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            claimed = []
+            for iframe in iframes:
+                mirror = entry.mirrors.get(iframe) if entry is not None else None
+                if mirror is not None and not mirror.refreshing:
+                    mirror.refreshing = True
+                    claimed.append(iframe)
+            self._stats.refreshes += bool(claimed)
+            return claimed
+
+    def store(self, key: Hashable, resolved: Dict[str, Resolved], iframes: Optional[List[str]] = None) -> None:
+        """
+        Store the resolved mirrors of an episode. Stored mirrors are no longer claimed.
+
+        :param key (Hashable): The episode.
+        :param resolved (Dict[str, Union[str, Exception]]): Stream URL, or error, by iframe URL. Mirrors
+            cut short by the deadline of the call are not failures and are not stored.
+        :param iframes (List[str]): Iframe URLs of the episode page, to replace the entry. None to update
+            the mirrors of the entry, when it is still cached.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if iframes is not None:
+                if entry is not None:
+                    self._drop(key)
+                entry = self._entries[key] = _Entry(list(iframes))
+            elif entry is None:
+                return
+
+            for iframe, value in resolved.items():
+                if isinstance(value, DeadlineExceeded) or iframe not in entry.iframes:
+                    continue
+                if isinstance(value, Exception):
+                    entry.mirrors[iframe] = _Mirror(None, now + self.failure_ttl)
+                else:
+                    entry.mirrors[iframe] = _Mirror(value, now + (_ttl(value, self.ttl) if value else self.failure_ttl))
+
+            self._size -= entry.size
+            entry.size = _size(entry)
+            self._size += entry.size
+            self._entries.move_to_end(key)
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                self._drop(next(iter(self._entries)))
+                self._stats.evictions += 1
+
+    def release(self, key: Hashable, iframes: List[str]) -> None:
+        """
+        Release claimed mirrors that could not be re-resolved.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            for iframe in iframes:
+                mirror = entry.mirrors.get(iframe) if entry is not None else None
+                if mirror is not None:
+                    mirror.refreshing = False
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._drop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _drop(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= entry.size
+
+    @property
+    def stats(self) -> StreamCacheStats:
+        with self._lock:
+            return replace(self._stats, entries=len(self._entries), size=self._size)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def served(iframes: List[str], resolved: Dict[str, Resolved]) -> List[str]:
+    """
+    Stream URLs answered for an episode: those of the resolved mirrors, in the order of the page.
+
+    :param iframes (List[str]): Iframe URLs of the episode page.
+    :param resolved (Dict[str, Union[str, Exception]]): Stream URL, or error, by iframe URL.
+    :return (List[str]):
+    """
+    return [resolved[iframe] for iframe in iframes if iframe in resolved and not isinstance(resolved[iframe], Exception)]
+
+
+def found(resolved: Dict[str, Resolved]) -> int:
+    """
+    :return (int): Number of mirrors resolved to a stream URL.
+    """
+    return sum(1 for stream in resolved.values() if stream and not isinstance(stream, Exception))
+
+
+def _ttl(stream: str, ttl: float) -> float:
+    """
+    Seconds a stream URL is served: ``ttl``, or less when the URL is signed with an earlier expiry.
+    """
+    for name, value in parse_qsl(urlsplit(stream).query):
+        if name.lower() in EXPIRY_PARAMS and value.isdigit():
+            return max(0.0, min(ttl, int(value) - time.time()))
+    return ttl
+
+
+def _size(entry: _Entry) -> int:
+    """
+    Estimated memory of an entry: its strings plus the objects holding them.
+    """
+    size = sys.getsizeof(entry) + sys.getsizeof(entry.iframes) + sys.getsizeof(entry.mirrors)
+    for iframe in entry.iframes:
+        size += sys.getsizeof(iframe)
+    for mirror in entry.mirrors.values():
+        size += sys.getsizeof(mirror) + (sys.getsizeof(mirror.stream) if mirror.stream is not None else 0)
+    return size
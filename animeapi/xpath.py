@@ -0,0 +1,95 @@
+from typing import TYPE_CHECKING, Any, Optional
+
+if TYPE_CHECKING:
+    from lxml import etree
+
+
+def has_class(name: str) -> str:
+    """
+    XPath predicate matching elements with the given class, like the ``.name`` CSS selector.
+
+    :param name (str): The class name.
+    :return (str): The XPath predicate, without brackets.
+    """
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+class _Precompiled(object):
+    """
+    XPath expression of a parser class, compiled the first time it is read. The compiled
+    expression then replaces it in the class, so lxml is only loaded by the first page parsed.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.name = name
+
+    def __get__(self, instance: Any, owner: type) -> "etree.XPath":
+        from lxml import etree
+
+        compiled = etree.XPath(self.path)
+        setattr(owner, self.name, compiled)
+        return compiled
+
+
+def precompile(path: str) -> "etree.XPath":
+    """
+    Precompile an XPath expression once, so parsing a page only evaluates it. Meant for
+    class attributes, like ``ITEMS = xpath.precompile("//li")``, compiled on first use.
+
+    :param path (str): The XPath expression.
+    :return (etree.XPath):
+    """
+    return _Precompiled(path)
+
+
+def document(text: str) -> "etree._Element":
+    """
+    Parse an HTML page with lxml, tolerating empty pages like BeautifulSoup does.
+
+    :param text (str): The HTML page.
+    :return (etree._Element): The root element of the page.
+    """
+    from lxml import html as lxml_html
+
+    if not text or not text.strip():
+        return lxml_html.document_fromstring("<html></html>")
+    return lxml_html.document_fromstring(text)
+
+
+def first(path: "etree.XPath", element: "etree._Element") -> "Optional[etree._Element]":
+    """
+    First match of a compiled XPath, like BeautifulSoup ``select_one``.
+
+    :return (Optional[etree._Element]): The first matching element, or None.
+    """
+    matches = path(element)
+    return matches[0] if matches else None
+
+
+def text(element: "etree._Element") -> str:
+    """
+    Text of an element and all its descendants, like BeautifulSoup ``Tag.text``.
+    """
+    return str(element.text_content())
+
+
+def string(element: "etree._Element") -> Optional[str]:
+    """
+    Single string child of an element, like BeautifulSoup ``Tag.string``.
+
+    :return (Optional[str]): The only string inside the element, or None when the element
+        has no children or more than one.
+    """
+    if len(element) == 0:
+        return element.text
+    if len(element) == 1 and not element.text and not element[0].tail:
+        from lxml import etree
+
+        child = element[0]
+        if child.tag is etree.Comment:
+            return child.text
+        return string(child)
+    return None
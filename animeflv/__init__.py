@@ -1,8 +1,36 @@
-from .animeflv import (
-    AnimeFLV,
-    AnimeInfo,
-    AnimeShortInfo,
-    DownloadLinkInfo,
-    EpisodeFormat,
-    EpisodeInfo,
-)
+from typing import TYPE_CHECKING
+
+from animeapi.lazy import lazy_exports
+
+# Names are imported from their module on first access, so the schemas can be used without
+# loading cloudscraper, BeautifulSoup or aiohttp.
+_EXPORTS = {
+    "AnimeFLV": ".animeflv",
+    "AsyncAnimeFLV": ".aio",
+    "LxmlParser": ".parser",
+    "SoupParser": ".parser",
+    "AnimeInfo": ".schema",
+    "AnimeInfoUpdate": ".schema",
+    "AnimeShortInfo": ".schema",
+    "DownloadLinkInfo": ".schema",
+    "EpisodeFormat": ".schema",
+    "EpisodeInfo": ".schema",
+    "HomePage": ".schema",
+}
+
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
+
+if TYPE_CHECKING:
+    from .animeflv import AnimeFLV
+    from .aio import AsyncAnimeFLV
+    from .parser import LxmlParser, SoupParser
+    from .schema import (
+        AnimeInfo,
+        AnimeInfoUpdate,
+        AnimeShortInfo,
+        DownloadLinkInfo,
+        EpisodeFormat,
+        EpisodeInfo,
+        HomePage,
+    )
@@ -0,0 +1,342 @@
+import asyncio
+import time
+from types import TracebackType
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple, Type, Union
+
+from animeapi.aio import AsyncHTTPClient
+from animeapi.catalog import PAGE_SIZE as CATALOG_PAGE_SIZE, Catalog
+from animeapi.deadline import bounded
+from animeapi.http import REQUEST_TIMEOUT
+from animeapi.singleflight import AsyncSingleFlight, coalesce
+from animeflv.constants import ANIME_URL, ANIME_VIDEO_URL, BASE_URL, HOMEPAGE_TTL, MAX_WORKERS, PROVIDER
+from animeflv.parser import SoupParser
+from animeflv.schema import (
+    AnimeInfo,
+    AnimeInfoUpdate,
+    AnimeShortInfo,
+    DownloadLinkInfo,
+    EpisodeFormat,
+    EpisodeInfo,
+    HomePage,
+    ListAnime,
+)
+from animeflv.utils import browse_url
+
+
+class AsyncAnimeFLV(object):
+    """
+    Asyncio counterpart of AnimeFLV. It exposes the same methods, as coroutines,
+    and returns the same schemas.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._http = AsyncHTTPClient(
+            session=kwargs.get("session", None),
+            cache=kwargs.get("cache", None),
+            headers=kwargs.get("headers", None),
+            cookie_store=kwargs.get("cookie_store", None),
+            limiter=kwargs.get("limiter", None),
+            timeout=kwargs.get("request_timeout", REQUEST_TIMEOUT),
+        )
+        self._parser = kwargs.get("parser", None) or SoupParser(trusted=kwargs.get("trusted", False))
+        self._max_workers = kwargs.get("max_workers", MAX_WORKERS)
+        self._call_timeout = kwargs.get("call_timeout", None)
+        self._homepage_ttl = kwargs.get("homepage_ttl", HOMEPAGE_TTL)
+        self._catalog = kwargs.get("catalog", None)
+        self._compact_episodes = kwargs.get("compact_episodes", False)
+        self._flights = AsyncSingleFlight() if kwargs.get("coalesce", False) else None
+        self._homepage = None
+
+        instrument = kwargs.get("instrument", None)
+        if instrument is not None:
+            instrument.attach(self, PROVIDER)
+
+    async def close(self) -> None:
+        await self._http.close()
+
+    async def __aenter__(self) -> "AsyncAnimeFLV":
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        await self.close()
+
+    @bounded
+    @coalesce
+    async def get_links(
+        self,
+        id: str,
+        episode: Union[str, int],
+        format: EpisodeFormat = EpisodeFormat.Subtitled,
+        **kwargs,
+    ) -> List[DownloadLinkInfo]:
+        """
+        Get download links of specific episode.
+
+        :param id (str): Anime id, like as 'nanatsu-no-taizai'.
+        :param episode (Union[str, int]): Episode id, like as '1'.
+        :param format (EpisodeFormat): Format of the episode.
+        :return List[DownloadLinkInfo]:
+        """
+        response = await self._http.get(f"{ANIME_VIDEO_URL}{id}-{episode}", "episode")
+        return self._parser.links(response.text, format)
+
+    @bounded
+    async def list(self, page: int = None, source: str = "remote") -> ListAnime:
+        """
+        Shortcut for search(query=None)
+        """
+
+        return await self.search(page=page, source=source)
+
+    @bounded
+    @coalesce
+    async def search(self, query: str = None, page: int = None, source: str = "remote") -> ListAnime:
+        """
+        Search in animeflv.net by query.
+        :param query: Query information like: 'Nanatsu no Taizai'.
+        :param page: Page of the information return.
+        :param source: ``"remote"`` to ask the site, ``"local"`` to search the client's catalog offline.
+        :rtype: ListAnime
+        """
+
+        if source == "local":
+            return self._local_search(query, page)
+        if source != "remote":
+            raise ValueError(f"Unknown search source: {source!r}")
+
+        url = browse_url(query, page)
+
+        response = await self._http.get(url, "search" if query is not None else "directory")
+        return self._parser.anime_list(response.text)
+
+    @bounded
+    async def iter_list(self, ordered: bool = True, max_workers: Optional[int] = None) -> AsyncIterator[AnimeShortInfo]:
+        """
+        Shortcut for iter_search(query=None)
+        """
+
+        async for anime in self.iter_search(ordered=ordered, max_workers=max_workers):
+            yield anime
+
+    @bounded
+    async def iter_search(
+        self,
+        query: str = None,
+        ordered: bool = True,
+        max_workers: Optional[int] = None,
+    ) -> AsyncIterator[AnimeShortInfo]:
+        """
+        Iterate over every result of a search, in all its pages.
+        The first page gives the total pages, the remaining pages are fetched concurrently.
+
+        :param query: Query information like: 'Nanatsu no Taizai'.
+        :param ordered: Yield the results in page order, otherwise in the order the pages complete.
+        :param max_workers: Maximum number of pages in flight (default is the client's ``max_workers``).
+        :rtype: AsyncIterator[AnimeShortInfo]
+        """
+
+        first = await self.search(query, page=1)
+        for anime in first.data:
+            yield anime
+
+        semaphore = asyncio.Semaphore(max(1, max_workers or self._max_workers))
+
+        async def fetch(page: int) -> ListAnime:
+            async with semaphore:
+                return await self.search(query, page)
+
+        tasks = [asyncio.ensure_future(fetch(page)) for page in range(2, first.total_pages + 1)]
+
+        try:
+            for task in tasks if ordered else asyncio.as_completed(tasks):
+                for anime in (await task).data:
+                    yield anime
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    @bounded
+    @coalesce
+    async def get_video_servers(
+        self,
+        id: str,
+        episode: int,
+        format: EpisodeFormat = EpisodeFormat.Subtitled,
+        **kwargs,
+    ) -> List[Dict[str, str]]:
+        """
+        Get in video servers, this work only using the iframe element.
+
+        :param id: Anime id, like as 'nanatsu-no-taizai'.
+        :param episode: Episode id, like as '1'.
+        :rtype: list
+        """
+
+        response = await self._http.get(f"{ANIME_VIDEO_URL}{id}-{episode}", "episode")
+        return self._parser.video_servers(response.text, format)
+
+    @bounded
+    @coalesce
+    async def get_homepage(self) -> HomePage:
+        """
+        Get the latest episodes and the latest animes from a single fetch of the front page.
+
+        :rtype: HomePage
+        """
+
+        response = await self._http.get(BASE_URL, "homepage")
+        homepage = self._parser.homepage(response.text)
+        self._homepage = (time.monotonic(), homepage)
+
+        return homepage
+
+    @bounded
+    async def get_latest_episodes(self) -> List[EpisodeInfo]:
+        """
+        Get a list of new episodes released (possibly this last week).
+
+        :rtype: list
+        """
+
+        return list((await self._homepage_snapshot()).episodes)
+
+    @bounded
+    async def get_latest_animes(self) -> List[AnimeShortInfo]:
+        """
+        Get a list of new animes released.
+
+        :rtype: list
+        """
+
+        return list((await self._homepage_snapshot()).animes)
+
+    @bounded
+    @coalesce
+    async def get_anime_info(self, id: str) -> AnimeInfo:
+        """
+        Get information about specific anime.
+
+        :param id: Anime id, like as 'nanatsu-no-taizai'.
+        :rtype: AnimeInfo
+        """
+        response = await self._http.get(f"{ANIME_URL}/{id}", "anime")
+        return self._parser.anime_info(response.text, id, compact=self._compact_episodes)
+
+    @bounded
+    @coalesce
+    async def refresh_anime_info(self, id: str, known: Union[int, AnimeInfo]) -> AnimeInfoUpdate:
+        """
+        Get information about specific anime, parsing only the episodes released since a known state.
+        When ``known`` is an AnimeInfo its episodes are merged with the new ones, otherwise the
+        merged anime only holds the new episodes.
+
+        :param id: Anime id, like as 'nanatsu-no-taizai'.
+        :param known: Number of episodes already known, or the previously returned AnimeInfo.
+        :rtype: AnimeInfoUpdate
+        """
+
+        previous = (known.episodes or []) if isinstance(known, AnimeInfo) else []
+        count = len(previous) if isinstance(known, AnimeInfo) else known
+
+        response = await self._http.get(f"{ANIME_URL}/{id}", "anime")
+        anime = self._parser.anime_info(response.text, id, count, self._compact_episodes)
+        new_episodes = anime.episodes
+        anime.episodes = new_episodes + previous
+
+        return AnimeInfoUpdate(anime=anime, new_episodes=new_episodes)
+
+    @bounded
+    async def get_anime_info_many(self, ids: Iterable[str], max_workers: Optional[int] = None) -> Dict[str, Union[AnimeInfo, Exception]]:
+        """
+        Get information about several animes concurrently.
+        A failing anime does not abort the others, its error is returned in place of its information.
+
+        :param ids: Anime ids, like as 'nanatsu-no-taizai'. Duplicates are fetched once.
+        :param max_workers: Maximum number of animes fetched at once (default is the client's ``max_workers``).
+        :rtype: Dict[str, Union[AnimeInfo, Exception]]
+        """
+
+        ids = list(dict.fromkeys(ids))
+        results = {id: result async for id, result in self.iter_anime_info(ids, max_workers)}
+
+        return {id: results[id] for id in ids}
+
+    @bounded
+    async def iter_anime_info(
+        self,
+        ids: Iterable[str],
+        max_workers: Optional[int] = None,
+    ) -> AsyncIterator[Tuple[str, Union[AnimeInfo, Exception]]]:
+        """
+        Get information about several animes concurrently, yielding each one as soon as it completes.
+        Animes still pending are cancelled when the iterator is closed.
+
+        :param ids: Anime ids, like as 'nanatsu-no-taizai'. Duplicates are fetched once.
+        :param max_workers: Maximum number of animes fetched at once (default is the client's ``max_workers``).
+        :rtype: AsyncIterator[Tuple[str, Union[AnimeInfo, Exception]]]
+        """
+
+        semaphore = asyncio.Semaphore(max(1, max_workers or self._max_workers))
+
+        async def fetch(id: str) -> Tuple[str, Union[AnimeInfo, Exception]]:
+            async with semaphore:
+                try:
+                    return id, await self.get_anime_info(id)
+                except Exception as exc:
+                    return id, exc
+
+        tasks = [asyncio.ensure_future(fetch(id)) for id in dict.fromkeys(ids)]
+
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    @bounded
+    async def refresh_catalog(self, prune: bool = False) -> int:
+        """
+        Crawl every page of the directory into the client's catalog, used by search(source="local").
+        Animes already stored are only rewritten when they changed.
+
+        :param prune: Remove the animes that are no longer listed by the site.
+        :rtype: int
+        """
+
+        catalog = self._require_catalog()
+        started = time.time()
+        changed = catalog.upsert(PROVIDER, [anime async for anime in self.iter_list()])
+        if prune:
+            catalog.prune(PROVIDER, started)
+
+        return changed
+
+    def _local_search(self, query: str = None, page: int = None) -> ListAnime:
+        page = page or 1
+        rows, total = self._require_catalog().search(PROVIDER, query, page, CATALOG_PAGE_SIZE)
+
+        return ListAnime(
+            current_page=page,
+            total_pages=-(-total // CATALOG_PAGE_SIZE),
+            data=[AnimeShortInfo.model_validate_json(row) for row in rows],
+        )
+
+    def _require_catalog(self) -> Catalog:
+        if self._catalog is None:
+            raise ValueError("This client has no catalog, create it with catalog=Catalog(...)")
+        return self._catalog
+
+    async def _homepage_snapshot(self) -> HomePage:
+        snapshot = self._homepage
+        if snapshot is not None and time.monotonic() - snapshot[0] < self._homepage_ttl:
+            return snapshot[1]
+
+        return await self.get_homepage()
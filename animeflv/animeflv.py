@@ -1,34 +1,63 @@
-import json
-import re
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from types import TracebackType
-from typing import Dict, List, Optional, Type, Union
-from urllib.parse import unquote, urlencode
-
-import cloudscraper
-from bs4 import BeautifulSoup, ResultSet, Tag
-
-from animeflv.exception import AnimeFLVParseError
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Type, Union
+
+from animeapi.catalog import PAGE_SIZE as CATALOG_PAGE_SIZE, Catalog
+from animeapi.deadline import bounded
+from animeapi.http import REQUEST_TIMEOUT, HTTPClient
+from animeapi.singleflight import SingleFlight, coalesce
+from animeflv.constants import (
+    ANIME_URL,
+    ANIME_VIDEO_URL,
+    BASE_URL,
+    HOMEPAGE_TTL,
+    MAX_WORKERS,
+    PROVIDER,
+)
+from animeflv.parser import SoupParser
 from animeflv.schema import (
     AnimeInfo,
+    AnimeInfoUpdate,
     AnimeShortInfo,
     DownloadLinkInfo,
     EpisodeFormat,
     EpisodeInfo,
+    HomePage,
     ListAnime,
 )
-from animeflv.utils import parse_table, removeprefix, safe_strip
-
-BASE_URL = "https://animeflv.net"
-BROWSE_URL = "https://animeflv.net/browse"
-ANIME_VIDEO_URL = "https://animeflv.net/ver/"
-ANIME_URL = "https://animeflv.net/anime/"
-BASE_EPISODE_IMG_URL = "https://cdn.animeflv.net/screenshots/"
+from animeflv.utils import browse_url
 
 
 class AnimeFLV(object):
     def __init__(self, *args, **kwargs):
+        # cloudscraper (and requests) only load once a client is created, see __init__.py.
+        import cloudscraper
+
         session = kwargs.get("session", None)
         self._scraper = cloudscraper.create_scraper(session)
+        self._http = HTTPClient(
+            self._scraper,
+            cache=kwargs.get("cache", None),
+            cookie_store=kwargs.get("cookie_store", None),
+            limiter=kwargs.get("limiter", None),
+            timeout=kwargs.get("request_timeout", REQUEST_TIMEOUT),
+        )
+        self._parser = kwargs.get("parser", None) or SoupParser(trusted=kwargs.get("trusted", False))
+        self._max_workers = kwargs.get("max_workers", MAX_WORKERS)
+        self._call_timeout = kwargs.get("call_timeout", None)
+        self._homepage_ttl = kwargs.get("homepage_ttl", HOMEPAGE_TTL)
+        self._catalog = kwargs.get("catalog", None)
+        self._compact_episodes = kwargs.get("compact_episodes", False)
+        self._flights = SingleFlight() if kwargs.get("coalesce", False) else None
+        self._homepage = None
+        self._homepage_lock = threading.Lock()
+
+        instrument = kwargs.get("instrument", None)
+        if instrument is not None:
+            instrument.attach(self, PROVIDER)
 
     def close(self) -> None:
         self._scraper.close()
@@ -44,6 +73,8 @@ class AnimeFLV(object):
     ) -> None:
         self.close()
 
+    @bounded
+    @coalesce
     def get_links(
         self,
         id: str,
@@ -68,89 +99,85 @@ class AnimeFLV(object):
         :param **kwargs: Optional arguments for filter output (see doc).
         :return List[DownloadLinkInfo]:
         """
-        response = self._scraper.get(f"{ANIME_VIDEO_URL}{id}-{episode}")
-        soup = BeautifulSoup(response.text, "lxml")
-        table = soup.find("table", attrs={"class": "RTbl"})
+        response = self._http.get(f"{ANIME_VIDEO_URL}{id}-{episode}", "episode")
+        return self._parser.links(response.text, format)
 
-        try:
-            rows = parse_table(table)
-            ret = []
-
-            for row in rows:
-                if (
-                    row["FORMATO"].string == "SUB"
-                    and EpisodeFormat.Subtitled in format
-                    or row["FORMATO"].string == "LAT"
-                    and EpisodeFormat.Dubbed in format
-                ):
-                    ret.append(
-                        DownloadLinkInfo(
-                            server=row["SERVIDOR"].string,
-                            url=re.sub(
-                                r"^http[s]?://ouo.io/[A-Za-z0-9]+/[A-Za-z0-9]+\?[A-Za-z0-9]+=",
-                                "",
-                                unquote(row["DESCARGAR"].a["href"]),
-                            ),
-                        )
-                    )
-
-            return ret
-        except Exception as exc:
-            raise AnimeFLVParseError(exc) from exc
-
-    def list(self, page: int = None) -> ListAnime:
+    @bounded
+    def list(self, page: int = None, source: str = "remote") -> ListAnime:
         """
         Shortcut for search(query=None)
         """
 
-        return self.search(page=page)
+        return self.search(page=page, source=source)
 
-    def search(self, query: str = None, page: int = None) -> ListAnime:
+    @bounded
+    @coalesce
+    def search(self, query: str = None, page: int = None, source: str = "remote") -> ListAnime:
         """
         Search in animeflv.net by query.
         :param query: Query information like: 'Nanatsu no Taizai'.
         :param page: Page of the information return.
+        :param source: ``"remote"`` to ask the site, ``"local"`` to search the client's catalog offline.
         :rtype: ListAnime
         """
 
-        if page is not None and not isinstance(page, int):
-            raise TypeError
+        if source == "local":
+            return self._local_search(query, page)
+        if source != "remote":
+            raise ValueError(f"Unknown search source: {source!r}")
 
-        params = dict()
-        if query is not None:
-            params["q"] = query
-        if page is not None:
-            params["page"] = page
-        params = urlencode(params)
+        url = browse_url(query, page)
 
-        url = f"{BROWSE_URL}"
-        if params != "":
-            url += f"?{params}"
+        response = self._http.get(url, "search" if query is not None else "directory")
+        return self._parser.anime_list(response.text)
 
-        response = self._scraper.get(url)
-        soup = BeautifulSoup(response.text, "lxml")
+    @bounded
+    def iter_list(self, ordered: bool = True, max_workers: Optional[int] = None) -> Iterator[AnimeShortInfo]:
+        """
+        Shortcut for iter_search(query=None)
+        """
 
-        elements = soup.select("div.Container ul.ListAnimes li article")
+        yield from self.iter_search(ordered=ordered, max_workers=max_workers)
 
-        if elements is None:
-            raise AnimeFLVParseError("Unable to get list of animes")
+    @bounded
+    def iter_search(
+        self,
+        query: str = None,
+        ordered: bool = True,
+        max_workers: Optional[int] = None,
+    ) -> Iterator[AnimeShortInfo]:
+        """
+        Iterate over every result of a search, in all its pages.
+        The first page gives the total pages, the remaining pages are fetched concurrently.
 
-        pagination = soup.select("div.Container div.NvCnAnm ul.pagination li")
+        :param query: Query information like: 'Nanatsu no Taizai'.
+        :param ordered: Yield the results in page order, otherwise in the order the pages complete.
+        :param max_workers: Maximum number of pages in flight (default is the client's ``max_workers``).
+        :rtype: Iterator[AnimeShortInfo]
+        """
 
-        cuurrent_page = 1
-        total_pages = 1
+        first = self.search(query, page=1)
+        yield from first.data
 
-        if len(pagination) > 1:
-            cuurrent_page = soup.select_one("div.Container div.NvCnAnm ul.pagination li.active a").string
-            total_pages = soup.select("div.Container div.NvCnAnm ul.pagination li")[-2].string
+        pages = range(2, first.total_pages + 1)
+        if not pages:
+            return
 
+        workers = max(1, min(max_workers or self._max_workers, len(pages)))
+        executor = ThreadPoolExecutor(max_workers=workers)
+        futures = []
 
-        return ListAnime(
-            current_page=int(cuurrent_page),
-            total_pages=int(total_pages) if int(total_pages) <= 150 else 150,
-            data=self._process_anime_list_info(elements),
-        )
-
+        try:
+            futures = [executor.submit(contextvars.copy_context().run, self.search, query, page) for page in pages]
+            for future in futures if ordered else as_completed(futures):
+                yield from future.result().data
+        finally:
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    @bounded
+    @coalesce
     def get_video_servers(
         self,
         id: str,
@@ -167,25 +194,29 @@ class AnimeFLV(object):
         :rtype: list
         """
 
-        response = self._scraper.get(f"{ANIME_VIDEO_URL}{id}-{episode}")
-        soup = BeautifulSoup(response.text, "lxml")
-        scripts = soup.find_all("script")
+        response = self._http.get(f"{ANIME_VIDEO_URL}{id}-{episode}", "episode")
+        return self._parser.video_servers(response.text, format)
 
-        servers = []
+    @bounded
+    @coalesce
+    def get_homepage(self) -> HomePage:
+        """
+        Get the latest episodes and the latest animes from a single fetch of the front page.
+        The result is kept as a snapshot that get_latest_episodes and get_latest_animes reuse
+        while it is younger than the client's ``homepage_ttl``.
 
-        for script in scripts:
-            content = str(script)
-            if "var videos = {" in content:
-                videos = content.split("var videos = ")[1].split(";")[0]
-                data = json.loads(videos)
+        :rtype: HomePage
+        """
+
+        response = self._http.get(BASE_URL, "homepage")
+        homepage = self._parser.homepage(response.text)
 
-                if "SUB" in data and EpisodeFormat.Subtitled in format:
-                    servers.append(data["SUB"])
-                if "LAT" in data and EpisodeFormat.Dubbed in format:
-                    servers.append(data["LAT"])
+        with self._homepage_lock:
+            self._homepage = (time.monotonic(), homepage)
 
-        return servers
+        return homepage
 
+    @bounded
     def get_latest_episodes(self) -> List[EpisodeInfo]:
         """
         Get a list of new episodes released (possibly this last week).
@@ -194,28 +225,9 @@ class AnimeFLV(object):
         :rtype: list
         """
 
-        response = self._scraper.get(BASE_URL)
-        soup = BeautifulSoup(response.text, "lxml")
-
-        elements = soup.select("ul.ListEpisodios li a")
-        ret = []
-
-        for element in elements:
-            try:
-                anime, _, id = element["href"].rpartition("-")
-
-                ret.append(
-                    EpisodeInfo(
-                        id=id,
-                        anime=removeprefix(anime, "/ver/"),
-                        image_preview=f"{BASE_URL}{element.select_one('span.Image img').get('src')}",
-                    )
-                )
-            except Exception as exc:
-                raise AnimeFLVParseError(exc) from exc
-
-        return ret
+        return list(self._homepage_snapshot().episodes)
 
+    @bounded
     def get_latest_animes(self) -> List[AnimeShortInfo]:
         """
         Get a list of new animes released.
@@ -224,16 +236,10 @@ class AnimeFLV(object):
         :rtype: list
         """
 
-        response = self._scraper.get(BASE_URL)
-        soup = BeautifulSoup(response.text, "lxml")
-
-        elements = soup.select("ul.ListAnimes li article")
-
-        if elements is None:
-            raise AnimeFLVParseError("Unable to get list of animes")
-
-        return self._process_anime_list_info(elements)
+        return list(self._homepage_snapshot().animes)
 
+    @bounded
+    @coalesce
     def get_anime_info(self, id: str) -> AnimeInfo:
         """
         Get information about specific anime.
@@ -242,83 +248,113 @@ class AnimeFLV(object):
         :param id: Anime id, like as 'nanatsu-no-taizai'.
         :rtype: dict
         """
-        response = self._scraper.get(f"{ANIME_URL}/{id}")
-        soup = BeautifulSoup(response.text, "lxml")
+        response = self._http.get(f"{ANIME_URL}/{id}", "anime")
+        return self._parser.anime_info(response.text, id, compact=self._compact_episodes)
 
-        image = BASE_URL + "/" + soup.select_one("body div div div div div aside div.AnimeCover div.Image figure img").get("src", "")
-        information = {
-            "title": soup.select_one("body div.Wrapper div.Body div div.Ficha.fchlt div.Container h1.Title").string,
-            "type": soup.select_one("body div.Wrapper div.Body div div.Ficha.fchlt div.Container span.Type").string,
-            "rating": soup.select_one("body div div div.Ficha.fchlt div.Container div.vtshr div.Votes span#votes_prmd").string,
-            "poster": image,
-            "banner": image.replace("covers", "banners"),
-            "synopsis": safe_strip(soup.select_one("body div div div div div main section div.Description p").string),
-        }
+    @bounded
+    @coalesce
+    def refresh_anime_info(self, id: str, known: Union[int, AnimeInfo]) -> AnimeInfoUpdate:
+        """
+        Get information about specific anime, parsing only the episodes released since a known state.
+        When ``known`` is an AnimeInfo its episodes are merged with the new ones, otherwise the
+        merged anime only holds the new episodes.
+
+        :param id: Anime id, like as 'nanatsu-no-taizai'.
+        :param known: Number of episodes already known, or the previously returned AnimeInfo.
+        :rtype: AnimeInfoUpdate
+        """
+
+        previous = (known.episodes or []) if isinstance(known, AnimeInfo) else []
+        count = len(previous) if isinstance(known, AnimeInfo) else known
+
+        response = self._http.get(f"{ANIME_URL}/{id}", "anime")
+        anime = self._parser.anime_info(response.text, id, count, self._compact_episodes)
+        new_episodes = anime.episodes
+        anime.episodes = new_episodes + previous
+
+        return AnimeInfoUpdate(anime=anime, new_episodes=new_episodes)
+
+    @bounded
+    def get_anime_info_many(self, ids: Iterable[str], max_workers: Optional[int] = None) -> Dict[str, Union[AnimeInfo, Exception]]:
+        """
+        Get information about several animes concurrently.
+        A failing anime does not abort the others, its error is returned in place of its information.
+
+        :param ids: Anime ids, like as 'nanatsu-no-taizai'. Duplicates are fetched once.
+        :param max_workers: Maximum number of animes fetched at once (default is the client's ``max_workers``).
+        :rtype: Dict[str, Union[AnimeInfo, Exception]]
+        """
+
+        ids = list(dict.fromkeys(ids))
+        results = dict(self.iter_anime_info(ids, max_workers))
+
+        return {id: results[id] for id in ids}
 
-        genres = []
+    @bounded
+    def iter_anime_info(self, ids: Iterable[str], max_workers: Optional[int] = None) -> Iterator[Tuple[str, Union[AnimeInfo, Exception]]]:
+        """
+        Get information about several animes concurrently, yielding each one as soon as it completes.
+        Animes not yet started are cancelled when the iterator is closed.
 
-        for element in soup.select("main.Main section.WdgtCn nav.Nvgnrs a"):
-            if "=" in element["href"]:
-                genres.append(element["href"].split("=")[1])
+        :param ids: Anime ids, like as 'nanatsu-no-taizai'. Duplicates are fetched once.
+        :param max_workers: Maximum number of animes fetched at once (default is the client's ``max_workers``).
+        :rtype: Iterator[Tuple[str, Union[AnimeInfo, Exception]]]
+        """
 
-        info_ids = []
-        episodes_data = []
-        episodes = []
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            return
 
+        executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers or self._max_workers, len(ids))))
         try:
-            for script in soup.find_all("script"):
-                contents = str(script)
-
-                if "var anime_info = [" in contents:
-                    anime_info = contents.split("var anime_info = ")[1].split(";")[0]
-                    info_ids.append(json.loads(anime_info))
-
-                if "var episodes = [" in contents:
-                    data = contents.split("var episodes = ")[1].split(";")[0]
-                    episodes_data.extend(json.loads(data))
-
-            next_episode = info_ids[0][3] if len(info_ids[0]) > 3 else None
-            status = soup.select_one("body div div div div div aside p.AnmStts").string
-
-            for episode, _ in episodes_data:
-                episodes.append(
-                    EpisodeInfo(
-                        id=str(episode),
-                        anime=id,
-                        image_preview=f"{BASE_EPISODE_IMG_URL}{info_ids[0][0]}/{str(episode)}/th_3.jpg",
-                    )
-                )
-
-        except Exception as exc:
-            raise AnimeFLVParseError(exc) from exc
-
-        return AnimeInfo(
-            id=id,
-            **information,
-            genres=genres,
-            status=status,
-            next_episode=next_episode,
-            episodes=episodes,
+            futures = {executor.submit(contextvars.copy_context().run, self.get_anime_info, id): id for id in ids}
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as exc:
+                    result = exc
+                yield futures[future], result
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    @bounded
+    def refresh_catalog(self, prune: bool = False) -> int:
+        """
+        Crawl every page of the directory into the client's catalog, used by search(source="local").
+        Animes already stored are only rewritten when they changed.
+
+        :param prune: Remove the animes that are no longer listed by the site.
+        :rtype: int
+        """
+
+        catalog = self._require_catalog()
+        started = time.time()
+        changed = catalog.upsert(PROVIDER, self.iter_list())
+        if prune:
+            catalog.prune(PROVIDER, started)
+
+        return changed
+
+    def _local_search(self, query: str = None, page: int = None) -> ListAnime:
+        page = page or 1
+        rows, total = self._require_catalog().search(PROVIDER, query, page, CATALOG_PAGE_SIZE)
+
+        return ListAnime(
+            current_page=page,
+            total_pages=-(-total // CATALOG_PAGE_SIZE),
+            data=[AnimeShortInfo.model_validate_json(row) for row in rows],
         )
 
-    def _process_anime_list_info(self, elements: ResultSet[Tag]) -> List[AnimeShortInfo]:
-        ret = []
-
-        for element in elements:
-            try:
-                image = element.select_one("a div.Image figure img").get("src", None) or element.select_one("a div.Image figure img")["data-cfsrc"]
-                ret.append(
-                    AnimeShortInfo(
-                        id=removeprefix(element.select_one("div.Description a.Button")["href"][1:], "anime/"),
-                        title=element.select_one("a h3").string,
-                        type=element.select_one("div.Description p span.Type").string,
-                        rating=element.select_one("div.Description p span.Vts").string,
-                        poster=image,
-                        banner=image.replace("covers", "banners"),
-                        synopsis=safe_strip(element.select("div.Description p")[1].string),
-                    )
-                )
-            except Exception as exc:
-                raise AnimeFLVParseError(exc) from exc
-
-        return ret
+    def _require_catalog(self) -> Catalog:
+        if self._catalog is None:
+            raise ValueError("This client has no catalog, create it with catalog=Catalog(...)")
+        return self._catalog
+
+    def _homepage_snapshot(self) -> HomePage:
+        with self._homepage_lock:
+            snapshot = self._homepage
+
+        if snapshot is not None and time.monotonic() - snapshot[0] < self._homepage_ttl:
+            return snapshot[1]
+
+        return self.get_homepage()
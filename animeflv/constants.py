@@ -0,0 +1,9 @@
+BASE_URL = "https://animeflv.net"
+BROWSE_URL = "https://animeflv.net/browse"
+ANIME_VIDEO_URL = "https://animeflv.net/ver/"
+ANIME_URL = "https://animeflv.net/anime/"
+BASE_EPISODE_IMG_URL = "https://cdn.animeflv.net/screenshots/"
+
+HOMEPAGE_TTL = 30
+PROVIDER = "animeflv"
+MAX_WORKERS = 8
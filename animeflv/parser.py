@@ -0,0 +1,359 @@
+import json
+import re
+from typing import TYPE_CHECKING, Dict, List, Optional
+from urllib.parse import unquote
+
+from animeapi import xpath
+from animeapi.construct import SchemaFactories
+from animeapi.episodes import CompactEpisodes
+from animeapi.scripts import extract_variables
+from animeflv.constants import BASE_EPISODE_IMG_URL, BASE_URL
+from animeflv.exception import AnimeFLVParseError
+from animeflv.schema import (
+    AnimeInfo,
+    AnimeShortInfo,
+    DownloadLinkInfo,
+    EpisodeFormat,
+    EpisodeInfo,
+    HomePage,
+    ListAnime,
+)
+from animeflv.utils import parse_table, removeprefix, safe_strip
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup, ResultSet, Tag
+
+SCRIPT_VARIABLES = ("anime_info", "episodes", "videos")
+
+
+def _soup(html: str) -> "BeautifulSoup":
+    # BeautifulSoup is only loaded by the first page parsed, see __init__.py.
+    from bs4 import BeautifulSoup
+
+    return BeautifulSoup(html, "lxml")
+
+
+def _string(tag: "Tag") -> Optional[str]:
+    # A plain str, as a NavigableString would keep the whole tree alive through its parent.
+    return str(tag.string) if tag.string is not None else None
+
+
+class SoupParser(object):
+    """
+    Turns animeflv.net pages into schema objects using BeautifulSoup.
+    The parser never touches the network, so the same instance is shared
+    by the AnimeFLV and AsyncAnimeFLV clients.
+
+    :param trusted: Whether to build the schema objects without validating them.
+        Faster, for pages whose markup is known to match the parser.
+    """
+
+    def __init__(self, trusted: bool = False):
+        self.trusted = trusted
+        self._schemas = SchemaFactories(trusted)
+
+    def links(self, html: str, format: EpisodeFormat) -> List[DownloadLinkInfo]:
+        """
+        Parse the download links table of an episode page.
+
+        :param html (str): Episode page.
+        :param format (EpisodeFormat): Format of the episode.
+        :return List[DownloadLinkInfo]:
+        """
+        soup = _soup(html)
+        table = soup.find("table", attrs={"class": "RTbl"})
+
+        try:
+            rows = parse_table(table)
+            ret = []
+
+            for row in rows:
+                if (
+                    row["FORMATO"].string == "SUB"
+                    and EpisodeFormat.Subtitled in format
+                    or row["FORMATO"].string == "LAT"
+                    and EpisodeFormat.Dubbed in format
+                ):
+                    ret.append(
+                        self._schemas[DownloadLinkInfo](
+                            server=_string(row["SERVIDOR"]),
+                            url=re.sub(
+                                r"^http[s]?://ouo.io/[A-Za-z0-9]+/[A-Za-z0-9]+\?[A-Za-z0-9]+=",
+                                "",
+                                unquote(row["DESCARGAR"].a["href"]),
+                            ),
+                        )
+                    )
+
+            return ret
+        except Exception as exc:
+            raise AnimeFLVParseError(exc) from exc
+
+    def anime_list(self, html: str) -> ListAnime:
+        """
+        Parse a browse or search page.
+
+        :param html (str): Browse page.
+        :rtype: ListAnime
+        """
+        soup = _soup(html)
+
+        elements = soup.select("div.Container ul.ListAnimes li article")
+
+        if elements is None:
+            raise AnimeFLVParseError("Unable to get list of animes")
+
+        pagination = soup.select("div.Container div.NvCnAnm ul.pagination li")
+
+        cuurrent_page = 1
+        total_pages = 1
+
+        if len(pagination) > 1:
+            cuurrent_page = soup.select_one("div.Container div.NvCnAnm ul.pagination li.active a").string
+            total_pages = soup.select("div.Container div.NvCnAnm ul.pagination li")[-2].string
+
+
+        return self._schemas[ListAnime](
+            current_page=int(cuurrent_page),
+            total_pages=int(total_pages) if int(total_pages) <= 150 else 150,
+            data=self._process_anime_list_info(elements),
+        )
+
+    def video_servers(self, html: str, format: EpisodeFormat) -> List[Dict[str, str]]:
+        """
+        Parse the video servers of an episode page.
+
+        :param html (str): Episode page.
+        :param format (EpisodeFormat): Format of the episode.
+        :rtype: list
+        """
+        variables = extract_variables(html, SCRIPT_VARIABLES)
+
+        servers = []
+
+        for videos in variables["videos"]:
+            if videos.startswith("{"):
+                data = json.loads(videos)
+
+                if "SUB" in data and EpisodeFormat.Subtitled in format:
+                    servers.append(data["SUB"])
+                if "LAT" in data and EpisodeFormat.Dubbed in format:
+                    servers.append(data["LAT"])
+
+        return servers
+
+    def homepage(self, html: str) -> HomePage:
+        """
+        Parse the front page into the latest animes and the latest episodes.
+
+        :param html (str): Front page.
+        :rtype: HomePage
+        """
+        soup = _soup(html)
+
+        elements = soup.select("ul.ListAnimes li article")
+
+        if elements is None:
+            raise AnimeFLVParseError("Unable to get list of animes")
+
+        return self._schemas[HomePage](
+            animes=self._process_anime_list_info(elements),
+            episodes=self._process_episode_list_info(soup.select("ul.ListEpisodios li a")),
+        )
+
+    def anime_info(self, html: str, id: str, known: int = 0, compact: bool = False) -> AnimeInfo:
+        """
+        Parse the page of an anime.
+
+        :param html (str): Anime page.
+        :param id (str): Anime id, like as 'nanatsu-no-taizai'.
+        :param known (int): Number of episodes already known, only the newer episodes are parsed.
+        :param compact (bool): Whether to store the episodes as CompactEpisodes instead of a list.
+        :rtype: AnimeInfo
+        """
+        soup = _soup(html)
+
+        image = BASE_URL + "/" + soup.select_one("body div div div div div aside div.AnimeCover div.Image figure img").get("src", "")
+        information = {
+            "title": _string(soup.select_one("body div.Wrapper div.Body div div.Ficha.fchlt div.Container h1.Title")),
+            "type": _string(soup.select_one("body div.Wrapper div.Body div div.Ficha.fchlt div.Container span.Type")),
+            "rating": _string(soup.select_one("body div div div.Ficha.fchlt div.Container div.vtshr div.Votes span#votes_prmd")),
+            "poster": image,
+            "banner": image.replace("covers", "banners"),
+            "synopsis": safe_strip(soup.select_one("body div div div div div main section div.Description p").string),
+        }
+
+        genres = []
+
+        for element in soup.select("main.Main section.WdgtCn nav.Nvgnrs a"):
+            if "=" in element["href"]:
+                genres.append(element["href"].split("=")[1])
+
+        variables = extract_variables(html, SCRIPT_VARIABLES)
+        episodes = []
+
+        try:
+            info_ids = [json.loads(anime_info) for anime_info in variables["anime_info"] if anime_info.startswith("[")]
+            episodes_data = [episode for data in variables["episodes"] if data.startswith("[") for episode in json.loads(data)]
+
+            next_episode = info_ids[0][3] if len(info_ids[0]) > 3 else None
+            status = _string(soup.select_one("body div div div div div aside p.AnmStts"))
+
+            episodes_data = episodes_data[: max(len(episodes_data) - known, 0)]
+
+            if compact:
+                preview = f"{BASE_EPISODE_IMG_URL}{info_ids[0][0]}/{{id}}/th_3.jpg"
+                episodes = CompactEpisodes(EpisodeInfo, (episode for episode, _ in episodes_data), {"anime": id}, preview)
+            else:
+                for episode, _ in episodes_data:
+                    episodes.append(
+                        self._schemas[EpisodeInfo](
+                            id=str(episode),
+                            anime=id,
+                            image_preview=f"{BASE_EPISODE_IMG_URL}{info_ids[0][0]}/{str(episode)}/th_3.jpg",
+                        )
+                    )
+
+        except Exception as exc:
+            raise AnimeFLVParseError(exc) from exc
+
+        return self._schemas[AnimeInfo](
+            id=id,
+            **information,
+            genres=genres,
+            status=status,
+            next_episode=next_episode,
+            episodes=episodes,
+        )
+
+    def _process_episode_list_info(self, elements: "ResultSet[Tag]") -> List[EpisodeInfo]:
+        ret = []
+
+        for element in elements:
+            try:
+                anime, _, id = element["href"].rpartition("-")
+
+                ret.append(
+                    self._schemas[EpisodeInfo](
+                        id=id,
+                        anime=removeprefix(anime, "/ver/"),
+                        image_preview=f"{BASE_URL}{element.select_one('span.Image img').get('src')}",
+                    )
+                )
+            except Exception as exc:
+                raise AnimeFLVParseError(exc) from exc
+
+        return ret
+
+    def _process_anime_list_info(self, elements: "ResultSet[Tag]") -> List[AnimeShortInfo]:
+        ret = []
+
+        for element in elements:
+            try:
+                image = element.select_one("a div.Image figure img").get("src", None) or element.select_one("a div.Image figure img")["data-cfsrc"]
+                ret.append(
+                    self._schemas[AnimeShortInfo](
+                        id=removeprefix(element.select_one("div.Description a.Button")["href"][1:], "anime/"),
+                        title=_string(element.select_one("a h3")),
+                        type=_string(element.select_one("div.Description p span.Type")),
+                        rating=_string(element.select_one("div.Description p span.Vts")),
+                        poster=image,
+                        banner=image.replace("covers", "banners"),
+                        synopsis=safe_strip(element.select("div.Description p")[1].string),
+                    )
+                )
+            except Exception as exc:
+                raise AnimeFLVParseError(exc) from exc
+
+        return ret
+
+
+class LxmlParser(SoupParser):
+    """
+    Drop-in replacement of SoupParser for the hot listing pages (browse, search and
+    front page). It walks the lxml tree with precompiled XPath expressions instead of
+    building a BeautifulSoup tree, and returns the same schema objects. The other pages
+    are still parsed by SoupParser.
+    """
+
+    BROWSE_ITEMS = xpath.precompile(f"//div[{xpath.has_class('Container')}]//ul[{xpath.has_class('ListAnimes')}]//li//article")
+    PAGINATION = xpath.precompile(
+        f"//div[{xpath.has_class('Container')}]//div[{xpath.has_class('NvCnAnm')}]//ul[{xpath.has_class('pagination')}]//li"
+    )
+    ACTIVE_PAGE = xpath.precompile(
+        f"//div[{xpath.has_class('Container')}]//div[{xpath.has_class('NvCnAnm')}]"
+        f"//ul[{xpath.has_class('pagination')}]//li[{xpath.has_class('active')}]//a"
+    )
+
+    HOME_ITEMS = xpath.precompile(f"//ul[{xpath.has_class('ListAnimes')}]//li//article")
+    HOME_EPISODES = xpath.precompile(f"//ul[{xpath.has_class('ListEpisodios')}]//li//a")
+    EPISODE_IMAGE = xpath.precompile(f".//span[{xpath.has_class('Image')}]//img")
+
+    ITEM_IMAGE = xpath.precompile(f".//a//div[{xpath.has_class('Image')}]//figure//img")
+    ITEM_LINK = xpath.precompile(f".//div[{xpath.has_class('Description')}]//a[{xpath.has_class('Button')}]")
+    ITEM_TITLE = xpath.precompile(".//a//h3")
+    ITEM_TYPE = xpath.precompile(f".//div[{xpath.has_class('Description')}]//p//span[{xpath.has_class('Type')}]")
+    ITEM_RATING = xpath.precompile(f".//div[{xpath.has_class('Description')}]//p//span[{xpath.has_class('Vts')}]")
+    ITEM_PARAGRAPHS = xpath.precompile(f".//div[{xpath.has_class('Description')}]//p")
+
+    def anime_list(self, html: str) -> ListAnime:
+        root = xpath.document(html)
+
+        elements = self.BROWSE_ITEMS(root)
+        pagination = self.PAGINATION(root)
+
+        cuurrent_page = 1
+        total_pages = 1
+
+        if len(pagination) > 1:
+            cuurrent_page = xpath.string(xpath.first(self.ACTIVE_PAGE, root))
+            total_pages = xpath.string(pagination[-2])
+
+        return self._schemas[ListAnime](
+            current_page=int(cuurrent_page),
+            total_pages=int(total_pages) if int(total_pages) <= 150 else 150,
+            data=self._process_lxml_anime_list_info(elements),
+        )
+
+    def homepage(self, html: str) -> HomePage:
+        root = xpath.document(html)
+
+        episodes = []
+        for element in self.HOME_EPISODES(root):
+            try:
+                anime, _, id = element.attrib["href"].rpartition("-")
+
+                episodes.append(
+                    self._schemas[EpisodeInfo](
+                        id=id,
+                        anime=removeprefix(anime, "/ver/"),
+                        image_preview=f"{BASE_URL}{xpath.first(self.EPISODE_IMAGE, element).get('src')}",
+                    )
+                )
+            except Exception as exc:
+                raise AnimeFLVParseError(exc) from exc
+
+        return self._schemas[HomePage](animes=self._process_lxml_anime_list_info(self.HOME_ITEMS(root)), episodes=episodes)
+
+    def _process_lxml_anime_list_info(self, elements: List) -> List[AnimeShortInfo]:
+        ret = []
+
+        for element in elements:
+            try:
+                img = xpath.first(self.ITEM_IMAGE, element)
+                image = img.get("src", None) or img.attrib["data-cfsrc"]
+                ret.append(
+                    self._schemas[AnimeShortInfo](
+                        id=removeprefix(xpath.first(self.ITEM_LINK, element).attrib["href"][1:], "anime/"),
+                        title=xpath.string(xpath.first(self.ITEM_TITLE, element)),
+                        type=xpath.string(xpath.first(self.ITEM_TYPE, element)),
+                        rating=xpath.string(xpath.first(self.ITEM_RATING, element)),
+                        poster=image,
+                        banner=image.replace("covers", "banners"),
+                        synopsis=safe_strip(xpath.string(self.ITEM_PARAGRAPHS(element)[1])),
+                    )
+                )
+            except Exception as exc:
+                raise AnimeFLVParseError(exc) from exc
+
+        return ret
@@ -1,14 +1,17 @@
-from typing import Optional, Union, List
-from pydantic import BaseModel, Field
+from typing import Annotated, Optional, Union, List
+from pydantic import Field
 from enum import Flag, auto
 
+from animeapi.construct import Schema
+from animeapi.episodes import EpisodeList
 
-class EpisodeInfo(BaseModel):
+
+class EpisodeInfo(Schema):
     id: Union[str, int] = Field(..., description="Episode id", examples=["1a2b3c", 123])
     anime: str = Field(..., description="Anime title", examples=["Nanatsu no Taizai", "One Piece"])
     image_preview: Optional[str] = Field(None, description="Episode image preview")
 
-class AnimeShortInfo(BaseModel):
+class AnimeShortInfo(Schema):
     id: Union[str, int] = Field(..., description="Anime id", examples=["1a2b3c", 123])
     title: str = Field(..., description="Anime title", examples=["Nanatsu no Taizai", "One Piece"])
     type: Optional[str] = Field(None, description="Anime type")
@@ -21,15 +24,24 @@ class AnimeInfo(AnimeShortInfo):
     genres: Optional[List[str]] = Field(None, description="Anime genres")
     status: Optional[str] = Field(None, description="Anime status")
     next_episode: Optional[str] = Field(None, description="Date of next episode")
-    episodes: Optional[List[EpisodeInfo]] = Field(None, description="Anime episodes")
+    episodes: Optional[Annotated[List[EpisodeInfo], EpisodeList()]] = Field(None, description="Anime episodes")
+
 
+class AnimeInfoUpdate(Schema):
+    anime: AnimeInfo = Field(..., description="Anime information with the new episodes merged")
+    new_episodes: Annotated[List[EpisodeInfo], EpisodeList()] = Field(..., description="Episodes released since the known state")
 
-class ListAnime(BaseModel):
+
+class ListAnime(Schema):
     current_page: int = Field(..., description="Current page")
     total_pages: int = Field(..., description="Total pages")
     data: List[AnimeShortInfo] = Field(..., description="Anime list")
 
-class DownloadLinkInfo(BaseModel):
+class HomePage(Schema):
+    animes: List[AnimeShortInfo] = Field(..., description="Latest anime list")
+    episodes: List[EpisodeInfo] = Field(..., description="Latest episodes")
+
+class DownloadLinkInfo(Schema):
     server: str = Field(..., description="Video server")
     url: str = Field(..., description="Video url")
 
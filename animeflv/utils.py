@@ -1,6 +1,12 @@
-from bs4 import Tag
+from typing import TYPE_CHECKING
+from urllib.parse import urlencode
+
+from animeflv.constants import BROWSE_URL
 from animeflv.exception import AnimeFLVParseError
 
+if TYPE_CHECKING:
+    from bs4 import Tag
+
 
 def removeprefix(str: str, prefix: str) -> str:
     """
@@ -30,7 +36,7 @@ def safe_strip(text: str) -> str:
     return text.strip() if text is not None else ""
 
 
-def parse_table(table: Tag):
+def parse_table(table: "Tag"):
     """
     Parse a given HTML table into a list of dictionaries.
 
@@ -51,3 +57,29 @@ def parse_table(table: Tag):
         rows.append({h: x for h, x in zip(columns, values)})
 
     return rows
+
+
+def browse_url(query: str = None, page: int = None) -> str:
+    """
+    Build the URL of a browse page of animeflv.net.
+
+    :param query (str): Query information like: 'Nanatsu no Taizai'.
+    :param page (int): Page of the information return.
+
+    :return (str): The browse URL.
+    """
+    if page is not None and not isinstance(page, int):
+        raise TypeError
+
+    params = dict()
+    if query is not None:
+        params["q"] = query
+    if page is not None:
+        params["page"] = page
+    params = urlencode(params)
+
+    url = f"{BROWSE_URL}"
+    if params != "":
+        url += f"?{params}"
+
+    return url
@@ -0,0 +1,7 @@
+"""
+Offline benchmarks of the JKAnime and AnimeFLV clients.
+
+Every public method runs against recorded pages served by a local stub server,
+so the numbers are reproducible and do not depend on the sites being reachable.
+Run ``python -m benchmarks --help`` from the repository root.
+"""
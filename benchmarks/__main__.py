@@ -0,0 +1,490 @@
+"""
+Run the offline benchmarks.
+
+    python -m benchmarks                          # every method, SoupParser
+    python -m benchmarks --parser lxml -k anime_info
+    python -m benchmarks --output after.json --compare before.json
+    python -m benchmarks --trusted                # schemas built without validation
+    python -m benchmarks --check                  # SoupParser and LxmlParser, validated or trusted, agree on every fixture
+    python -m benchmarks --imports                # import time of the packages stays within budget, see imports.py
+
+For every method it reports the median wall time and, summed over every request of the
+call, the time spent fetching, parsing and building the schemas, along with the peak
+traced memory and the blocks still allocated while the result is alive. Fetch, parse and
+schema times are added up across worker threads and tasks, so with concurrent requests
+they may exceed the wall time.
+"""
+
+import argparse
+import asyncio
+import functools
+import gc
+import inspect
+import json
+import platform
+import re
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from pydantic import BaseModel
+
+import animeflv
+import jkanime
+from animeapi import construct
+from animeflv import EpisodeFormat
+from benchmarks.imports import check_imports
+from benchmarks.stub import StubServer
+
+PARSERS = {
+    "soup": {"jkanime": jkanime.SoupParser, "animeflv": animeflv.SoupParser},
+    "lxml": {"jkanime": jkanime.LxmlParser, "animeflv": animeflv.LxmlParser},
+}
+
+
+class Scenario(NamedTuple):
+    name: str
+    provider: str
+    asynchronous: bool
+    call: Callable[[Any], Any]
+    options: Dict[str, Any] = {}
+
+
+async def _collect(iterator) -> list:
+    return [item async for item in iterator]
+
+
+def _scenarios() -> List[Scenario]:
+    both = EpisodeFormat.Subtitled | EpisodeFormat.Dubbed
+    calls = [
+        ("jkanime.list", lambda c: c.list(1)),
+        ("jkanime.iter_directory", lambda c: c.iter_directory()),
+        ("jkanime.search", lambda c: c.search("naruto")),
+        ("jkanime.get_homepage", lambda c: c.get_homepage()),
+        ("jkanime.get_latest_animes", lambda c: c.get_latest_animes()),
+        ("jkanime.get_latest_episodes", lambda c: c.get_latest_episodes()),
+        ("jkanime.get_schedule", lambda c: c.get_schedule()),
+        ("jkanime.get_anime_info", lambda c: c.get_anime_info("tensei")),
+        ("jkanime.get_anime_info[compact]", lambda c: c.get_anime_info("tensei")),
+        ("jkanime.get_anime_info_many", lambda c: c.get_anime_info_many([f"anime-{i}" for i in range(8)])),
+        ("jkanime.refresh_anime_info", lambda c: c.refresh_anime_info("tensei", 29)),
+        ("jkanime.get_video_stream", lambda c: c.get_video_stream("tensei", 1)),
+        ("jkanime.get_links", lambda c: c.get_links("tensei", 1)),
+        ("animeflv.list", lambda c: c.list(2)),
+        ("animeflv.search", lambda c: c.search("one")),
+        ("animeflv.iter_list", lambda c: c.iter_list()),
+        ("animeflv.get_links", lambda c: c.get_links("one-piece", 1, both)),
+        ("animeflv.get_video_servers", lambda c: c.get_video_servers("one-piece", 1, both)),
+        ("animeflv.get_homepage", lambda c: c.get_homepage()),
+        ("animeflv.get_latest_episodes", lambda c: c.get_latest_episodes()),
+        ("animeflv.get_latest_animes", lambda c: c.get_latest_animes()),
+        ("animeflv.get_anime_info", lambda c: c.get_anime_info("one-piece")),
+        ("animeflv.get_anime_info[compact]", lambda c: c.get_anime_info("one-piece")),
+        ("animeflv.refresh_anime_info", lambda c: c.refresh_anime_info("one-piece", 1099)),
+        ("animeflv.get_anime_info_many", lambda c: c.get_anime_info_many([f"anime-{i}" for i in range(8)])),
+    ]
+
+    scenarios = []
+    for asynchronous in (False, True):
+        for name, call in calls:
+            scenarios.append(
+                Scenario(
+                    f"async.{name}" if asynchronous else name,
+                    name.split(".", 1)[0],
+                    asynchronous,
+                    call,
+                    {"compact_episodes": True} if name.endswith("[compact]") else {},
+                )
+            )
+    return scenarios
+
+
+class Probe(object):
+    """
+    Accumulates the fetch, parse and schema time of the calls made while it is active.
+    """
+
+    active: Optional["Probe"] = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.reset()
+
+    def reset(self) -> None:
+        self.fetch = self.parse = self.schema = self.parser_schema = 0.0
+        self.requests = self.response_chars = 0
+
+    def add(self, **values) -> None:
+        with self._lock:
+            for name, value in values.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    @property
+    def in_parser(self) -> bool:
+        return getattr(self._local, "in_parser", False)
+
+    @in_parser.setter
+    def in_parser(self, value: bool) -> None:
+        self._local.in_parser = value
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "fetch_ms": self.fetch * 1000,
+            "parse_ms": (self.parse - self.parser_schema) * 1000,
+            "schema_ms": self.schema * 1000,
+            "requests": self.requests,
+            "response_chars": self.response_chars,
+        }
+
+
+class TimedParser(object):
+    """
+    Proxy of a parser timing every method call.
+    """
+
+    def __init__(self, parser, probe: Probe):
+        self._parser = parser
+        self._probe = probe
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._parser, name)
+        if not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        def timed(*args, **kwargs):
+            probe = self._probe
+            if probe.in_parser:
+                return attr(*args, **kwargs)
+
+            probe.in_parser = True
+            start = time.perf_counter()
+            try:
+                return attr(*args, **kwargs)
+            finally:
+                probe.in_parser = False
+                probe.add(parse=time.perf_counter() - start)
+
+        return timed
+
+
+_schema_depth = threading.local()
+
+
+def _timed_schema(build: Callable) -> Callable:
+    @functools.wraps(build)
+    def timed(*args, **data):
+        probe = Probe.active
+        if probe is None or getattr(_schema_depth, "value", 0):
+            return build(*args, **data)
+
+        _schema_depth.value = 1
+        start = time.perf_counter()
+        try:
+            return build(*args, **data)
+        finally:
+            _schema_depth.value = 0
+            elapsed = time.perf_counter() - start
+            if probe.in_parser:
+                probe.add(schema=elapsed, parser_schema=elapsed)
+            else:
+                probe.add(schema=elapsed)
+
+    return timed
+
+
+def _install_schema_timer() -> None:
+    BaseModel.__init__ = _timed_schema(BaseModel.__init__)
+
+    # Trusted constructors skip __init__, they are timed as they are built.
+    schema_factory = construct.schema_factory
+    construct.schema_factory = lambda model, trusted=False: _timed_schema(schema_factory(model, True)) if trusted else model
+
+
+def _instrument(client, probe: Probe):
+    client._parser = TimedParser(client._parser, probe)
+    get = client._http.get
+
+    if inspect.iscoroutinefunction(get):
+
+        async def timed_get(*args, **kwargs):
+            start = time.perf_counter()
+            response = await get(*args, **kwargs)
+            probe.add(fetch=time.perf_counter() - start, requests=1, response_chars=len(response.text))
+            return response
+
+    else:
+
+        def timed_get(*args, **kwargs):
+            start = time.perf_counter()
+            response = get(*args, **kwargs)
+            probe.add(fetch=time.perf_counter() - start, requests=1, response_chars=len(response.text))
+            return response
+
+    client._http.get = timed_get
+    return client
+
+
+class Runner(object):
+    """
+    Builds the clients of a scenario, pointed at the stub server, and runs its call.
+    """
+
+    def __init__(self, server: StubServer, parser: str, trusted: bool = False):
+        self._server = server
+        self._parsers = PARSERS[parser]
+        self._trusted = trusted
+        self._clients = {}
+
+    def _factory(self, scenario: Scenario):
+        parser = self._parsers[scenario.provider](trusted=self._trusted)
+        if scenario.asynchronous:
+            cls = jkanime.AsyncJKAnime if scenario.provider == "jkanime" else animeflv.AsyncAnimeFLV
+            return self._server.mount_async(cls(parser=parser, homepage_ttl=0, **scenario.options))
+
+        cls = jkanime.JKAnime if scenario.provider == "jkanime" else animeflv.AnimeFLV
+        return self._server.mount(cls(parser=parser, homepage_ttl=0, **scenario.options))
+
+    def run(self, scenario: Scenario, probe: Optional[Probe] = None, measure: Optional[Callable] = None):
+        """
+        Run the call of a scenario once.
+
+        :param scenario (Scenario): Scenario to run.
+        :param probe (Probe): Optional probe attached to the client for the call.
+        :param measure: Optional context manager factory wrapped around the call only.
+        :return: The result of the call, with iterators drained into a list.
+        """
+        measure = measure or _Stopwatch
+
+        if scenario.asynchronous:
+            return asyncio.run(self._run_async(scenario, probe, measure))
+
+        key = (scenario.provider, tuple(sorted(scenario.options.items())))
+        client = self._clients.get(key)
+        if client is None:
+            client = self._clients[key] = self._factory(scenario)
+
+        if probe is not None:
+            client = _instrument(_Clone(client), probe)
+
+        with measure() as watch:
+            result = scenario.call(client)
+            if inspect.isgenerator(result):
+                result = list(result)
+        return watch, result
+
+    async def _run_async(self, scenario: Scenario, probe: Optional[Probe], measure):
+        async with self._factory(scenario) as client:
+            if probe is not None:
+                _instrument(client, probe)
+
+            with measure() as watch:
+                result = scenario.call(client)
+                result = await (_collect(result) if inspect.isasyncgen(result) else result)
+            return watch, result
+
+    def close(self) -> None:
+        for client in self._clients.values():
+            client.close()
+
+
+class _Clone(object):
+    """
+    Shallow view of a sync client whose instrumented attributes do not leak into the original.
+    """
+
+    def __new__(cls, client):
+        clone = object.__new__(type(client))
+        clone.__dict__.update(client.__dict__)
+        clone._http = object.__new__(type(client._http))
+        clone._http.__dict__.update(client._http.__dict__)
+        return clone
+
+
+class _Stopwatch(object):
+    def __enter__(self) -> "_Stopwatch":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.elapsed = time.perf_counter() - self.start
+
+
+class _Memory(_Stopwatch):
+    def __enter__(self) -> "_Memory":
+        gc.collect()
+        self.blocks = sys.getallocatedblocks()
+        tracemalloc.start()
+        return super().__enter__()
+
+    def __exit__(self, *exc) -> None:
+        super().__exit__(*exc)
+        self.peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        gc.collect()
+        self.blocks = sys.getallocatedblocks() - self.blocks
+
+
+def dump(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: dump(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [dump(item) for item in value]
+    if isinstance(value, Exception):
+        return repr(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    return value
+
+
+def benchmark(runner: Runner, scenario: Scenario, repeat: int, warmup: int) -> Dict[str, float]:
+    for _ in range(warmup):
+        runner.run(scenario)
+
+    probe = Probe()
+    walls, phases = [], []
+    Probe.active = probe
+    try:
+        for _ in range(repeat):
+            probe.reset()
+            watch, _ = runner.run(scenario, probe)
+            walls.append(watch.elapsed * 1000)
+            phases.append(probe.summary())
+    finally:
+        Probe.active = None
+
+    watch, result = runner.run(scenario, measure=_Memory)
+    del result
+
+    summary = {
+        "wall_ms": statistics.median(walls),
+        "wall_min_ms": min(walls),
+        "wall_stdev_ms": statistics.stdev(walls) if len(walls) > 1 else 0.0,
+    }
+    for key in phases[0]:
+        summary[key] = statistics.median(phase[key] for phase in phases)
+    summary["peak_kb"] = watch.peak / 1024
+    summary["retained_blocks"] = watch.blocks
+
+    return summary
+
+
+def check(server: StubServer, scenarios: List[Scenario]) -> int:
+    runners = {(name, trusted): Runner(server, name, trusted) for name in PARSERS for trusted in (False, True)}
+    failures = 0
+
+    try:
+        for scenario in scenarios:
+            results = {key: runner.run(scenario)[1] for key, runner in runners.items()}
+            outputs = {json.dumps(dump(result), sort_keys=True) for result in results.values()}
+            # Trusted objects must also hold the same Python values (a tuple where validation makes a list, ...).
+            same = len(outputs) == 1 and all(results[name, True] == results[name, False] for name in PARSERS)
+            failures += not same
+            print(f"{'ok' if same else 'MISMATCH':<9}{scenario.name}")
+    finally:
+        for runner in runners.values():
+            runner.close()
+
+    return failures
+
+
+COLUMNS = [
+    ("wall_ms", "wall ms", "{:.2f}"),
+    ("fetch_ms", "fetch ms", "{:.2f}"),
+    ("parse_ms", "parse ms", "{:.2f}"),
+    ("schema_ms", "schema ms", "{:.2f}"),
+    ("requests", "reqs", "{:.0f}"),
+    ("peak_kb", "peak KiB", "{:.0f}"),
+    ("retained_blocks", "blocks", "{:.0f}"),
+]
+
+
+def report(results: Dict[str, Dict[str, float]], baseline: Optional[Dict[str, Dict[str, float]]] = None) -> None:
+    width = max([len(name) for name in results] + [10])
+    header = f"{'method':<{width}}" + "".join(f"{title:>12}" for _, title, _ in COLUMNS)
+    if baseline is not None:
+        header += f"{'wall Δ':>10}{'peak Δ':>10}"
+    print(header)
+    print("-" * len(header))
+
+    for name, result in results.items():
+        line = f"{name:<{width}}" + "".join(f"{fmt.format(result[key]):>12}" for key, _, fmt in COLUMNS)
+        before = (baseline or {}).get(name)
+        if before:
+            line += "".join(f"{_delta(before[key], result[key]):>10}" for key in ("wall_ms", "peak_kb"))
+        print(line)
+
+
+def _delta(before: float, after: float) -> str:
+    if not before:
+        return "-"
+    return f"{(after - before) / before * 100:+.1f}%"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Offline benchmarks of the anime clients.")
+    parser.add_argument("--parser", choices=sorted(PARSERS), default="soup", help="parser backend (default: soup)")
+    parser.add_argument("-k", "--filter", default=None, help="only run the methods matching this regex")
+    parser.add_argument("-n", "--repeat", type=int, default=20, help="timed runs per method (default: 20)")
+    parser.add_argument("--warmup", type=int, default=2, help="untimed runs per method (default: 2)")
+    parser.add_argument("--no-async", action="store_true", help="skip the async clients")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON file of a previous run to compare against")
+    parser.add_argument("--trusted", action="store_true", help="build the schemas without validation")
+    parser.add_argument("--check", action="store_true", help="check both parsers, validated or trusted, return the same data and exit")
+    parser.add_argument("--imports", action="store_true", help="check the import time of the packages stays within budget and exit")
+    args = parser.parse_args(argv)
+
+    if args.imports:
+        return 1 if check_imports(max(args.repeat // 4, 1)) else 0
+
+    scenarios = _scenarios()
+    if args.no_async:
+        scenarios = [scenario for scenario in scenarios if not scenario.asynchronous]
+    else:
+        try:
+            import aiohttp  # noqa: F401
+        except ImportError:
+            print("aiohttp is not installed, skipping the async clients", file=sys.stderr)
+            scenarios = [scenario for scenario in scenarios if not scenario.asynchronous]
+    if args.filter:
+        scenarios = [scenario for scenario in scenarios if re.search(args.filter, scenario.name)]
+
+    with StubServer() as server:
+        if args.check:
+            return 1 if check(server, scenarios) else 0
+
+        _install_schema_timer()
+        runner = Runner(server, args.parser, args.trusted)
+        try:
+            results = {scenario.name: benchmark(runner, scenario, args.repeat, args.warmup) for scenario in scenarios}
+        finally:
+            runner.close()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)["results"]
+
+    report(results, baseline)
+
+    if args.output:
+        meta = {
+            "parser": args.parser,
+            "trusted": args.trusted,
+            "repeat": args.repeat,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        }
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump({"meta": meta, "results": results}, file, indent=2)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""
+Import-time budget of the packages.
+
+Every statement runs in a fresh interpreter, so nothing is already imported, and must
+stay under its time budget without loading the modules it does not need:
+
+    python -m benchmarks --imports
+
+The budgets are generous wall-time limits for a regular machine, the forbidden modules
+are the actual guard: they catch a top-level import of a heavy dependency.
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import List, NamedTuple, Tuple
+
+# Dependencies only needed by the network calls or the parsers.
+NETWORK = ("cloudscraper", "requests", "urllib3", "aiohttp")
+PARSING = ("bs4", "lxml")
+
+
+class ImportCase(NamedTuple):
+    statement: str
+    budget_ms: float
+    forbidden: Tuple[str, ...]
+
+
+CASES = [
+    ImportCase("import animeapi", 10, NETWORK + PARSING + ("pydantic", "sqlite3", "asyncio")),
+    ImportCase("import jkanime", 10, NETWORK + PARSING + ("pydantic",)),
+    ImportCase("import animeflv", 10, NETWORK + PARSING + ("pydantic",)),
+    ImportCase("from jkanime import AnimeInfo", 150, NETWORK + PARSING),
+    ImportCase("from animeflv import AnimeInfo", 150, NETWORK + PARSING),
+    ImportCase("from jkanime import JKAnime", 200, NETWORK + PARSING + ("asyncio",)),
+    ImportCase("from animeflv import AnimeFLV", 200, NETWORK + PARSING + ("asyncio",)),
+]
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"ms": elapsed * 1000, "modules": sorted(name.split(".")[0] for name in sys.modules)}}))
+"""
+
+
+def measure(statement: str, repeat: int) -> Tuple[float, List[str]]:
+    """
+    Median import time of a statement, each run in a fresh interpreter.
+
+    :param statement (str): Import statement.
+    :param repeat (int): Number of runs.
+    :return (Tuple[float, List[str]]): Milliseconds and the top-level modules loaded.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [root, os.environ.get("PYTHONPATH")])))
+    times, modules = [], []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(statement=statement)],
+            check=True,
+            capture_output=True,
+            text=True,
+            env=env,
+        ).stdout
+        result = json.loads(output)
+        times.append(result["ms"])
+        modules = result["modules"]
+    return statistics.median(times), modules
+
+
+def check_imports(repeat: int = 5) -> int:
+    """
+    Measure every case, print the results and return the number of cases over budget.
+
+    :param repeat (int): Runs per case.
+    :return (int):
+    """
+    width = max(len(case.statement) for case in CASES)
+    print(f"{'statement':<{width}}{'ms':>10}{'budget':>10}  loaded")
+    print("-" * (width + 40))
+
+    failures = 0
+    for case in CASES:
+        ms, modules = measure(case.statement, repeat)
+        loaded = [name for name in case.forbidden if name in modules]
+        ok = ms <= case.budget_ms and not loaded
+        failures += not ok
+        print(f"{case.statement:<{width}}{ms:>10.1f}{case.budget_ms:>10.0f}  {', '.join(loaded) or '-'}{'' if ok else '  OVER BUDGET'}")
+    return failures
+
@@ -0,0 +1,171 @@
+import os
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from requests.adapters import HTTPAdapter
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# (host, pattern matched against "path?query", fixture file). The file name may use the
+# groups of the pattern, like "directorio_{0}.html".
+ROUTES: List[Tuple[str, "re.Pattern", str]] = [
+    ("jkanime.net", re.compile(r"^/?$"), "jkanime/home.html"),
+    ("jkanime.net", re.compile(r"^/directorio/+(\d+)/?$"), "jkanime/directorio_{0}.html"),
+    ("jkanime.net", re.compile(r"^/buscar/+[^/]+/(\d+)/?$"), "jkanime/buscar_{0}.html"),
+    ("jkanime.net", re.compile(r"^/horario/?$"), "jkanime/horario.html"),
+    ("jkanime.net", re.compile(r"^/ajax/pagination_episodes/+\d+/(\d+)/?$"), "jkanime/pagination_{0}.json"),
+    ("jkanime.net", re.compile(r"^/jkplayer/[^?]*\?e=ep0\b"), "jkanime/iframe_dplayer.html"),
+    ("jkanime.net", re.compile(r"^/jkplayer/"), "jkanime/iframe_script.html"),
+    ("jkanime.net", re.compile(r"^/c1\.php\?"), "jkanime/iframe_source.html"),
+    ("jkanime.net", re.compile(r"^/[^/?]+/\d+/?$"), "jkanime/episode.html"),
+    ("jkanime.net", re.compile(r"^/[^/?]+/?$"), "jkanime/anime.html"),
+    ("animeflv.net", re.compile(r"^/?$"), "animeflv/home.html"),
+    ("animeflv.net", re.compile(r"^/browse\?(?:.*&)?q="), "animeflv/search.html"),
+    ("animeflv.net", re.compile(r"^/browse\?(?:.*&)?page=(\d+)"), "animeflv/browse_{0}.html"),
+    ("animeflv.net", re.compile(r"^/browse/?$"), "animeflv/browse_1.html"),
+    ("animeflv.net", re.compile(r"^/ver/"), "animeflv/ver.html"),
+    ("animeflv.net", re.compile(r"^/anime/"), "animeflv/anime.html"),
+]
+
+HOSTS = sorted({host for host, _, _ in ROUTES})
+
+
+def resolve(host: str, target: str) -> Optional[str]:
+    """
+    Fixture file serving a request of one of the sites.
+
+    :param host (str): The site host, like ``jkanime.net``.
+    :param target (str): The path and query of the request.
+    :return (Optional[str]): The fixture path relative to the fixtures directory, or None.
+    """
+    for route_host, pattern, fixture in ROUTES:
+        match = pattern.search(target) if route_host == host else None
+        if match:
+            return fixture.format(*match.groups())
+    return None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately, Nagle would delay every response by ~40ms.
+    disable_nagle_algorithm = True
+
+    def do_GET(self) -> None:
+        host, _, target = self.path.lstrip("/").partition("/")
+        fixture = resolve(host, "/" + target)
+        path = os.path.join(self.server.fixtures_dir, fixture) if fixture else None
+
+        if path is None or not os.path.isfile(path):
+            body = b"Not Found"
+            self.send_response(404)
+            self.send_header("Content-Type", "text/plain")
+        else:
+            with open(path, "rb") as file:
+                body = file.read()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json" if path.endswith(".json") else "text/html; charset=utf-8")
+
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 drops the connections of concurrent clients.
+    request_queue_size = 128
+
+
+class StubServer(object):
+    """
+    Local HTTP server replaying the recorded pages of both sites.
+
+    Requests are expected as ``http://127.0.0.1:<port>/<host>/<path>``, which is what
+    StubAdapter sends when it is mounted on a client session.
+
+    :param fixtures_dir (str): Directory with the ``jkanime`` and ``animeflv`` fixtures.
+    """
+
+    def __init__(self, fixtures_dir: str = FIXTURES_DIR):
+        self._server = _Server(("127.0.0.1", 0), _Handler)
+        self._server.fixtures_dir = fixtures_dir
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def mount(self, client):
+        """
+        Route every request of a sync client to the stub server.
+
+        :param client: A JKAnime or AnimeFLV instance.
+        :return: The same client.
+        """
+        adapter = StubAdapter(self.base_url)
+        for host in HOSTS:
+            client._scraper.mount(f"https://{host}", adapter)
+            client._scraper.mount(f"http://{host}", adapter)
+        return client
+
+    def mount_async(self, client):
+        """
+        Route every request of an async client to the stub server.
+
+        :param client: An AsyncJKAnime or AsyncAnimeFLV instance.
+        :return: The same client.
+        """
+        fetch = client._http._fetch
+
+        async def stub_fetch(url, headers, timeout, timings=None):
+            return await fetch(rewrite(self.base_url, url), headers, timeout, timings)
+
+        client._http._fetch = stub_fetch
+        return client
+
+
+def rewrite(base_url: str, url: str) -> str:
+    """
+    Address of a site URL on the stub server.
+
+    :param base_url (str): Base URL of the stub server.
+    :param url (str): URL of one of the sites.
+    :return (str):
+    """
+    parts = urlsplit(url)
+    return f"{base_url}/{parts.netloc}{parts.path or '/'}" + (f"?{parts.query}" if parts.query else "")
+
+
+class StubAdapter(HTTPAdapter):
+    """
+    Transport adapter rewriting the site URLs to the stub server.
+    """
+
+    def __init__(self, base_url: str, **kwargs):
+        super().__init__(**kwargs)
+        self._base_url = base_url
+
+    def send(self, request, **kwargs):
+        request.url = rewrite(self._base_url, request.url)
+        return super().send(request, **kwargs)
@@ -1,12 +1,44 @@
-from .jkanime import JKAnime
-from .schema import (
-    AnimeInfo,
-    AnimeShortInfo,
-    AnimeList,
-    EpisodeInfo,
-    EpisodeVideoUrls,
-    LastAnimes,
-    LastEpisodes,
-    ListSchedule,
-    Schedule,
-)
+from typing import TYPE_CHECKING
+
+from animeapi.lazy import lazy_exports
+
+# Names are imported from their module on first access, so the schemas can be used without
+# loading cloudscraper, BeautifulSoup or aiohttp.
+_EXPORTS = {
+    "AsyncJKAnime": ".aio",
+    "JKAnime": ".jkanime",
+    "LxmlParser": ".parser",
+    "SoupParser": ".parser",
+    "AnimeInfo": ".schema",
+    "AnimeInfoUpdate": ".schema",
+    "AnimeShortInfo": ".schema",
+    "AnimeList": ".schema",
+    "EpisodeInfo": ".schema",
+    "EpisodeVideoUrls": ".schema",
+    "HomePage": ".schema",
+    "LastAnimes": ".schema",
+    "LastEpisodes": ".schema",
+    "ListSchedule": ".schema",
+    "Schedule": ".schema",
+}
+
+__all__ = list(_EXPORTS)
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
+
+if TYPE_CHECKING:
+    from .aio import AsyncJKAnime
+    from .jkanime import JKAnime
+    from .parser import LxmlParser, SoupParser
+    from .schema import (
+        AnimeInfo,
+        AnimeInfoUpdate,
+        AnimeShortInfo,
+        AnimeList,
+        EpisodeInfo,
+        EpisodeVideoUrls,
+        HomePage,
+        LastAnimes,
+        LastEpisodes,
+        ListSchedule,
+        Schedule,
+    )
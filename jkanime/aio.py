@@ -0,0 +1,672 @@
+import asyncio
+import contextvars
+import functools
+import operator
+import time
+from collections import deque
+from types import TracebackType
+from typing import AsyncIterator, Dict, Hashable, Iterable, List, Optional, Set, Tuple, Type, Union
+
+from animeapi.aio import AsyncHTTPClient
+from animeapi.catalog import PAGE_SIZE as CATALOG_PAGE_SIZE, Catalog
+from animeapi.deadline import bounded, remaining
+from animeapi.episodes import LazyEpisodes
+from animeapi.exception import DeadlineExceeded
+from animeapi.http import REQUEST_TIMEOUT
+from animeapi.instrument import phase, record_retry
+from animeapi.singleflight import AsyncSingleFlight, coalesce
+from animeapi.streams import CachedStreams, Resolved, found, served
+from jkanime.constants import (
+    BASE_URL,
+    DIRECTORY_PREFETCH,
+    DIRECTORY_URL,
+    EPISODES_PER_PAGE,
+    HOMEPAGE_TTL,
+    IFRAME_TIMEOUT,
+    MAX_WORKERS,
+    PAGINATION_EP,
+    PAGINATION_RETRIES,
+    PROVIDER,
+    SCHEDULE_URL,
+    SEARCH_URL,
+    STREAM_HOSTNAMES,
+)
+from jkanime.exception import JKAnimeParseError
+from jkanime.parser import SoupParser
+from jkanime.schema import (
+    AnimeInfo,
+    AnimeInfoUpdate,
+    AnimeList,
+    AnimeShortInfo,
+    EpisodeInfo,
+    EpisodeVideoUrls,
+    HomePage,
+    LastAnimes,
+    LastEpisodes,
+    ListSchedule,
+)
+from jkanime.utils import safe_strip
+
+
+class AsyncJKAnime(object):
+    """
+    Asyncio counterpart of JKAnime. It exposes the same methods, as coroutines,
+    and returns the same schemas.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._http = AsyncHTTPClient(
+            session=kwargs.get("session", None),
+            cache=kwargs.get("cache", None),
+            headers=kwargs.get("headers", None),
+            cookie_store=kwargs.get("cookie_store", None),
+            limiter=kwargs.get("limiter", None),
+            timeout=kwargs.get("request_timeout", REQUEST_TIMEOUT),
+        )
+        self._parser = kwargs.get("parser", None) or SoupParser(trusted=kwargs.get("trusted", False))
+        self._max_workers = kwargs.get("max_workers", MAX_WORKERS)
+        self._call_timeout = kwargs.get("call_timeout", None)
+        self._retries = kwargs.get("retries", PAGINATION_RETRIES)
+        self._iframe_timeout = kwargs.get("iframe_timeout", IFRAME_TIMEOUT)
+        self._homepage_ttl = kwargs.get("homepage_ttl", HOMEPAGE_TTL)
+        self._catalog = kwargs.get("catalog", None)
+        self._compact_episodes = kwargs.get("compact_episodes", False)
+        self._flights = AsyncSingleFlight() if kwargs.get("coalesce", False) else None
+        self._stream_cache = kwargs.get("stream_cache", None)
+        self._refreshes: Set[asyncio.Task] = set()
+        self._homepage = None
+
+        instrument = kwargs.get("instrument", None)
+        if instrument is not None:
+            instrument.attach(self, PROVIDER)
+
+    async def close(self) -> None:
+        for task in self._refreshes:
+            task.cancel()
+        await asyncio.gather(*self._refreshes, return_exceptions=True)
+        await self._http.close()
+
+    async def __aenter__(self) -> "AsyncJKAnime":
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        await self.close()
+
+    @bounded
+    @coalesce
+    async def list(self, page: int = 1, source: str = "remote") -> AnimeList:
+        """
+        Retrieves a list of anime from the JKAnime directory.
+
+        Args:
+            page (int): The page number to retrieve (default is 1).
+            source (str): ``"remote"`` to ask the website, ``"local"`` to list the client's catalog offline, sorted by title.
+
+        Returns:
+            AnimeList: A list of anime information, including the current page number, whether it's the last page, and a list of AnimeShortInfo objects.
+
+        Raises:
+            ValueError: If the source is unknown, or is ``"local"`` and the client has no catalog.
+        """
+        if source == "local":
+            return self.__local_search(None, page)
+        if source != "remote":
+            raise ValueError(f"Unknown search source: {source!r}")
+
+        url = f"{DIRECTORY_URL}/{page}"
+
+        response = await self._http.get(url, "directory", headers={"Referer": BASE_URL})
+        return self._parser.directory(response.text, page)
+
+    @bounded
+    async def iter_directory(self, start_page: int = 1, prefetch: int = DIRECTORY_PREFETCH) -> AsyncIterator[AnimeShortInfo]:
+        """
+        Iterates over every anime of the JKAnime directory, page after page, until the last page.
+
+        While the current page is consumed, the next ``prefetch`` pages are downloaded and parsed
+        concurrently. Pages prefetched past the last page are discarded.
+
+        Args:
+            start_page (int): The page to start from, to resume an interrupted crawl (default is 1).
+            prefetch (int): The number of upcoming pages fetched in the background (default is 2).
+
+        Yields:
+            AnimeShortInfo: The animes of the directory, in directory order.
+
+        Raises:
+            JKAnimeParseError: If there is an error parsing the response from the website.
+        """
+        pending = deque()
+        next_page = start_page
+
+        try:
+            while True:
+                while len(pending) <= prefetch:
+                    pending.append(asyncio.ensure_future(self.list(next_page)))
+                    next_page += 1
+
+                result = await pending.popleft()
+                for anime in result.data:
+                    yield anime
+
+                if result.last_page or not result.data:
+                    return
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    @bounded
+    @coalesce
+    async def search(self, query: str = None, page: int = 1, source: str = "remote") -> AnimeList:
+        """
+        Searches for anime based on the provided query and returns a list of anime information.
+
+        Args:
+            query (str): The search query to use (default is None).
+            page (int): The page number to retrieve (default is 1).
+            source (str): ``"remote"`` to ask the website, ``"local"`` to search the client's catalog offline (default is ``"remote"``).
+                The local search matches every word of the query as a title prefix.
+
+        Returns:
+            AnimeList: A list of anime information, including the current page number, whether it's the last page, and a list of AnimeShortInfo objects.
+
+        Raises:
+            ValueError: If the source is unknown, or is ``"local"`` and the client has no catalog.
+        """
+        if source == "local":
+            return self.__local_search(query, page)
+        if source != "remote":
+            raise ValueError(f"Unknown search source: {source!r}")
+
+        url = f"{SEARCH_URL}/{query}/{page}"
+
+        response = await self._http.get(url, "search", headers={"Referer": BASE_URL})
+        return self._parser.search(response.text, page)
+
+    @bounded
+    @coalesce
+    async def get_homepage(self) -> HomePage:
+        """
+        Retrieves the JKAnime front page once and returns both the latest animes and the latest episodes.
+
+        Returns:
+            HomePage: An object containing the latest AnimeShortInfo and EpisodeInfo objects.
+
+        Raises:
+            JKAnimeParseError: If there is an error parsing the response from the website.
+        """
+        response = await self._http.get(BASE_URL, "homepage")
+        homepage = self._parser.homepage(response.text)
+        self._homepage = (time.monotonic(), homepage)
+
+        return homepage
+
+    @bounded
+    async def get_latest_animes(self) -> LastAnimes:
+        """
+        Retrieves the latest anime information from the JKAnime website and returns it as a LastAnimes object.
+
+        Returns:
+            LastAnimes: An object containing a list of AnimeShortInfo objects representing the latest anime information.
+
+        Raises:
+            JKAnimeParseError: If there is an error parsing the response from the website.
+        """
+        return LastAnimes(animes=(await self.__homepage_snapshot()).animes)
+
+    @bounded
+    async def get_latest_episodes(self) -> LastEpisodes:
+        """
+        Retrieves the latest episodes information from the JKAnime website and returns it as a LastEpisodes object.
+
+        Returns:
+            LastEpisodes: An object containing a list of EpisodeInfo objects representing the latest episodes information.
+
+        Raises:
+            JKAnimeParseError: If there is an error parsing the response from the website.
+        """
+        return LastEpisodes(episodes=(await self.__homepage_snapshot()).episodes)
+
+    @bounded
+    @coalesce
+    async def get_schedule(self) -> ListSchedule:
+        """
+        Retrieves the schedule of anime broadcasts from the JKAnime website and returns it as a ListSchedule object.
+
+        Returns:
+            ListSchedule: An object containing a list of Schedule objects representing the schedule information.
+
+        Raises:
+            JKAnimeParseError: If there is an error parsing the response from the website.
+        """
+        response = await self._http.get(SCHEDULE_URL, "schedule")
+        return self._parser.schedule(response.text)
+
+    @bounded
+    @coalesce
+    async def get_anime_info(self, id: str) -> AnimeInfo:
+        """
+        Retrieves detailed information about an anime from the JKAnime website.
+        The episode pagination pages are fetched concurrently.
+
+        Unlike ``JKAnime.get_anime_info`` there is no ``lazy_episodes`` option: LazyEpisodes loads
+        its pages when indexed, which an async client cannot do without blocking its event loop.
+
+        Args:
+            id (str): The unique identifier of the anime.
+
+        Returns:
+            AnimeInfo: A data structure containing detailed information about the anime.
+
+        Raises:
+            JKAnimeParseError: If there is an error parsing the response from the website.
+        """
+        url = f"{BASE_URL}/{id}"
+
+        response = await self._http.get(url, "anime", headers={"Referer": BASE_URL})
+        information, pages = self._parser.anime_details(response.text, id)
+        information["episodes"] = await self.__fetch_episodes(information["unique_id"], id, pages)
+
+        return self._parser.anime_info(information)
+
+    @bounded
+    @coalesce
+    async def refresh_anime_info(self, id: str, known: Union[int, AnimeInfo]) -> AnimeInfoUpdate:
+        """
+        Retrieves the information of an anime, fetching only the episode pagination pages that can hold
+        episodes released since a known state, instead of every page.
+
+        When ``known`` is an AnimeInfo its episodes are merged with the new ones. When it is a count,
+        the episodes of the merged anime start at the first pagination page fetched. LazyEpisodes
+        of a known AnimeInfo are loaded first, their pages not loaded yet fetched by this call.
+
+        Args:
+            id (str): The unique identifier of the anime.
+            known (Union[int, AnimeInfo]): The number of episodes already known, or the previously retrieved AnimeInfo.
+
+        Returns:
+            AnimeInfoUpdate: The anime with the new episodes merged, and the new episodes alone.
+
+        Raises:
+            JKAnimeParseError: If there is an error parsing the response from the website.
+        """
+        url = f"{BASE_URL}/{id}"
+
+        response = await self._http.get(url, "anime", headers={"Referer": BASE_URL})
+        information, pages = self._parser.anime_details(response.text, id)
+
+        # Not tested for truth, which would load LazyEpisodes through their own loader.
+        previous = known.episodes if isinstance(known, AnimeInfo) else None
+        if isinstance(known, AnimeInfo) and previous is None:
+            previous = []
+        elif isinstance(previous, LazyEpisodes):
+            previous = await self.__load_lazy_episodes(information["unique_id"], id, previous)
+        count = len(previous) if previous is not None else known
+
+        # The site may change its page size, so it is checked on a full page: the first one fetched,
+        # or page 1 when only the last page holds new episodes.
+        per_page = EPISODES_PER_PAGE
+        first_page = count // per_page + 1 if pages > 1 else 1
+        wanted = list(range(first_page, pages + 1))
+        if pages > 1 and first_page >= pages:
+            wanted.insert(0, 1)
+        fetched = await self.__fetch_episode_pages(information["unique_id"], id, wanted)
+        if pages > 1 and len(fetched[min(fetched)]) not in (0, per_page):
+            per_page = len(fetched[min(fetched)])
+            first_page = count // per_page + 1
+            missing = [page for page in range(first_page, pages + 1) if page not in fetched]
+            fetched.update(await self.__fetch_episode_pages(information["unique_id"], id, missing))
+
+        offset = (first_page - 1) * per_page
+        episodes = self.__merge_pages(fetched[page] for page in range(first_page, pages + 1))
+        information["episodes"] = (previous or [])[:offset] + episodes
+
+        return AnimeInfoUpdate(anime=self._parser.anime_info(information), new_episodes=episodes[count - offset :])
+
+    @bounded
+    async def get_anime_info_many(self, ids: Iterable[str], max_workers: Optional[int] = None) -> Dict[str, Union[AnimeInfo, Exception]]:
+        """
+        Retrieves detailed information about several animes concurrently.
+        A failing anime does not abort the others, its error is returned in place of its information.
+
+        Args:
+            ids (Iterable[str]): The unique identifiers of the animes, duplicates are fetched once.
+            max_workers (Optional[int]): The maximum number of animes fetched at once (default is the client's ``max_workers``).
+
+        Returns:
+            Dict[str, Union[AnimeInfo, Exception]]: The information or the error of every anime, in the order of ``ids``.
+        """
+        ids = list(dict.fromkeys(ids))
+        results = {id: result async for id, result in self.iter_anime_info(ids, max_workers)}
+
+        return {id: results[id] for id in ids}
+
+    @bounded
+    async def iter_anime_info(
+        self,
+        ids: Iterable[str],
+        max_workers: Optional[int] = None,
+    ) -> AsyncIterator[Tuple[str, Union[AnimeInfo, Exception]]]:
+        """
+        Retrieves detailed information about several animes concurrently, yielding each one as soon as it completes.
+        Animes still pending are cancelled when the iterator is closed.
+
+        Args:
+            ids (Iterable[str]): The unique identifiers of the animes, duplicates are fetched once.
+            max_workers (Optional[int]): The maximum number of animes fetched at once (default is the client's ``max_workers``).
+
+        Yields:
+            Tuple[str, Union[AnimeInfo, Exception]]: The id of an anime and its information, or the error that prevented getting it.
+        """
+        semaphore = asyncio.Semaphore(max(1, max_workers or self._max_workers))
+
+        async def fetch(id: str) -> Tuple[str, Union[AnimeInfo, Exception]]:
+            async with semaphore:
+                try:
+                    return id, await self.get_anime_info(id)
+                except Exception as exc:
+                    return id, exc
+
+        tasks = [asyncio.ensure_future(fetch(id)) for id in dict.fromkeys(ids)]
+
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    @bounded
+    @coalesce
+    async def get_video_stream(self, id: str, episode: int = 1, max_streams: Optional[int] = None) -> EpisodeVideoUrls:
+        """
+        Retrieves the video stream URLs for a specific anime episode.
+
+        Every mirror is resolved concurrently and bounded by the client's ``iframe_timeout``.
+        Mirrors that fail, time out or are not resolved by the deadline of the call are left out,
+        the rest keep the order of the episode page.
+
+        With a ``stream_cache`` the streams of the episode are served from it, only the mirrors
+        it has no usable stream for are resolved, and the stale ones are re-resolved in the background.
+
+        Args:
+            id (str): The unique identifier of the anime.
+            episode (int): The episode number of the anime (default is 1).
+            max_streams (Optional[int]): Stop once this many mirrors resolved to a stream (default is None, resolve all).
+
+        Returns:
+            EpisodeVideoUrls: A list of video stream URLs for the specified anime episode.
+
+        Raises:
+            JKAnimeParseError: If there is an error parsing the response from the website.
+        """
+        key = (PROVIDER, id, str(episode))
+        cached = self._stream_cache.get(key) if self._stream_cache is not None else None
+        if cached is not None:
+            return self._parser.stream_urls(await self.__cached_streams(key, cached, max_streams))
+
+        url = f"{BASE_URL}/{id}/{episode}"
+
+        response = await self._http.get(url, "episode", headers={"Referer": BASE_URL})
+        iframe_urls = self._parser.iframe_urls(response.text)
+
+        resolved = await self.__resolve_streams(iframe_urls, max_streams)
+        if self._stream_cache is not None:
+            self._stream_cache.store(key, resolved, iframe_urls)
+        return self._parser.stream_urls(served(iframe_urls, resolved))
+
+    @bounded
+    @coalesce
+    async def get_links(self, id: str, episode: int = 1) -> EpisodeVideoUrls:
+        """
+        Retrieves a list of video URLs for a given anime episode.
+
+        Args:
+            id (str): The ID of the anime.
+            episode (int, optional): The episode number. Defaults to 1.
+
+        Returns:
+            EpisodeVideoUrls: A list of video URLs for the specified episode.
+        """
+        url = f"{BASE_URL}/{id}/{episode}"
+
+        response = await self._http.get(url, "episode", headers={"Referer": BASE_URL})
+        return self._parser.links(response.text)
+
+    @bounded
+    async def refresh_catalog(self, prune: bool = False) -> int:
+        """
+        Crawls every page of the directory into the client's catalog, used by ``search(source="local")``.
+        Animes already stored are only rewritten when they changed.
+
+        Args:
+            prune (bool): Remove the animes that are no longer listed by the website (default is False).
+
+        Returns:
+            int: The number of animes that were new or changed.
+
+        Raises:
+            ValueError: If the client has no catalog.
+            JKAnimeParseError: If there is an error parsing the response from the website.
+        """
+        catalog = self.__require_catalog()
+        started = time.time()
+        changed = catalog.upsert(PROVIDER, [anime async for anime in self.iter_directory()])
+        if prune:
+            catalog.prune(PROVIDER, started)
+
+        return changed
+
+    def __local_search(self, query: Optional[str], page: int) -> AnimeList:
+        rows, total = self.__require_catalog().search(PROVIDER, query, page, CATALOG_PAGE_SIZE)
+
+        return AnimeList(
+            current_page=page,
+            last_page=page * CATALOG_PAGE_SIZE >= total,
+            data=[AnimeShortInfo.model_validate_json(row) for row in rows],
+        )
+
+    def __require_catalog(self) -> Catalog:
+        if self._catalog is None:
+            raise ValueError("This client has no catalog, create it with catalog=Catalog(...)")
+        return self._catalog
+
+    async def __homepage_snapshot(self) -> HomePage:
+        snapshot = self._homepage
+        if snapshot is not None and time.monotonic() - snapshot[0] < self._homepage_ttl:
+            return snapshot[1]
+
+        return await self.get_homepage()
+
+    async def __cached_streams(self, key: Hashable, cached: CachedStreams, max_streams: Optional[int] = None) -> List[str]:
+        """
+        Serves the streams of an episode from the stream cache, resolving the mirrors it has no usable
+        stream for, and re-resolves the stale ones in a background task.
+
+        Args:
+            key (Hashable): The episode in the stream cache.
+            cached (CachedStreams): What the stream cache knows about the episode.
+            max_streams (Optional[int]): Stop once this many mirrors resolved to a stream.
+
+        Returns:
+            List[str]: The stream URLs, in the order of the episode page.
+        """
+        resolved: Dict[str, Resolved] = dict(cached.streams)
+        missing = None if max_streams is None else max_streams - found(resolved)
+        if cached.expired and (missing is None or missing > 0):
+            update = await self.__resolve_streams(cached.expired, missing)
+            self._stream_cache.store(key, update)
+            resolved.update(update)
+
+        stale = self._stream_cache.claim(key, cached.stale)
+        if stale:
+            # Started in an empty context: the refresh outlives the call, and its deadline.
+            task = contextvars.Context().run(asyncio.ensure_future, self.__refresh_streams(key, stale))
+            self._refreshes.add(task)
+            task.add_done_callback(self._refreshes.discard)
+
+        return served(cached.iframes, resolved)
+
+    async def __refresh_streams(self, key: Hashable, iframe_urls: List[str]) -> None:
+        try:
+            self._stream_cache.store(key, await self.__resolve_streams(iframe_urls))
+        finally:
+            self._stream_cache.release(key, iframe_urls)
+
+    async def __resolve_streams(self, iframe_urls: List[str], max_streams: Optional[int] = None) -> Dict[str, Resolved]:
+        """
+        Resolves the stream URL of every iframe concurrently.
+
+        Args:
+            iframe_urls (List[str]): The iframe URLs of the episode mirrors.
+            max_streams (Optional[int]): Stop once this many mirrors resolved to a stream.
+
+        Returns:
+            Dict[str, Union[str, Exception]]: The stream URL, or the error, of every mirror that completed, by iframe URL.
+        """
+        semaphore = asyncio.Semaphore(max(1, self._max_workers))
+        tasks = [asyncio.ensure_future(self.__resolve_stream(semaphore, url)) for url in iframe_urls]
+        resolved = {}
+
+        try:
+            for task in asyncio.as_completed(tasks):
+                url, stream = await task
+                resolved[url] = stream
+                if max_streams is not None and found(resolved) >= max_streams:
+                    break
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        return resolved
+
+    async def __resolve_stream(self, semaphore: asyncio.Semaphore, url: str) -> Tuple[str, Resolved]:
+        try:
+            async with semaphore:
+                resp = await self._http.get(url, "iframe", headers={"Referer": BASE_URL}, timeout=self._iframe_timeout)
+            return url, safe_strip(self._parser.stream_url(resp.text, STREAM_HOSTNAMES))
+        except Exception as exc:
+            return url, exc
+
+    async def __fetch_episodes(self, unique_id: str, anime_id: str, pages: int) -> List[EpisodeInfo]:
+        """
+        Fetches every episode pagination page concurrently and merges them in page order.
+
+        Args:
+            unique_id (str): The numeric identifier used by the pagination endpoint.
+            anime_id (str): The identifier of the anime the episodes belong to.
+            pages (int): The number of pagination pages.
+
+        Returns:
+            List[EpisodeInfo]: The episodes of every page, in page order.
+
+        Raises:
+            JKAnimeParseError: If a page still fails after being retried.
+        """
+        return self.__merge_pages((await self.__fetch_episode_pages(unique_id, anime_id, range(1, pages + 1))).values())
+
+    async def __load_lazy_episodes(self, unique_id: str, anime_id: str, episodes: LazyEpisodes) -> List[EpisodeInfo]:
+        """
+        Loads every episode of a LazyEpisodes. Its pages not loaded yet are fetched by this call,
+        within its deadline, not by the loader of the LazyEpisodes, whose client may be closed.
+
+        Args:
+            unique_id (str): The numeric identifier used by the pagination endpoint.
+            anime_id (str): The identifier of the anime the episodes belong to.
+            episodes (LazyEpisodes): The episodes of a previously retrieved AnimeInfo.
+
+        Returns:
+            List[EpisodeInfo]: Every episode, in page order.
+
+        Raises:
+            JKAnimeParseError: If a page still fails after being retried.
+        """
+        loaded = {page: episodes.page(page) for page in episodes.loaded_pages}
+        missing = [page for page in range(1, episodes.pages + 1) if page not in loaded]
+        loaded.update(await self.__fetch_episode_pages(unique_id, anime_id, missing))
+        return self.__merge_pages(loaded[page] for page in range(1, episodes.pages + 1))
+
+    async def __fetch_episode_pages(self, unique_id: str, anime_id: str, pages: Iterable[int]) -> Dict[int, List[EpisodeInfo]]:
+        """
+        Fetches episode pagination pages concurrently.
+
+        Args:
+            unique_id (str): The numeric identifier used by the pagination endpoint.
+            anime_id (str): The identifier of the anime the episodes belong to.
+            pages (Iterable[int]): The pagination pages to fetch.
+
+        Returns:
+            Dict[int, List[EpisodeInfo]]: The episodes of each page, in the order of ``pages``.
+
+        Raises:
+            JKAnimeParseError: If a page still fails after being retried.
+        """
+        pages = list(pages)
+        semaphore = asyncio.Semaphore(max(1, self._max_workers))
+        results = await asyncio.gather(
+            *[self.__fetch_episodes_page(semaphore, unique_id, anime_id, page) for page in pages],
+            return_exceptions=True,
+        )
+
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+
+        return dict(zip(pages, results))
+
+    def __merge_pages(self, pages: Iterable[List[EpisodeInfo]]) -> List[EpisodeInfo]:
+        """
+        Concatenates the episodes of pagination pages, keeping CompactEpisodes compact.
+        """
+        if self._compact_episodes:
+            return functools.reduce(operator.add, pages, [])
+
+        episodes = []
+        for page in pages:
+            episodes.extend(page)
+
+        return episodes
+
+    async def __fetch_episodes_page(
+        self,
+        semaphore: asyncio.Semaphore,
+        unique_id: str,
+        anime_id: str,
+        page: int,
+    ) -> List[EpisodeInfo]:
+        for attempt in range(self._retries + 1):
+            try:
+                async with semaphore:
+                    resp = await self._http.get(f"{PAGINATION_EP}/{unique_id}/{page}", "episodes", headers={"Referer": BASE_URL})
+                resp.raise_for_status()
+                break
+            except DeadlineExceeded:
+                raise
+            except Exception as exc:
+                if attempt == self._retries:
+                    raise JKAnimeParseError(f"Unable to fetch episodes page {page} of '{anime_id}': {exc}") from exc
+                # Retrying is pointless once the backoff would outlast the deadline.
+                left = remaining()
+                if left is not None and left <= 0.5 * (attempt + 1):
+                    raise DeadlineExceeded(f"deadline exceeded fetching episodes page {page} of '{anime_id}'") from exc
+                record_retry()
+                await asyncio.sleep(0.5 * (attempt + 1))
+
+        # Only the request is retried, a page that does not decode or parse would fail the same way again.
+        try:
+            with phase("extract"):
+                data = resp.json()
+
+            return self._parser.episodes(data, anime_id, self._compact_episodes)
+        except JKAnimeParseError:
+            raise
+        except Exception as exc:
+            raise JKAnimeParseError(f"Unable to parse episodes page {page} of '{anime_id}': {exc}") from exc
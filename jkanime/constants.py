@@ -0,0 +1,15 @@
+BASE_URL = "https://jkanime.net"
+DIRECTORY_URL = f"{BASE_URL}/directorio/"
+SEARCH_URL = f"{BASE_URL}/buscar/"
+PAGINATION_EP = f"{BASE_URL}/ajax/pagination_episodes/"
+SCHEDULE_URL = f"{BASE_URL}/horario/"
+IMAGE_THUMB_URL = "https://cdn.jkdesu.com/assets/images/animes/video/image_thumb/"
+STREAM_HOSTNAMES = ["https://jkanime.net/stream/", "https://moodle1.playmudos.com"]
+
+PROVIDER = "jkanime"
+MAX_WORKERS = 8
+PAGINATION_RETRIES = 2
+IFRAME_TIMEOUT = 10
+HOMEPAGE_TTL = 30
+DIRECTORY_PREFETCH = 2
+EPISODES_PER_PAGE = 12
@@ -1,41 +1,93 @@
-import json
-import re
+import contextvars
+import functools
+import operator
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 from types import TracebackType
-from typing import List, Optional, Type
-
-import cloudscraper
-from bs4 import BeautifulSoup
-
+from typing import Dict, Hashable, Iterable, Iterator, List, Optional, Tuple, Type, Union
+
+from animeapi.catalog import PAGE_SIZE as CATALOG_PAGE_SIZE, Catalog
+from animeapi.deadline import bounded, remaining
+from animeapi.episodes import LazyEpisodes
+from animeapi.exception import DeadlineExceeded
+from animeapi.http import REQUEST_TIMEOUT, HTTPClient
+from animeapi.instrument import phase, record_retry
+from animeapi.singleflight import SingleFlight, coalesce
+from animeapi.streams import CachedStreams, Resolved, found, served
+from jkanime.constants import (
+    BASE_URL,
+    DIRECTORY_PREFETCH,
+    DIRECTORY_URL,
+    EPISODES_PER_PAGE,
+    HOMEPAGE_TTL,
+    IFRAME_TIMEOUT,
+    MAX_WORKERS,
+    PAGINATION_EP,
+    PAGINATION_RETRIES,
+    PROVIDER,
+    SCHEDULE_URL,
+    SEARCH_URL,
+    STREAM_HOSTNAMES,
+)
 from jkanime.exception import JKAnimeParseError
+from jkanime.parser import SoupParser
 from jkanime.schema import (
     AnimeInfo,
+    AnimeInfoUpdate,
     AnimeList,
     AnimeShortInfo,
     EpisodeInfo,
     EpisodeVideoUrls,
+    HomePage,
     LastAnimes,
     LastEpisodes,
     ListSchedule,
-    Schedule,
 )
-from jkanime.utils import removeprefix, safe_strip
-
-BASE_URL = "https://jkanime.net"
-DIRECTORY_URL = f"{BASE_URL}/directorio/"
-SEARCH_URL = f"{BASE_URL}/buscar/"
-PAGINATION_EP = f"{BASE_URL}/ajax/pagination_episodes/"
-SCHEDULE_URL = f"{BASE_URL}/horario/"
+from jkanime.utils import safe_strip
 
 
 class JKAnime(object):
     def __init__(self, *args, **kwargs):
+        # cloudscraper (and requests) only load once a client is created, see __init__.py.
+        import cloudscraper
+
         session = kwargs.get("session", None)
         self._scraper = cloudscraper.create_scraper(
             session,
             browser={"browser": "chrome", "platform": "windows", "desktop": True},
         )
+        self._http = HTTPClient(
+            self._scraper,
+            cache=kwargs.get("cache", None),
+            cookie_store=kwargs.get("cookie_store", None),
+            limiter=kwargs.get("limiter", None),
+            timeout=kwargs.get("request_timeout", REQUEST_TIMEOUT),
+        )
+        self._parser = kwargs.get("parser", None) or SoupParser(trusted=kwargs.get("trusted", False))
+        self._max_workers = kwargs.get("max_workers", MAX_WORKERS)
+        self._call_timeout = kwargs.get("call_timeout", None)
+        self._retries = kwargs.get("retries", PAGINATION_RETRIES)
+        self._iframe_timeout = kwargs.get("iframe_timeout", IFRAME_TIMEOUT)
+        self._homepage_ttl = kwargs.get("homepage_ttl", HOMEPAGE_TTL)
+        self._catalog = kwargs.get("catalog", None)
+        self._compact_episodes = kwargs.get("compact_episodes", False)
+        self._flights = SingleFlight() if kwargs.get("coalesce", False) else None
+        self._stream_cache = kwargs.get("stream_cache", None)
+        # Re-resolves the expired mirrors of the stream cache in the background.
+        self._refresher = ThreadPoolExecutor(max_workers=1) if self._stream_cache is not None else None
+        self._homepage = None
+        self._homepage_lock = threading.Lock()
+
+        instrument = kwargs.get("instrument", None)
+        if instrument is not None:
+            instrument.attach(self, PROVIDER)
 
     def close(self) -> None:
+        if self._refresher is not None:
+            self._refresher.shutdown(wait=False, cancel_futures=True)
         self._scraper.close()
 
     def __enter__(self) -> "JKAnime":
@@ -49,84 +101,122 @@ class JKAnime(object):
     ) -> None:
         self.close()
 
-    def list(self, page: int = 1) -> AnimeList:
+    @bounded
+    @coalesce
+    def list(self, page: int = 1, source: str = "remote") -> AnimeList:
         """
         Retrieves a list of anime from the JKAnime directory.
 
         Args:
             page (int): The page number to retrieve (default is 1).
+            source (str): ``"remote"`` to ask the website, ``"local"`` to list the client's catalog offline, sorted by title.
 
         Returns:
             AnimeList: A list of anime information, including the current page number, whether it's the last page, and a list of AnimeShortInfo objects.
+
+        Raises:
+            ValueError: If the source is unknown, or is ``"local"`` and the client has no catalog.
         """
+        if source == "local":
+            return self.__local_search(None, page)
+        if source != "remote":
+            raise ValueError(f"Unknown search source: {source!r}")
+
         url = f"{DIRECTORY_URL}/{page}"
 
-        response = self._scraper.get(url, headers={"Referer": BASE_URL})
-        soup = BeautifulSoup(response.text, "lxml")
-        try:
-            last_page = True
-            if soup.select_one("div.navigation a.nav-next"):
-                last_page = False
-
-            elements = soup.select("div.page_directorio div.custom_item2")
-
-            animes = []
-            for element in elements:
-                information = AnimeShortInfo(
-                    id=removeprefix(element.select_one("div.custom_thumb2 .card-title a").get("href"), BASE_URL),
-                    title=safe_strip(element.select_one("div.custom_thumb2 .card-title a").text),
-                    poster=element.select_one("div.custom_thumb2 img").get("src"),
-                    type=safe_strip(element.select_one("div.card-body div.card-info p.card-txt").text),
-                    status=safe_strip(element.select_one("div.card-body div.card-info p.card-status").text),
-                    synopsis=safe_strip(element.select_one("div.card-body p.synopsis").text),
-                )
-
-                animes.append(information)
-
-            return AnimeList(current_page=page, last_page=last_page, data=animes)
-        except Exception as exc:
-            raise JKAnimeParseError(exc) from exc
+        response = self._http.get(url, "directory", headers={"Referer": BASE_URL})
+        return self._parser.directory(response.text, page)
 
-    def search(self, query: str = None, page: int = 1) -> AnimeList:
+    @bounded
+    def iter_directory(self, start_page: int = 1, prefetch: int = DIRECTORY_PREFETCH) -> Iterator[AnimeShortInfo]:
+        """
+        Iterates over every anime of the JKAnime directory, page after page, until the last page.
+
+        While the current page is consumed, the next ``prefetch`` pages are downloaded and parsed
+        in the background. Pages prefetched past the last page are discarded.
+
+        Args:
+            start_page (int): The page to start from, to resume an interrupted crawl (default is 1).
+            prefetch (int): The number of upcoming pages fetched in the background (default is 2).
+
+        Yields:
+            AnimeShortInfo: The animes of the directory, in directory order.
+
+        Raises:
+            JKAnimeParseError: If there is an error parsing the response from the website.
+        """
+        executor = ThreadPoolExecutor(max_workers=max(1, prefetch))
+        pending = deque()
+        next_page = start_page
+
+        try:
+            while True:
+                while len(pending) <= prefetch:
+                    pending.append(executor.submit(contextvars.copy_context().run, self.list, next_page))
+                    next_page += 1
+
+                result = pending.popleft().result()
+                yield from result.data
+
+                if result.last_page or not result.data:
+                    return
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    @bounded
+    @coalesce
+    def search(self, query: str = None, page: int = 1, source: str = "remote") -> AnimeList:
         """
         Searches for anime based on the provided query and returns a list of anime information.
 
         Args:
             query (str): The search query to use (default is None).
             page (int): The page number to retrieve (default is 1).
+            source (str): ``"remote"`` to ask the website, ``"local"`` to search the client's catalog offline (default is ``"remote"``).
+                The local search matches every word of the query as a title prefix.
 
         Returns:
             AnimeList: A list of anime information, including the current page number, whether it's the last page, and a list of AnimeShortInfo objects.
+
+        Raises:
+            ValueError: If the source is unknown, or is ``"local"`` and the client has no catalog.
         """
+        if source == "local":
+            return self.__local_search(query, page)
+        if source != "remote":
+            raise ValueError(f"Unknown search source: {source!r}")
+
         url = f"{SEARCH_URL}/{query}/{page}"
 
-        response = self._scraper.get(url, headers={"Referer": BASE_URL})
-        soup = BeautifulSoup(response.text, "lxml")
+        response = self._http.get(url, "search", headers={"Referer": BASE_URL})
+        return self._parser.search(response.text, page)
 
-        try:
-            last_page = True
-            if soup.select_one("div.navigation a.nav-next"):
-                last_page = False
-
-            elements = soup.select("section.contenido div.row div.row div.anime__item")
-
-            animes = []
-            for element in elements:
-                information = AnimeShortInfo(
-                    id=removeprefix(element.select_one("div.anime__item__text a").get("href"), BASE_URL).replace("/", ""),
-                    title=safe_strip(element.select_one("div#ainfo div.title").text),
-                    poster=element.select_one("div.anime__item__pic").get("data-setbg"),
-                    type=safe_strip(element.select_one("div.anime__item__text li.anime").text),
-                    status=safe_strip(element.select_one("div.anime__item__text ul li").text),
-                    synopsis=safe_strip(element.select_one("div#ainfo p").text),
-                )
-
-                animes.append(information)
-
-            return AnimeList(current_page=page, last_page=last_page, data=animes)
-        except Exception as exc:
-            raise JKAnimeParseError(exc) from exc
+    @bounded
+    @coalesce
+    def get_homepage(self) -> HomePage:
+        """
+        Retrieves the JKAnime front page once and returns both the latest animes and the latest episodes.
+
+        The result is kept as a snapshot that get_latest_animes and get_latest_episodes reuse
+        while it is younger than the client's ``homepage_ttl``.
+
+        Returns:
+            HomePage: An object containing the latest AnimeShortInfo and EpisodeInfo objects.
 
+        Raises:
+            JKAnimeParseError: If there is an error parsing the response from the website.
+        """
+        response = self._http.get(BASE_URL, "homepage")
+        homepage = self._parser.homepage(response.text)
+
+        with self._homepage_lock:
+            self._homepage = (time.monotonic(), homepage)
+
+        return homepage
+
+    @bounded
     def get_latest_animes(self) -> LastAnimes:
         """
         Retrieves the latest anime information from the JKAnime website and returns it as a LastAnimes object.
@@ -137,31 +227,9 @@ class JKAnime(object):
         Raises:
             JKAnimeParseError: If there is an error parsing the response from the website.
         """
-        url = BASE_URL
-
-        response = self._scraper.get(url)
-        soup = BeautifulSoup(response.text, "lxml")
-
-        try:
-            elements = soup.select("section.contenido div.trending__anime div.anime__item")
-
-            animes = []
-            for element in elements:
-                information = AnimeShortInfo(
-                    id=removeprefix(element.select_one("div.anime__item__text a").get("href"), BASE_URL).replace("/", ""),
-                    title=safe_strip(element.select_one("div.anime__item__text a").text),
-                    poster=element.select_one("div.anime__item__pic")["data-setbg"],
-                    type=safe_strip(element.select_one("div.anime__item__text ul li.anime").text),
-                    status=safe_strip(element.select_one("div.anime__item__text ul li:first-child").text),
-                    synopsis=None,
-                )
-
-                animes.append(information)
-
-            return LastAnimes(animes=animes)
-        except Exception as exc:
-            raise JKAnimeParseError(exc) from exc
+        return LastAnimes(animes=self.__homepage_snapshot().animes)
 
+    @bounded
     def get_latest_episodes(self) -> LastEpisodes:
         """
         Retrieves the latest episodes information from the JKAnime website and returns it as a LastEpisodes object.
@@ -172,26 +240,10 @@ class JKAnime(object):
         Raises:
             JKAnimeParseError: If there is an error parsing the response from the website.
         """
-        response = self._scraper.get(BASE_URL)
-        soup = BeautifulSoup(response.text, "lxml")
-
-        try:
-            elements = soup.select("section.hero div.listadoanime-home a.bloqq")
-
-            episodes = []
-            for element in elements:
-                anime, _, id = removeprefix(element["href"], BASE_URL)[1:-1].rpartition("/")
-                information = EpisodeInfo(
-                    id=id,
-                    anime_id=anime,
-                    image_preview=element.select_one("div.anime__sidebar__comment__item__pic img")["src"],
-                )
-                episodes.append(information)
-
-            return LastEpisodes(episodes=episodes)
-        except Exception as exc:
-            raise JKAnimeParseError(exc) from exc
+        return LastEpisodes(episodes=self.__homepage_snapshot().episodes)
 
+    @bounded
+    @coalesce
     def get_schedule(self) -> ListSchedule:
         """
         Retrieves the schedule of anime broadcasts from the JKAnime website and returns it as a ListSchedule object.
@@ -202,119 +254,159 @@ class JKAnime(object):
         Raises:
             JKAnimeParseError: If there is an error parsing the response from the website.
         """
-        response = self._scraper.get(SCHEDULE_URL)
-        soup = BeautifulSoup(response.text, "lxml")
-
-        try:
-            days = soup.select("section.contenido div.semana:not(div.filtro)")
-
-            schedule = []
-            for day in days:
-                elements = day.select("div.cajas div.box")
-                animes = []
-                for element in elements:
-                    episode_id = re.findall(r"\d+", element.select_one("div.last span").text)[0]
-                    anime_id = removeprefix(element.select_one("a").get("href"), BASE_URL).replace("/", "")
-                    information = AnimeShortInfo(
-                        id=anime_id,
-                        title=safe_strip(element.select_one("a").text),
-                        poster=element.select_one("div.boxx img").get("src"),
-                        last_episode=EpisodeInfo(
-                            id=episode_id,
-                            anime_id=anime_id,
-                            date=safe_strip(element.select_one("div.last time").text)),
-                    )
-                    animes.append(information)
-
-                schedule.append(Schedule(day=safe_strip(day.select_one("h2").text), anime=animes))
-
-            return ListSchedule(schedule=schedule)
-        except Exception as exc:
-            raise JKAnimeParseError(exc) from exc
+        response = self._http.get(SCHEDULE_URL, "schedule")
+        return self._parser.schedule(response.text)
 
-    def get_anime_info(self, id: str) -> AnimeInfo:
+    @bounded
+    @coalesce
+    def get_anime_info(self, id: str, lazy_episodes: bool = False) -> AnimeInfo:
         """
         Retrieves detailed information about an anime from the JKAnime website.
 
+        With ``lazy_episodes`` only the anime page is fetched, and the episodes are a LazyEpisodes
+        sequence that fetches each pagination page the first time one of its episodes is accessed.
+
         Args:
             id (str): The unique identifier of the anime.
+            lazy_episodes (bool): Whether to defer fetching the episodes until they are accessed (default is False).
 
         Returns:
             AnimeInfo: A data structure containing detailed information about the anime.
 
         Raises:
-            JKAnimeParseError: If there is an error parsing the response from the website.
+            JKAnimeParseError: If there is an error parsing the response from the website,
+                or, with ``lazy_episodes``, fetching an episode page when it is accessed.
         """
         url = f"{BASE_URL}/{id}"
 
-        response = self._scraper.get(url, headers={"Referer": BASE_URL})
-        soup = BeautifulSoup(response.text, "lxml")
+        response = self._http.get(url, "anime", headers={"Referer": BASE_URL})
+        information, pages = self._parser.anime_details(response.text, id)
+        if lazy_episodes:
+            loader = functools.partial(self.__fetch_episodes_page, information["unique_id"], id)
+            information["episodes"] = LazyEpisodes(loader, pages)
+        else:
+            information["episodes"] = self.__fetch_episodes(information["unique_id"], id, pages)
 
-        try:
-            container = soup.select_one("div.anime__details__content div.row")
-            anime_details = container.select("div.anime__details__widget div.row ul li")
-
-            type = safe_strip(" ".join(anime_details[0].text.split(":")[1:]))
-            if type == "Serie":
-                type = "Anime"
-
-            genres = anime_details[1].text.split(":")[1:][0].split(", ")
-            languages = anime_details[4].text.split(":")[1:][0].split(", ")
-
-            information = {
-                "id": id,
-                "unique_id": container.select_one("div#guardar-anime").get("data-anime"),
-                "title": safe_strip(container.select_one("div.anime__details__title h3").text),
-                "alt_title": safe_strip(container.select_one("div.anime__details__title span").text),
-                "poster": container.select_one("div.anime__details__pic").get("data-setbg"),
-                "synopsis": safe_strip(container.select_one("p.sinopsis").text),
-                "type": type,
-                "genres": [safe_strip(genre) for genre in genres],
-                "study": safe_strip(" ".join(anime_details[2].text.split(":")[1:])),
-                "demographic": safe_strip(" ".join(anime_details[3].text.split(":")[1:])),
-                "languages": [language.strip() for language in languages],
-                "number_of_episodes": safe_strip(" ".join(anime_details[5].text.split(":")[1:])),
-                "duration": safe_strip(" ".join(anime_details[6].text.split(":")[1:])),
-                "debut": safe_strip(" ".join(anime_details[7].text.split(":")[1:])),
-                "status": safe_strip(" ".join(anime_details[8].text.split(":")[1:])),
-                "quality": safe_strip(" ".join(anime_details[9].text.split(":")[1:])),
-            }
+        return self._parser.anime_info(information)
 
-            pagination_ep = soup.select("div.capitulos div.anime__pagination a")
+    @bounded
+    @coalesce
+    def refresh_anime_info(self, id: str, known: Union[int, AnimeInfo]) -> AnimeInfoUpdate:
+        """
+        Retrieves the information of an anime, fetching only the episode pagination pages that can hold
+        episodes released since a known state, instead of every page.
 
-            episodes = []
+        When ``known`` is an AnimeInfo its episodes are merged with the new ones. When it is a count,
+        the episodes of the merged anime start at the first pagination page fetched. LazyEpisodes
+        of a known AnimeInfo are loaded first, their pages not loaded yet fetched by this call.
 
-            for i in range(len(pagination_ep)):
-                resp = self._scraper.get(
-                    f"{PAGINATION_EP}/{information['unique_id']}/{i + 1}",
-                    headers={"Referer": BASE_URL},
-                )
-                resp.raise_for_status()
+        Args:
+            id (str): The unique identifier of the anime.
+            known (Union[int, AnimeInfo]): The number of episodes already known, or the previously retrieved AnimeInfo.
 
-                episodes.extend(
-                    [
-                        EpisodeInfo(
-                            id=e["number"],
-                            anime_id=id,
-                            image_preview="https://cdn.jkdesu.com/assets/images/animes/video/image_thumb/" + e["image"],
-                        )
-                        for e in resp.json()
-                    ]
-                )
+        Returns:
+            AnimeInfoUpdate: The anime with the new episodes merged, and the new episodes alone.
 
-            information["episodes"] = episodes
+        Raises:
+            JKAnimeParseError: If there is an error parsing the response from the website.
+        """
+        url = f"{BASE_URL}/{id}"
 
-            return AnimeInfo(**information)
-        except Exception as exc:
-            raise JKAnimeParseError(exc) from exc
+        response = self._http.get(url, "anime", headers={"Referer": BASE_URL})
+        information, pages = self._parser.anime_details(response.text, id)
+
+        # Not tested for truth, which would load LazyEpisodes through their own loader.
+        previous = known.episodes if isinstance(known, AnimeInfo) else None
+        if isinstance(known, AnimeInfo) and previous is None:
+            previous = []
+        elif isinstance(previous, LazyEpisodes):
+            previous = self.__load_lazy_episodes(information["unique_id"], id, previous)
+        count = len(previous) if previous is not None else known
+
+        # The site may change its page size, so it is checked on a full page: the first one fetched,
+        # or page 1 when only the last page holds new episodes.
+        per_page = EPISODES_PER_PAGE
+        first_page = count // per_page + 1 if pages > 1 else 1
+        wanted = list(range(first_page, pages + 1))
+        if pages > 1 and first_page >= pages:
+            wanted.insert(0, 1)
+        fetched = self.__fetch_episode_pages(information["unique_id"], id, wanted)
+        if pages > 1 and len(fetched[min(fetched)]) not in (0, per_page):
+            per_page = len(fetched[min(fetched)])
+            first_page = count // per_page + 1
+            missing = [page for page in range(first_page, pages + 1) if page not in fetched]
+            fetched.update(self.__fetch_episode_pages(information["unique_id"], id, missing))
+
+        offset = (first_page - 1) * per_page
+        episodes = self.__merge_pages(fetched[page] for page in range(first_page, pages + 1))
+        information["episodes"] = (previous or [])[:offset] + episodes
+
+        return AnimeInfoUpdate(anime=self._parser.anime_info(information), new_episodes=episodes[count - offset :])
+
+    @bounded
+    def get_anime_info_many(self, ids: Iterable[str], max_workers: Optional[int] = None) -> Dict[str, Union[AnimeInfo, Exception]]:
+        """
+        Retrieves detailed information about several animes concurrently.
+        A failing anime does not abort the others, its error is returned in place of its information.
 
-    def get_video_stream(self, id: str, episode: int = 1) -> EpisodeVideoUrls:
+        Args:
+            ids (Iterable[str]): The unique identifiers of the animes, duplicates are fetched once.
+            max_workers (Optional[int]): The maximum number of animes fetched at once (default is the client's ``max_workers``).
+
+        Returns:
+            Dict[str, Union[AnimeInfo, Exception]]: The information or the error of every anime, in the order of ``ids``.
+        """
+        ids = list(dict.fromkeys(ids))
+        results = dict(self.iter_anime_info(ids, max_workers))
+
+        return {id: results[id] for id in ids}
+
+    @bounded
+    def iter_anime_info(self, ids: Iterable[str], max_workers: Optional[int] = None) -> Iterator[Tuple[str, Union[AnimeInfo, Exception]]]:
+        """
+        Retrieves detailed information about several animes concurrently, yielding each one as soon as it completes.
+        Animes not yet started are cancelled when the iterator is closed.
+
+        Args:
+            ids (Iterable[str]): The unique identifiers of the animes, duplicates are fetched once.
+            max_workers (Optional[int]): The maximum number of animes fetched at once (default is the client's ``max_workers``).
+
+        Yields:
+            Tuple[str, Union[AnimeInfo, Exception]]: The id of an anime and its information, or the error that prevented getting it.
+        """
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            return
+
+        executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers or self._max_workers, len(ids))))
+        try:
+            futures = {executor.submit(contextvars.copy_context().run, self.get_anime_info, id): id for id in ids}
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as exc:
+                    result = exc
+                yield futures[future], result
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    @bounded
+    @coalesce
+    def get_video_stream(self, id: str, episode: int = 1, max_streams: Optional[int] = None) -> EpisodeVideoUrls:
         """
         Retrieves the video stream URLs for a specific anime episode.
 
+        Every mirror is resolved concurrently and bounded by the client's ``iframe_timeout``.
+        Mirrors that fail, time out or are not resolved by the deadline of the call are left out,
+        the rest keep the order of the episode page.
+
+        With a ``stream_cache`` the streams of the episode are served from it, only the mirrors
+        it has no usable stream for are resolved, and the stale ones are re-resolved in the background.
+
         Args:
             id (str): The unique identifier of the anime.
             episode (int): The episode number of the anime (default is 1).
+            max_streams (Optional[int]): Stop once this many mirrors resolved to a stream (default is None, resolve all).
 
         Returns:
             EpisodeVideoUrls: A list of video stream URLs for the specified anime episode.
@@ -322,43 +414,23 @@ class JKAnime(object):
         Raises:
             JKAnimeParseError: If there is an error parsing the response from the website.
         """
+        key = (PROVIDER, id, str(episode))
+        cached = self._stream_cache.get(key) if self._stream_cache is not None else None
+        if cached is not None:
+            return self._parser.stream_urls(self.__cached_streams(key, cached, max_streams))
+
         url = f"{BASE_URL}/{id}/{episode}"
 
-        response = self._scraper.get(url, headers={"Referer": BASE_URL})
-        soup = BeautifulSoup(response.text, "lxml")
+        response = self._http.get(url, "episode", headers={"Referer": BASE_URL})
+        iframe_urls = self._parser.iframe_urls(response.text)
 
-        try:
-            iframe_urls = []
-            for script in soup.find_all("script"):
-                contents = str(script)
-                remote = BASE_URL
-
-                pattern = r"video\[\d+\]\s*=.*?<iframe.*?<\/iframe>"
-                matches = re.findall(pattern, contents, re.DOTALL)
-                for match in matches:
-                    src_pattern = r"src=[\"\']([^\"\']+)[\"\']"
-                    src_matches = re.findall(src_pattern, match)
-                    iframe_urls.extend([remote + src for src in src_matches])
-
-                pattern_data_ep = r"var servers\s*=\s*(\[\{.*?\}\])"
-                match_data_ep = re.search(pattern_data_ep, contents)
-
-                if match_data_ep:
-                    caps = json.loads(match_data_ep.group(1))
-                    for cap in caps:
-                        if cap["server"] != "Mediafire":
-                            iframe_urls.append(f"{remote}/c1.php?u={cap['remote']}&s={cap['server'].lower()}")
-
-            urls = []
-            src_stream = ["https://jkanime.net/stream/", "https://moodle1.playmudos.com"]
-            for url in iframe_urls:
-                resp = self._scraper.get(url, headers={"Referer": BASE_URL})
-                urls.append(safe_strip(self.__stream_url(resp.text, src_stream)))
-
-            return EpisodeVideoUrls(urls=urls)
-        except Exception as exc:
-            raise JKAnimeParseError(exc) from exc
+        resolved = self.__resolve_streams(iframe_urls, max_streams)
+        if self._stream_cache is not None:
+            self._stream_cache.store(key, resolved, iframe_urls)
+        return self._parser.stream_urls(served(iframe_urls, resolved))
 
+    @bounded
+    @coalesce
     def get_links(self, id: str, episode: int = 1) -> EpisodeVideoUrls:
         """
         Retrieves a list of video URLs for a given anime episode.
@@ -372,63 +444,267 @@ class JKAnime(object):
         """
         url = f"{BASE_URL}/{id}/{episode}"
 
-        response = self._scraper.get(url, headers={"Referer": BASE_URL})
-        soup = BeautifulSoup(response.text, "lxml")
+        response = self._http.get(url, "episode", headers={"Referer": BASE_URL})
+        return self._parser.links(response.text)
+
+    @bounded
+    def refresh_catalog(self, prune: bool = False) -> int:
+        """
+        Crawls every page of the directory into the client's catalog, used by ``search(source="local")``.
+        Animes already stored are only rewritten when they changed.
 
+        Args:
+            prune (bool): Remove the animes that are no longer listed by the website (default is False).
+
+        Returns:
+            int: The number of animes that were new or changed.
+
+        Raises:
+            ValueError: If the client has no catalog.
+            JKAnimeParseError: If there is an error parsing the response from the website.
+        """
+        catalog = self.__require_catalog()
+        started = time.time()
+        changed = catalog.upsert(PROVIDER, self.iter_directory())
+        if prune:
+            catalog.prune(PROVIDER, started)
+
+        return changed
+
+    def __local_search(self, query: Optional[str], page: int) -> AnimeList:
+        rows, total = self.__require_catalog().search(PROVIDER, query, page, CATALOG_PAGE_SIZE)
+
+        return AnimeList(
+            current_page=page,
+            last_page=page * CATALOG_PAGE_SIZE >= total,
+            data=[AnimeShortInfo.model_validate_json(row) for row in rows],
+        )
+
+    def __require_catalog(self) -> Catalog:
+        if self._catalog is None:
+            raise ValueError("This client has no catalog, create it with catalog=Catalog(...)")
+        return self._catalog
+
+    def __homepage_snapshot(self) -> HomePage:
+        """
+        Returns the last front page snapshot if it is still fresh, fetching a new one otherwise.
+
+        Returns:
+            HomePage: The front page snapshot.
+        """
+        with self._homepage_lock:
+            snapshot = self._homepage
+
+        if snapshot is not None and time.monotonic() - snapshot[0] < self._homepage_ttl:
+            return snapshot[1]
+
+        return self.get_homepage()
+
+    def __cached_streams(self, key: Hashable, cached: CachedStreams, max_streams: Optional[int] = None) -> List[str]:
+        """
+        Serves the streams of an episode from the stream cache, resolving the mirrors it has no usable
+        stream for, and hands the stale ones to the background refresher.
+
+        Args:
+            key (Hashable): The episode in the stream cache.
+            cached (CachedStreams): What the stream cache knows about the episode.
+            max_streams (Optional[int]): Stop once this many mirrors resolved to a stream.
+
+        Returns:
+            List[str]: The stream URLs, in the order of the episode page.
+        """
+        resolved: Dict[str, Resolved] = dict(cached.streams)
+        missing = None if max_streams is None else max_streams - found(resolved)
+        if cached.expired and (missing is None or missing > 0):
+            update = self.__resolve_streams(cached.expired, missing)
+            self._stream_cache.store(key, update)
+            resolved.update(update)
+
+        stale = self._stream_cache.claim(key, cached.stale)
+        if stale:
+            # Submitted without the context of the call: the refresh outlives it, and its deadline.
+            self._refresher.submit(self.__refresh_streams, key, stale)
+
+        return served(cached.iframes, resolved)
+
+    def __refresh_streams(self, key: Hashable, iframe_urls: List[str]) -> None:
         try:
-            urls = []
-            for script in soup.find_all("script"):
-                contents = str(script)
-                remote = BASE_URL
-
-                pattern_remote = r"var remote\s*=\s*\'([^\']+)\'"
-                match_remote = re.search(pattern_remote, contents)
-                pattern_data_ep = r"var servers\s*=\s*(\[\{.*?\}\])"
-                match_data_ep = re.search(pattern_data_ep, contents)
-
-                if match_remote and match_data_ep:
-                    caps = json.loads(match_data_ep.group(1))
-                    remote = match_remote.group(1)
-                    for cap in caps:
-                        urls.append(f"{remote}/d/{cap['slug']}")
-
-            return EpisodeVideoUrls(urls=urls)
-        except Exception as exc:
-            raise JKAnimeParseError(exc) from exc
+            self._stream_cache.store(key, self.__resolve_streams(iframe_urls))
+        finally:
+            self._stream_cache.release(key, iframe_urls)
+
+    def __resolve_streams(self, iframe_urls: List[str], max_streams: Optional[int] = None) -> Dict[str, Resolved]:
+        """
+        Resolves the stream URL of every iframe concurrently.
+
+        Args:
+            iframe_urls (List[str]): The iframe URLs of the episode mirrors.
+            max_streams (Optional[int]): Stop once this many mirrors resolved to a stream.
 
-    def __stream_url(self, html_content: str, hostnames: List[str]) -> Optional[str]:
+        Returns:
+            Dict[str, Union[str, Exception]]: The stream URL, or the error, of every mirror that completed, by iframe URL.
+        """
+        if not iframe_urls:
+            return {}
+
+        workers = max(1, min(self._max_workers, len(iframe_urls)))
+        waves = -(-len(iframe_urls) // workers)
+        wait = self._iframe_timeout * waves
+        left = remaining()
+        if left is not None:
+            # Mirrors not resolved by the deadline are left out, like those that time out.
+            wait = max(0.0, min(wait, left))
+        resolved = {}
+
+        executor = ThreadPoolExecutor(max_workers=workers)
+        try:
+            futures = {executor.submit(contextvars.copy_context().run, self.__resolve_stream, url): url for url in iframe_urls}
+            for future in as_completed(futures, timeout=wait):
+                try:
+                    resolved[futures[future]] = safe_strip(future.result())
+                except Exception as exc:
+                    resolved[futures[future]] = exc
+                    continue
+
+                if max_streams is not None and found(resolved) >= max_streams:
+                    break
+        except FuturesTimeoutError:
+            pass
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return resolved
+
+    def __resolve_stream(self, url: str) -> Optional[str]:
         """
-        Extracts a stream URL from the given HTML content.
+        Fetches a single iframe and extracts its stream URL.
 
         Args:
-            html_content (str): The HTML content to extract the stream URL from.
-            hostnames (List[str]): A list of hostnames to search for in the HTML content.
+            url (str): The iframe URL of the mirror.
 
         Returns:
             Optional[str]: The extracted stream URL, or None if no URL is found.
         """
-        soup = BeautifulSoup(html_content, "lxml")
+        resp = self._http.get(url, "iframe", headers={"Referer": BASE_URL}, timeout=self._iframe_timeout)
+        return self._parser.stream_url(resp.text, STREAM_HOSTNAMES)
+
+    def __fetch_episodes(self, unique_id: str, anime_id: str, pages: int) -> List[EpisodeInfo]:
+        """
+        Fetches every episode pagination page concurrently and merges them in page order.
+
+        Args:
+            unique_id (str): The numeric identifier used by the pagination endpoint.
+            anime_id (str): The identifier of the anime the episodes belong to.
+            pages (int): The number of pagination pages.
 
+        Returns:
+            List[EpisodeInfo]: The episodes of every page, in page order.
+
+        Raises:
+            JKAnimeParseError: If a page still fails after being retried.
+        """
+        return self.__merge_pages(self.__fetch_episode_pages(unique_id, anime_id, range(1, pages + 1)).values())
+
+    def __load_lazy_episodes(self, unique_id: str, anime_id: str, episodes: LazyEpisodes) -> List[EpisodeInfo]:
+        """
+        Loads every episode of a LazyEpisodes. Its pages not loaded yet are fetched by this call,
+        within its deadline, not by the loader of the LazyEpisodes, whose client may be closed.
+
+        Args:
+            unique_id (str): The numeric identifier used by the pagination endpoint.
+            anime_id (str): The identifier of the anime the episodes belong to.
+            episodes (LazyEpisodes): The episodes of a previously retrieved AnimeInfo.
+
+        Returns:
+            List[EpisodeInfo]: Every episode, in page order.
+
+        Raises:
+            JKAnimeParseError: If a page still fails after being retried.
+        """
+        loaded = {page: episodes.page(page) for page in episodes.loaded_pages}
+        missing = [page for page in range(1, episodes.pages + 1) if page not in loaded]
+        loaded.update(self.__fetch_episode_pages(unique_id, anime_id, missing))
+        return self.__merge_pages(loaded[page] for page in range(1, episodes.pages + 1))
+
+    def __fetch_episode_pages(self, unique_id: str, anime_id: str, pages: Iterable[int]) -> Dict[int, List[EpisodeInfo]]:
+        """
+        Fetches episode pagination pages concurrently.
+
+        Args:
+            unique_id (str): The numeric identifier used by the pagination endpoint.
+            anime_id (str): The identifier of the anime the episodes belong to.
+            pages (Iterable[int]): The pagination pages to fetch.
+
+        Returns:
+            Dict[int, List[EpisodeInfo]]: The episodes of each page, in the order of ``pages``.
+
+        Raises:
+            JKAnimeParseError: If a page still fails after being retried.
+        """
+        pages = list(pages)
+        if not pages:
+            return {}
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self._max_workers, len(pages)))) as executor:
+            futures = {
+                page: executor.submit(contextvars.copy_context().run, self.__fetch_episodes_page, unique_id, anime_id, page)
+                for page in pages
+            }
+
+        return {page: future.result() for page, future in futures.items()}
+
+    def __merge_pages(self, pages: Iterable[List[EpisodeInfo]]) -> List[EpisodeInfo]:
+        """
+        Concatenates the episodes of pagination pages, keeping CompactEpisodes compact.
+        """
+        if self._compact_episodes:
+            return functools.reduce(operator.add, pages, [])
+
+        episodes = []
+        for page in pages:
+            episodes.extend(page)
+
+        return episodes
+
+    def __fetch_episodes_page(self, unique_id: str, anime_id: str, page: int) -> List[EpisodeInfo]:
+        """
+        Fetches a single episode pagination page, retrying it on its own if it fails.
+
+        Args:
+            unique_id (str): The numeric identifier used by the pagination endpoint.
+            anime_id (str): The identifier of the anime the episodes belong to.
+            page (int): The pagination page to fetch.
+
+        Returns:
+            List[EpisodeInfo]: The episodes listed on the page.
+
+        Raises:
+            JKAnimeParseError: If the request fails on every attempt, or at once if the page cannot be parsed.
+        """
+        for attempt in range(self._retries + 1):
+            try:
+                resp = self._http.get(f"{PAGINATION_EP}/{unique_id}/{page}", "episodes", headers={"Referer": BASE_URL})
+                resp.raise_for_status()
+                break
+            except DeadlineExceeded:
+                raise
+            except Exception as exc:
+                if attempt == self._retries:
+                    raise JKAnimeParseError(f"Unable to fetch episodes page {page} of '{anime_id}': {exc}") from exc
+                # Retrying is pointless once the backoff would outlast the deadline.
+                left = remaining()
+                if left is not None and left <= 0.5 * (attempt + 1):
+                    raise DeadlineExceeded(f"deadline exceeded fetching episodes page {page} of '{anime_id}'") from exc
+                record_retry()
+                time.sleep(0.5 * (attempt + 1))
+
+        # Only the request is retried, a page that does not decode or parse would fail the same way again.
         try:
-            dplayer_pattern = r"DPlayer\({.*?}\);"
-            matches = re.findall(dplayer_pattern, html_content, re.DOTALL)
-            for match in matches:
-                for hostname in hostnames:
-                    url_match = re.search(re.escape(hostname) + r'[^\s\'"]+', match)
-                    if url_match:
-                        return url_match.group(0)
-
-            for script in soup.find_all("script"):
-                script_content = script.string
-                if script_content:
-                    for hostname in hostnames:
-                        match = re.search(re.escape(hostname) + r'[^\s\'"]+', script_content)
-                        if match:
-                            return match.group(0)
-
-            for tag in soup.find_all(["iframe", "source"]):
-                return tag.get("src")
-
-            return None
+            with phase("extract"):
+                data = resp.json()
+
+            return self._parser.episodes(data, anime_id, self._compact_episodes)
+        except JKAnimeParseError:
+            raise
         except Exception as exc:
-            raise JKAnimeParseError(exc) from exc
+            raise JKAnimeParseError(f"Unable to parse episodes page {page} of '{anime_id}': {exc}") from exc
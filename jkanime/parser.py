@@ -0,0 +1,522 @@
+import json
+import re
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
+
+from animeapi import xpath
+from animeapi.construct import SchemaFactories
+from animeapi.episodes import CompactEpisodes
+from animeapi.scripts import extract_variables
+from jkanime.constants import BASE_URL, IMAGE_THUMB_URL
+from jkanime.exception import JKAnimeParseError
+from jkanime.schema import (
+    AnimeInfo,
+    AnimeList,
+    AnimeShortInfo,
+    EpisodeInfo,
+    EpisodeVideoUrls,
+    HomePage,
+    ListSchedule,
+    Schedule,
+)
+from jkanime.utils import removeprefix, safe_strip
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+
+SCRIPT_VARIABLES = ("remote", "servers")
+# Contents of the inline scripts of a page, found without building a DOM.
+SCRIPTS = re.compile(r"<script\b[^>]*>(.*?)</script>", re.DOTALL | re.IGNORECASE)
+
+
+def _soup(html: str) -> "BeautifulSoup":
+    # BeautifulSoup is only loaded by the first page parsed, see __init__.py.
+    from bs4 import BeautifulSoup
+
+    return BeautifulSoup(html, "lxml")
+
+
+class SoupParser(object):
+    """
+    Turns JKAnime pages into schema objects using BeautifulSoup.
+
+    The parser never touches the network, so the same instance is shared by
+    the JKAnime and AsyncJKAnime clients.
+
+    Args:
+        trusted (bool): Whether to build the schema objects without validating them (default is False).
+            Faster, for pages whose markup is known to match the parser.
+    """
+
+    def __init__(self, trusted: bool = False):
+        self.trusted = trusted
+        self._schemas = SchemaFactories(trusted)
+
+    def directory(self, html: str, page: int) -> AnimeList:
+        """
+        Parses a page of the JKAnime directory.
+
+        Args:
+            html (str): The directory page.
+            page (int): The page number of the directory page.
+
+        Returns:
+            AnimeList: The animes listed on the page.
+        """
+        soup = _soup(html)
+        try:
+            last_page = True
+            if soup.select_one("div.navigation a.nav-next"):
+                last_page = False
+
+            elements = soup.select("div.page_directorio div.custom_item2")
+
+            animes = []
+            for element in elements:
+                information = self._schemas[AnimeShortInfo](
+                    id=removeprefix(element.select_one("div.custom_thumb2 .card-title a").get("href"), BASE_URL),
+                    title=safe_strip(element.select_one("div.custom_thumb2 .card-title a").text),
+                    poster=element.select_one("div.custom_thumb2 img").get("src"),
+                    type=safe_strip(element.select_one("div.card-body div.card-info p.card-txt").text),
+                    status=safe_strip(element.select_one("div.card-body div.card-info p.card-status").text),
+                    synopsis=safe_strip(element.select_one("div.card-body p.synopsis").text),
+                )
+
+                animes.append(information)
+
+            return self._schemas[AnimeList](current_page=page, last_page=last_page, data=animes)
+        except Exception as exc:
+            raise JKAnimeParseError(exc) from exc
+
+    def search(self, html: str, page: int) -> AnimeList:
+        """
+        Parses a page of search results.
+
+        Args:
+            html (str): The search results page.
+            page (int): The page number of the search results page.
+
+        Returns:
+            AnimeList: The animes listed on the page.
+        """
+        soup = _soup(html)
+        try:
+            last_page = True
+            if soup.select_one("div.navigation a.nav-next"):
+                last_page = False
+
+            elements = soup.select("section.contenido div.row div.row div.anime__item")
+
+            animes = []
+            for element in elements:
+                information = self._schemas[AnimeShortInfo](
+                    id=removeprefix(element.select_one("div.anime__item__text a").get("href"), BASE_URL).replace("/", ""),
+                    title=safe_strip(element.select_one("div#ainfo div.title").text),
+                    poster=element.select_one("div.anime__item__pic").get("data-setbg"),
+                    type=safe_strip(element.select_one("div.anime__item__text li.anime").text),
+                    status=safe_strip(element.select_one("div.anime__item__text ul li").text),
+                    synopsis=safe_strip(element.select_one("div#ainfo p").text),
+                )
+
+                animes.append(information)
+
+            return self._schemas[AnimeList](current_page=page, last_page=last_page, data=animes)
+        except Exception as exc:
+            raise JKAnimeParseError(exc) from exc
+
+    def homepage(self, html: str) -> HomePage:
+        """
+        Parses the front page into the latest animes and the latest episodes.
+
+        Args:
+            html (str): The front page.
+
+        Returns:
+            HomePage: The latest animes and episodes.
+        """
+        soup = _soup(html)
+        try:
+            elements = soup.select("section.contenido div.trending__anime div.anime__item")
+
+            animes = []
+            for element in elements:
+                information = self._schemas[AnimeShortInfo](
+                    id=removeprefix(element.select_one("div.anime__item__text a").get("href"), BASE_URL).replace("/", ""),
+                    title=safe_strip(element.select_one("div.anime__item__text a").text),
+                    poster=element.select_one("div.anime__item__pic")["data-setbg"],
+                    type=safe_strip(element.select_one("div.anime__item__text ul li.anime").text),
+                    status=safe_strip(element.select_one("div.anime__item__text ul li:first-child").text),
+                    synopsis=None,
+                )
+
+                animes.append(information)
+
+            elements = soup.select("section.hero div.listadoanime-home a.bloqq")
+
+            episodes = []
+            for element in elements:
+                anime, _, id = removeprefix(element["href"], BASE_URL)[1:-1].rpartition("/")
+                information = self._schemas[EpisodeInfo](
+                    id=id,
+                    anime_id=anime,
+                    image_preview=element.select_one("div.anime__sidebar__comment__item__pic img")["src"],
+                )
+                episodes.append(information)
+
+            return self._schemas[HomePage](animes=animes, episodes=episodes)
+        except Exception as exc:
+            raise JKAnimeParseError(exc) from exc
+
+    def schedule(self, html: str) -> ListSchedule:
+        """
+        Parses the broadcast schedule page.
+
+        Args:
+            html (str): The schedule page.
+
+        Returns:
+            ListSchedule: The schedule of every day.
+        """
+        soup = _soup(html)
+        try:
+            days = soup.select("section.contenido div.semana:not(div.filtro)")
+
+            schedule = []
+            for day in days:
+                elements = day.select("div.cajas div.box")
+                animes = []
+                for element in elements:
+                    episode_id = re.findall(r"\d+", element.select_one("div.last span").text)[0]
+                    anime_id = removeprefix(element.select_one("a").get("href"), BASE_URL).replace("/", "")
+                    information = self._schemas[AnimeShortInfo](
+                        id=anime_id,
+                        title=safe_strip(element.select_one("a").text),
+                        poster=element.select_one("div.boxx img").get("src"),
+                        last_episode=self._schemas[EpisodeInfo](
+                            id=episode_id,
+                            anime_id=anime_id,
+                            date=safe_strip(element.select_one("div.last time").text)),
+                    )
+                    animes.append(information)
+
+                schedule.append(self._schemas[Schedule](day=safe_strip(day.select_one("h2").text), anime=animes))
+
+            return self._schemas[ListSchedule](schedule=schedule)
+        except Exception as exc:
+            raise JKAnimeParseError(exc) from exc
+
+    def anime_details(self, html: str, id: str) -> Tuple[Dict[str, Any], int]:
+        """
+        Parses the details page of an anime, without its episodes.
+
+        Args:
+            html (str): The details page.
+            id (str): The unique identifier of the anime.
+
+        Returns:
+            Tuple[Dict[str, Any], int]: The fields of the AnimeInfo and the number of episode pagination pages.
+        """
+        soup = _soup(html)
+        try:
+            container = soup.select_one("div.anime__details__content div.row")
+            anime_details = container.select("div.anime__details__widget div.row ul li")
+
+            type = safe_strip(" ".join(anime_details[0].text.split(":")[1:]))
+            if type == "Serie":
+                type = "Anime"
+
+            genres = anime_details[1].text.split(":")[1:][0].split(", ")
+            languages = anime_details[4].text.split(":")[1:][0].split(", ")
+
+            information = {
+                "id": id,
+                "unique_id": container.select_one("div#guardar-anime").get("data-anime"),
+                "title": safe_strip(container.select_one("div.anime__details__title h3").text),
+                "alt_title": safe_strip(container.select_one("div.anime__details__title span").text),
+                "poster": container.select_one("div.anime__details__pic").get("data-setbg"),
+                "synopsis": safe_strip(container.select_one("p.sinopsis").text),
+                "type": type,
+                "genres": [safe_strip(genre) for genre in genres],
+                "study": safe_strip(" ".join(anime_details[2].text.split(":")[1:])),
+                "demographic": safe_strip(" ".join(anime_details[3].text.split(":")[1:])),
+                "languages": [language.strip() for language in languages],
+                "number_of_episodes": safe_strip(" ".join(anime_details[5].text.split(":")[1:])),
+                "duration": safe_strip(" ".join(anime_details[6].text.split(":")[1:])),
+                "debut": safe_strip(" ".join(anime_details[7].text.split(":")[1:])),
+                "status": safe_strip(" ".join(anime_details[8].text.split(":")[1:])),
+                "quality": safe_strip(" ".join(anime_details[9].text.split(":")[1:])),
+            }
+
+            pagination_ep = soup.select("div.capitulos div.anime__pagination a")
+
+            return information, len(pagination_ep)
+        except Exception as exc:
+            raise JKAnimeParseError(exc) from exc
+
+    def anime_info(self, information: Dict[str, Any]) -> AnimeInfo:
+        """
+        Builds the AnimeInfo from the fields returned by anime_details plus its episodes.
+
+        Args:
+            information (Dict[str, Any]): The fields of the AnimeInfo.
+
+        Returns:
+            AnimeInfo: The detailed information of the anime.
+        """
+        try:
+            return self._schemas[AnimeInfo](**information)
+        except Exception as exc:
+            raise JKAnimeParseError(exc) from exc
+
+    def episodes(self, data: List[Dict[str, Any]], anime_id: str, compact: bool = False) -> Sequence[EpisodeInfo]:
+        """
+        Parses the JSON of an episode pagination page.
+
+        Args:
+            data (List[Dict[str, Any]]): The decoded pagination page.
+            anime_id (str): The identifier of the anime the episodes belong to.
+            compact (bool): Whether to return CompactEpisodes instead of a list (default is False).
+
+        Returns:
+            Sequence[EpisodeInfo]: The episodes listed on the page.
+        """
+        if compact:
+            numbers, images = [e["number"] for e in data], [e["image"] for e in data]
+            return CompactEpisodes(EpisodeInfo, numbers, {"anime_id": anime_id}, IMAGE_THUMB_URL + "{image}", images)
+
+        episode = self._schemas[EpisodeInfo]
+        return [episode(id=e["number"], anime_id=anime_id, image_preview=IMAGE_THUMB_URL + e["image"]) for e in data]
+
+    def iframe_urls(self, html: str) -> List[str]:
+        """
+        Extracts the iframe URL of every mirror of an episode page.
+
+        Args:
+            html (str): The episode page.
+
+        Returns:
+            List[str]: The iframe URLs, in page order.
+        """
+        soup = _soup(html)
+        try:
+            iframe_urls = []
+            for script in soup.find_all("script"):
+                contents = str(script)
+                remote = BASE_URL
+
+                pattern = r"video\[\d+\]\s*=.*?<iframe.*?<\/iframe>"
+                matches = re.findall(pattern, contents, re.DOTALL)
+                for match in matches:
+                    src_pattern = r"src=[\"\']([^\"\']+)[\"\']"
+                    src_matches = re.findall(src_pattern, match)
+                    iframe_urls.extend([remote + src for src in src_matches])
+
+                pattern_data_ep = r"var servers\s*=\s*(\[\{.*?\}\])"
+                match_data_ep = re.search(pattern_data_ep, contents)
+
+                if match_data_ep:
+                    caps = json.loads(match_data_ep.group(1))
+                    for cap in caps:
+                        if cap["server"] != "Mediafire":
+                            iframe_urls.append(f"{remote}/c1.php?u={cap['remote']}&s={cap['server'].lower()}")
+
+            return iframe_urls
+        except Exception as exc:
+            raise JKAnimeParseError(exc) from exc
+
+    def stream_urls(self, urls: List[str]) -> EpisodeVideoUrls:
+        """
+        Builds the EpisodeVideoUrls of the resolved streams.
+
+        Args:
+            urls (List[str]): The resolved stream URLs.
+
+        Returns:
+            EpisodeVideoUrls: The stream URLs of the episode.
+        """
+        try:
+            return self._schemas[EpisodeVideoUrls](urls=urls)
+        except Exception as exc:
+            raise JKAnimeParseError(exc) from exc
+
+    def links(self, html: str) -> EpisodeVideoUrls:
+        """
+        Extracts the download links of an episode page.
+
+        Args:
+            html (str): The episode page.
+
+        Returns:
+            EpisodeVideoUrls: The download links of the episode, from every script declaring both
+                a ``remote`` and its ``servers``.
+        """
+        try:
+            urls = []
+            for script in SCRIPTS.finditer(html):
+                if "servers" not in script.group(1):
+                    continue
+                # Each script pairs its own remote with its servers.
+                variables = extract_variables(script.group(1), SCRIPT_VARIABLES)
+                if variables["remote"] and variables["servers"]:
+                    remote = variables["remote"][0]
+                    for cap in json.loads(variables["servers"][0]):
+                        urls.append(f"{remote}/d/{cap['slug']}")
+
+            return self._schemas[EpisodeVideoUrls](urls=urls)
+        except Exception as exc:
+            raise JKAnimeParseError(exc) from exc
+
+    def stream_url(self, html_content: str, hostnames: List[str]) -> Optional[str]:
+        """
+        Extracts a stream URL from the given HTML content.
+
+        Args:
+            html_content (str): The HTML content to extract the stream URL from.
+            hostnames (List[str]): A list of hostnames to search for in the HTML content.
+
+        Returns:
+            Optional[str]: The extracted stream URL, or None if no URL is found.
+        """
+        soup = _soup(html_content)
+
+        try:
+            dplayer_pattern = r"DPlayer\({.*?}\);"
+            matches = re.findall(dplayer_pattern, html_content, re.DOTALL)
+            for match in matches:
+                for hostname in hostnames:
+                    url_match = re.search(re.escape(hostname) + r'[^\s\'"]+', match)
+                    if url_match:
+                        return url_match.group(0)
+
+            for script in soup.find_all("script"):
+                script_content = script.string
+                if script_content:
+                    for hostname in hostnames:
+                        match = re.search(re.escape(hostname) + r'[^\s\'"]+', script_content)
+                        if match:
+                            return match.group(0)
+
+            for tag in soup.find_all(["iframe", "source"]):
+                return tag.get("src")
+
+            return None
+        except Exception as exc:
+            raise JKAnimeParseError(exc) from exc
+
+
+class LxmlParser(SoupParser):
+    """
+    Drop-in replacement of SoupParser for the hot listing pages (directory, search and
+    front page). It walks the lxml tree with precompiled XPath expressions instead of
+    building a BeautifulSoup tree, and returns the same schema objects. The other pages
+    are still parsed by SoupParser.
+    """
+
+    NEXT_PAGE = xpath.precompile(f"//div[{xpath.has_class('navigation')}]//a[{xpath.has_class('nav-next')}]")
+
+    DIRECTORY_ITEMS = xpath.precompile(f"//div[{xpath.has_class('page_directorio')}]//div[{xpath.has_class('custom_item2')}]")
+    DIRECTORY_LINK = xpath.precompile(f".//div[{xpath.has_class('custom_thumb2')}]//*[{xpath.has_class('card-title')}]//a")
+    DIRECTORY_IMAGE = xpath.precompile(f".//div[{xpath.has_class('custom_thumb2')}]//img")
+    DIRECTORY_TYPE = xpath.precompile(
+        f".//div[{xpath.has_class('card-body')}]//div[{xpath.has_class('card-info')}]//p[{xpath.has_class('card-txt')}]"
+    )
+    DIRECTORY_STATUS = xpath.precompile(
+        f".//div[{xpath.has_class('card-body')}]//div[{xpath.has_class('card-info')}]//p[{xpath.has_class('card-status')}]"
+    )
+    DIRECTORY_SYNOPSIS = xpath.precompile(f".//div[{xpath.has_class('card-body')}]//p[{xpath.has_class('synopsis')}]")
+
+    SEARCH_ITEMS = xpath.precompile(
+        f"//section[{xpath.has_class('contenido')}]//div[{xpath.has_class('row')}]"
+        f"//div[{xpath.has_class('row')}]//div[{xpath.has_class('anime__item')}]"
+    )
+    ITEM_LINK = xpath.precompile(f".//div[{xpath.has_class('anime__item__text')}]//a")
+    ITEM_TITLE = xpath.precompile(f".//div[@id='ainfo']//div[{xpath.has_class('title')}]")
+    ITEM_PICTURE = xpath.precompile(f".//div[{xpath.has_class('anime__item__pic')}]")
+    ITEM_TYPE = xpath.precompile(f".//div[{xpath.has_class('anime__item__text')}]//li[{xpath.has_class('anime')}]")
+    ITEM_STATUS = xpath.precompile(f".//div[{xpath.has_class('anime__item__text')}]//ul//li")
+    ITEM_SYNOPSIS = xpath.precompile(".//div[@id='ainfo']//p")
+
+    TRENDING_ITEMS = xpath.precompile(
+        f"//section[{xpath.has_class('contenido')}]//div[{xpath.has_class('trending__anime')}]//div[{xpath.has_class('anime__item')}]"
+    )
+    TRENDING_TYPE = xpath.precompile(f".//div[{xpath.has_class('anime__item__text')}]//ul//li[{xpath.has_class('anime')}]")
+    TRENDING_STATUS = xpath.precompile(f".//div[{xpath.has_class('anime__item__text')}]//ul//li[not(preceding-sibling::*)]")
+    LATEST_EPISODES = xpath.precompile(
+        f"//section[{xpath.has_class('hero')}]//div[{xpath.has_class('listadoanime-home')}]//a[{xpath.has_class('bloqq')}]"
+    )
+    LATEST_EPISODE_IMAGE = xpath.precompile(f".//div[{xpath.has_class('anime__sidebar__comment__item__pic')}]//img")
+
+    def directory(self, html: str, page: int) -> AnimeList:
+        root = xpath.document(html)
+        try:
+            last_page = not self.NEXT_PAGE(root)
+
+            animes = []
+            for element in self.DIRECTORY_ITEMS(root):
+                link = xpath.first(self.DIRECTORY_LINK, element)
+                information = self._schemas[AnimeShortInfo](
+                    id=removeprefix(link.get("href"), BASE_URL),
+                    title=safe_strip(xpath.text(link)),
+                    poster=xpath.first(self.DIRECTORY_IMAGE, element).get("src"),
+                    type=safe_strip(xpath.text(xpath.first(self.DIRECTORY_TYPE, element))),
+                    status=safe_strip(xpath.text(xpath.first(self.DIRECTORY_STATUS, element))),
+                    synopsis=safe_strip(xpath.text(xpath.first(self.DIRECTORY_SYNOPSIS, element))),
+                )
+
+                animes.append(information)
+
+            return self._schemas[AnimeList](current_page=page, last_page=last_page, data=animes)
+        except Exception as exc:
+            raise JKAnimeParseError(exc) from exc
+
+    def search(self, html: str, page: int) -> AnimeList:
+        root = xpath.document(html)
+        try:
+            last_page = not self.NEXT_PAGE(root)
+
+            animes = []
+            for element in self.SEARCH_ITEMS(root):
+                information = self._schemas[AnimeShortInfo](
+                    id=removeprefix(xpath.first(self.ITEM_LINK, element).get("href"), BASE_URL).replace("/", ""),
+                    title=safe_strip(xpath.text(xpath.first(self.ITEM_TITLE, element))),
+                    poster=xpath.first(self.ITEM_PICTURE, element).get("data-setbg"),
+                    type=safe_strip(xpath.text(xpath.first(self.ITEM_TYPE, element))),
+                    status=safe_strip(xpath.text(xpath.first(self.ITEM_STATUS, element))),
+                    synopsis=safe_strip(xpath.text(xpath.first(self.ITEM_SYNOPSIS, element))),
+                )
+
+                animes.append(information)
+
+            return self._schemas[AnimeList](current_page=page, last_page=last_page, data=animes)
+        except Exception as exc:
+            raise JKAnimeParseError(exc) from exc
+
+    def homepage(self, html: str) -> HomePage:
+        root = xpath.document(html)
+        try:
+            animes = []
+            for element in self.TRENDING_ITEMS(root):
+                link = xpath.first(self.ITEM_LINK, element)
+                information = self._schemas[AnimeShortInfo](
+                    id=removeprefix(link.get("href"), BASE_URL).replace("/", ""),
+                    title=safe_strip(xpath.text(link)),
+                    poster=xpath.first(self.ITEM_PICTURE, element).attrib["data-setbg"],
+                    type=safe_strip(xpath.text(xpath.first(self.TRENDING_TYPE, element))),
+                    status=safe_strip(xpath.text(xpath.first(self.TRENDING_STATUS, element))),
+                    synopsis=None,
+                )
+
+                animes.append(information)
+
+            episodes = []
+            for element in self.LATEST_EPISODES(root):
+                anime, _, id = removeprefix(element.attrib["href"], BASE_URL)[1:-1].rpartition("/")
+                information = self._schemas[EpisodeInfo](
+                    id=id,
+                    anime_id=anime,
+                    image_preview=xpath.first(self.LATEST_EPISODE_IMAGE, element).attrib["src"],
+                )
+                episodes.append(information)
+
+            return self._schemas[HomePage](animes=animes, episodes=episodes)
+        except Exception as exc:
+            raise JKAnimeParseError(exc) from exc
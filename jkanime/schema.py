@@ -1,15 +1,18 @@
-from typing import Optional, Union, List
-from pydantic import BaseModel, Field
+from typing import Annotated, Optional, Union, List
+from pydantic import Field
 
+from animeapi.construct import Schema
+from animeapi.episodes import EpisodeList
 
-class EpisodeInfo(BaseModel):
+
+class EpisodeInfo(Schema):
     id: str = Field(..., description="Episode id")
     anime_id: str = Field(..., description="Anime id")
     image_preview: Optional[str] = Field(None, description="Episode image preview")
     date: Optional[str] = Field(None, description="Episode date")
 
 
-class AnimeShortInfo(BaseModel):
+class AnimeShortInfo(Schema):
     id: str = Field(..., description="Anime id")
     title: str = Field(..., description="Anime title")
     poster: Optional[str] = Field(None, description="Anime poster")
@@ -30,31 +33,41 @@ class AnimeInfo(AnimeShortInfo):
     duration: Optional[str] = Field(None, description="Anime duration")
     debut: Optional[str] = Field(None, description="Anime debut")
     quality: Optional[str] = Field(None, description="Anime quality")
-    episodes: Optional[List[EpisodeInfo]] = Field(None, description="Anime episodes")
+    episodes: Optional[Annotated[List[EpisodeInfo], EpisodeList()]] = Field(None, description="Anime episodes")
+
+
+class AnimeInfoUpdate(Schema):
+    anime: AnimeInfo = Field(..., description="Anime information with the new episodes merged")
+    new_episodes: Annotated[List[EpisodeInfo], EpisodeList()] = Field(..., description="Episodes released since the known state")
 
 
-class LastAnimes(BaseModel):
+class LastAnimes(Schema):
     animes: List[AnimeShortInfo] = Field(..., description="Anime list")
 
 
-class AnimeList(BaseModel):
+class HomePage(Schema):
+    animes: List[AnimeShortInfo] = Field(..., description="Latest anime list")
+    episodes: List[EpisodeInfo] = Field(..., description="Latest episodes")
+
+
+class AnimeList(Schema):
     current_page: int = Field(..., description="Current page")
     last_page: bool = Field(..., description="Last page")
     data: List[AnimeShortInfo] = Field(..., description="Anime list")
 
 
-class LastEpisodes(BaseModel):
+class LastEpisodes(Schema):
     episodes: List[EpisodeInfo] = Field(..., description="Last episodes")
 
 
-class Schedule(BaseModel):
+class Schedule(Schema):
     day: str = Field(..., description="Day")
     anime: List[AnimeShortInfo] = Field(..., description="Anime list")
 
 
-class ListSchedule(BaseModel):
+class ListSchedule(Schema):
     schedule: List[Schedule] = Field(..., description="Schedule list")
 
 
-class EpisodeVideoUrls(BaseModel):
+class EpisodeVideoUrls(Schema):
     urls: List[Optional[str]] = Field(..., description="Video urls")
\ No newline at end of file
@@ -0,0 +1,50 @@
+import os
+import tempfile
+import unittest
+
+from animeapi.cache import CacheEntry, DiskCache
+
+
+def _entry(url: str) -> CacheEntry:
+    return CacheEntry(url=url, status_code=200, text="", headers={}, stored_at=0.0, expires_at=0.0)
+
+
+class DiskCacheTest(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self._directory.cleanup)
+
+    def test_evicts_past_the_high_water_mark(self):
+        cache = DiskCache(self._directory.name, max_entries=20)
+        listings = []
+        files = cache._files
+        cache._files = lambda: listings.append(1) or files()
+
+        for i in range(100):
+            cache.set(f"https://example.com/{i}", _entry(f"https://example.com/{i}"))
+            self.assertLessEqual(len(files()), 23)
+
+        # Listed on the first write, then once every few writes instead of on each one.
+        self.assertLess(len(listings), 100 // 2)
+        self.assertIsNotNone(cache.get("https://example.com/99"))
+        self.assertGreater(cache.evictions, 0)
+
+    def test_files_removed_by_another_process_are_skipped(self):
+        cache = DiskCache(self._directory.name, max_entries=1)
+        cache.set("https://example.com/a", _entry("https://example.com/a"))
+        files = cache._files
+
+        def vanishing():
+            listed = files()
+            # Another process removes a file between the listing and its stat.
+            os.remove(listed[0].path)
+            return listed
+
+        cache._files = vanishing
+        cache._count = cache._high_water
+        cache.set("https://example.com/c", _entry("https://example.com/c"))
+        self.assertLessEqual(len(files()), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import asyncio
+import os
+import threading
+import time
+import unittest
+
+from animeapi.http import Response
+from animeflv import AnimeFLV
+from animeflv.aio import AsyncAnimeFLV
+
+EPISODE_PAGE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "fixtures", "animeflv", "ver.html")
+
+
+def _page() -> str:
+    with open(EPISODE_PAGE, encoding="utf-8") as file:
+        return file.read()
+
+
+class CoalesceTest(unittest.TestCase):
+    """
+    AnimeFLV.get_links and get_video_servers take ``**kwargs``, their calls must still be shared.
+    """
+
+    def test_sync_methods_with_var_keyword_are_shared(self):
+        for method in ("get_links", "get_video_servers"):
+            with self.subTest(method=method):
+                client = AnimeFLV(coalesce=True)
+                requests = []
+                text = _page()
+
+                def get(url, endpoint=None, headers=None, **kwargs):
+                    requests.append(url)
+                    time.sleep(0.2)
+                    return Response(url, 200, text)
+
+                client._http.get = get
+                results = []
+                threads = [
+                    threading.Thread(target=lambda: results.append(getattr(client, method)("one-piece", 1))) for _ in range(5)
+                ]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                client.close()
+
+                self.assertEqual(len(requests), 1)
+                self.assertEqual(client._flights.shared, 4)
+                self.assertEqual(len(results), 5)
+                self.assertTrue(all(result == results[0] for result in results))
+
+    def test_async_methods_with_var_keyword_are_shared(self):
+        async def main(method):
+            client = AsyncAnimeFLV(coalesce=True)
+            requests = []
+            text = _page()
+
+            async def get(url, endpoint=None, headers=None, **kwargs):
+                requests.append(url)
+                await asyncio.sleep(0.1)
+                return Response(url, 200, text)
+
+            client._http.get = get
+            results = await asyncio.gather(*[getattr(client, method)("one-piece", 1) for _ in range(5)])
+            await client.close()
+            return requests, client._flights.shared, results
+
+        for method in ("get_links", "get_video_servers"):
+            with self.subTest(method=method):
+                requests, shared, results = asyncio.run(main(method))
+                self.assertEqual(len(requests), 1)
+                self.assertEqual(shared, 4)
+                self.assertTrue(all(result == results[0] for result in results))
+
+
+if __name__ == "__main__":
+    unittest.main()
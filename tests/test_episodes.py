@@ -0,0 +1,203 @@
+import asyncio
+import json
+import os
+import unittest
+from collections import Counter
+
+from animeapi.episodes import LazyEpisodes
+from animeapi.http import Response
+from jkanime import JKAnime
+from jkanime.exception import JKAnimeParseError
+from jkanime.aio import AsyncJKAnime
+from jkanime.constants import PAGINATION_EP
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "fixtures", "jkanime")
+
+
+def _fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as file:
+        return file.read()
+
+
+def _responder(pagination):
+    """
+    Answers the anime page from the fixtures and each pagination page with ``pagination(url, attempt)``.
+    """
+    anime = _fixture("anime.html")
+    requests = Counter()
+
+    def respond(url):
+        if not url.startswith(PAGINATION_EP):
+            return Response(url, 200, anime)
+        requests[url] += 1
+        return pagination(url, requests[url])
+
+    return requests, respond
+
+
+class EpisodesPageTest(unittest.TestCase):
+    """
+    Only the request of a pagination page is retried, a page that does not parse fails at once.
+    """
+
+    def _get_anime_info(self, client, respond):
+        client._http.get = lambda url, endpoint=None, headers=None, **kwargs: respond(url)
+        try:
+            return client.get_anime_info("tensei")
+        finally:
+            client.close()
+
+    def _get_anime_info_async(self, client, respond):
+        async def get(url, endpoint=None, headers=None, **kwargs):
+            return respond(url)
+
+        async def main():
+            client._http.get = get
+            try:
+                return await client.get_anime_info("tensei")
+            finally:
+                await client.close()
+
+        return asyncio.run(main())
+
+    def test_unparseable_page_is_not_retried(self):
+        for name, run, client in (
+            ("sync", self._get_anime_info, JKAnime(retries=2)),
+            ("async", self._get_anime_info_async, AsyncJKAnime(retries=2)),
+        ):
+            with self.subTest(client=name):
+                requests, respond = _responder(lambda url, attempt: Response(url, 200, "<html>"))
+                with self.assertRaises(JKAnimeParseError):
+                    run(client, respond)
+                self.assertTrue(requests)
+                self.assertEqual(set(requests.values()), {1})
+
+    def test_failed_request_is_retried(self):
+        def pagination(url, attempt):
+            if attempt == 1:
+                return Response(url, 503, "")
+            return Response(url, 200, _fixture(f"pagination_{url.rsplit('/', 1)[-1]}.json"))
+
+        for name, run, client in (
+            ("sync", self._get_anime_info, JKAnime(retries=1)),
+            ("async", self._get_anime_info_async, AsyncJKAnime(retries=1)),
+        ):
+            with self.subTest(client=name):
+                requests, respond = _responder(pagination)
+                anime = run(client, respond)
+                self.assertEqual(len(anime.episodes), 30)
+                self.assertEqual(set(requests.values()), {2})
+
+
+class RefreshAnimeInfoTest(unittest.TestCase):
+    """
+    The pages holding new episodes are found with the page size of the site, not a constant.
+    """
+
+    def _responder(self, per_page):
+        episodes = [episode for page in (1, 2, 3) for episode in json.loads(_fixture(f"pagination_{page}.json"))]
+
+        def pagination(url, attempt):
+            page = int(url.rsplit("/", 1)[-1])
+            return Response(url, 200, json.dumps(episodes[(page - 1) * per_page : page * per_page]))
+
+        return _responder(pagination)
+
+    def _refresh(self, client, respond, known):
+        if isinstance(client, JKAnime):
+            client._http.get = lambda url, endpoint=None, headers=None, **kwargs: respond(url)
+            try:
+                return client.refresh_anime_info("tensei", known)
+            finally:
+                client.close()
+
+        async def get(url, endpoint=None, headers=None, **kwargs):
+            return respond(url)
+
+        async def main():
+            client._http.get = get
+            try:
+                return await client.refresh_anime_info("tensei", known)
+            finally:
+                await client.close()
+
+        return asyncio.run(main())
+
+    def test_new_episodes_with_the_page_size_of_the_site(self):
+        # The fixture anime has 30 episodes over 3 pages: 12 per page, or 10 once re-split.
+        for per_page, known, fetched in ((12, 29, {1, 3}), (12, 13, {2, 3}), (10, 20, {2, 3}), (10, 15, {2, 3}), (10, 25, {1, 3})):
+            for client in (JKAnime(), AsyncJKAnime()):
+                with self.subTest(client=type(client).__name__, per_page=per_page, known=known):
+                    requests, respond = self._responder(per_page)
+                    update = self._refresh(client, respond, known)
+                    self.assertEqual([episode.id for episode in update.new_episodes], [str(n) for n in range(known + 1, 31)])
+                    self.assertEqual(update.anime.episodes[-1].id, "30")
+                    self.assertEqual({int(url.rsplit("/", 1)[-1]) for url in requests}, fetched)
+
+    def test_merges_the_known_episodes(self):
+        for client in (JKAnime(), AsyncJKAnime()):
+            with self.subTest(client=type(client).__name__):
+                requests, respond = self._responder(10)
+                known = self._refresh(client, respond, 0).anime
+                known.episodes = known.episodes[:17]
+                update = self._refresh(type(client)(), respond, known)
+                self.assertEqual([episode.id for episode in update.anime.episodes], [str(n) for n in range(1, 31)])
+                self.assertEqual(len(update.new_episodes), 13)
+
+    def test_lazy_known_episodes_are_loaded_by_the_call(self):
+        for client in (JKAnime(), AsyncJKAnime()):
+            with self.subTest(client=type(client).__name__):
+                lazy = JKAnime()
+                requests, respond = self._responder(12)
+                lazy._http.get = lambda url, endpoint=None, headers=None, **kwargs: respond(url)
+                known = lazy.get_anime_info("tensei", lazy_episodes=True)
+                known.episodes[0]
+                lazy.close()
+
+                # The client of the LazyEpisodes is closed, it must not fetch the other pages.
+                lazy._http.get = None
+                requests.clear()
+                update = self._refresh(client, respond, known)
+                self.assertEqual([episode.id for episode in update.anime.episodes], [str(n) for n in range(1, 31)])
+                self.assertEqual(update.new_episodes, [])
+                self.assertEqual(known.episodes.loaded_pages, [1])
+                # Pages 2 and 3 to load the known episodes, then 1 and 3 to find the new ones.
+                self.assertEqual({int(url.rsplit("/", 1)[-1]): count for url, count in requests.items()}, {1: 1, 2: 1, 3: 2})
+
+
+class LazyEpisodesTest(unittest.TestCase):
+    """
+    The page size is the one of the pages fetched, not a constant of the provider.
+    """
+
+    def _episodes(self, per_page, total):
+        loaded = []
+        pages = -(-total // per_page)
+
+        def loader(page):
+            loaded.append(page)
+            return list(range((page - 1) * per_page, min(page * per_page, total)))
+
+        return loaded, LazyEpisodes(loader, pages)
+
+    def test_page_size_of_the_first_page(self):
+        for per_page, total in ((5, 23), (12, 30), (20, 20), (7, 3)):
+            with self.subTest(per_page=per_page, total=total):
+                loaded, episodes = self._episodes(per_page, total)
+                self.assertEqual(len(episodes), total)
+                self.assertEqual(episodes[total - 1], total - 1)
+                self.assertEqual(episodes[-1], total - 1)
+                self.assertEqual(episodes[1:total:2], list(range(1, total, 2)))
+                self.assertEqual(list(episodes), list(range(total)))
+                self.assertEqual(sorted(loaded), list(range(1, episodes.pages + 1)))
+
+    def test_index_loads_the_page_holding_it(self):
+        loaded, episodes = self._episodes(5, 23)
+        self.assertEqual(episodes[12], 12)
+        self.assertEqual(loaded, [1, 3])
+        self.assertEqual(episodes[7:9], [7, 8])
+        self.assertEqual(loaded, [1, 3, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
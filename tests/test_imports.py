@@ -0,0 +1,60 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Dependencies that only the network calls or the parsers need.
+HEAVY = ("cloudscraper", "bs4", "lxml", "aiohttp")
+
+_PROBE = """
+import json, sys
+loaded = {{}}
+def step(name):
+    loaded[name] = sorted(module for module in {heavy!r} if module in sys.modules)
+import animeapi, jkanime, animeflv
+step("packages")
+from animeapi import AnimeServer, StreamCache
+from jkanime import AnimeInfo, JKAnime, LxmlParser
+from jkanime.aio import AsyncJKAnime
+from animeflv import AnimeFLV
+from animeflv.aio import AsyncAnimeFLV
+step("classes")
+client = JKAnime()
+step("client")
+client._parser.schedule(open({schedule!r}, encoding="utf-8").read())
+step("parse")
+async def main():
+    await AsyncAnimeFLV().close()
+import asyncio
+asyncio.run(main())
+step("async client")
+client.close()
+print(json.dumps(loaded))
+"""
+
+
+class LazyImportTest(unittest.TestCase):
+    """
+    Importing the packages, and their classes, loads none of the heavy dependencies:
+    they are only imported on first use.
+    """
+
+    def test_heavy_dependencies_load_on_first_use(self):
+        probe = _PROBE.format(heavy=HEAVY, schedule=os.path.join(ROOT, "benchmarks", "fixtures", "jkanime", "horario.html"))
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])))
+        # A fresh interpreter, where nothing is imported yet.
+        output = subprocess.run([sys.executable, "-c", probe], env=env, capture_output=True, text=True, check=True).stdout
+        loaded = json.loads(output)
+
+        self.assertEqual(loaded["packages"], [])
+        self.assertEqual(loaded["classes"], [])
+        self.assertEqual(loaded["client"], ["cloudscraper"])
+        self.assertEqual(loaded["parse"], ["bs4", "cloudscraper", "lxml"])
+        self.assertEqual(loaded["async client"], ["aiohttp", "bs4", "cloudscraper", "lxml"])
+
+
+if __name__ == "__main__":
+    unittest.main()
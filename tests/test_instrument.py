@@ -0,0 +1,49 @@
+import time
+import unittest
+
+from animeapi.http import HTTPClient, Response
+from animeapi.instrument import Instrument
+
+
+class Scraper(object):
+    """
+    Stand-in of a cloudscraper session, calling its post hook on every response like
+    ``CloudScraper.request``, with ``challenges`` challenge pages before the answer.
+    """
+
+    def __init__(self, challenges: int):
+        self.challenges = challenges
+        self.requestPostHook = None
+
+    def get(self, url, **kwargs):
+        for _ in range(self.challenges):
+            self.requestPostHook(self, Response(url, 503, "challenge"))
+            time.sleep(0.05)
+        return self.requestPostHook(self, Response(url, 200, "answer"))
+
+
+class RequestTimingsTest(unittest.TestCase):
+    def _timings(self, scraper):
+        events = []
+        client = HTTPClient(scraper, instrument=Instrument(events.append), provider="test")
+        client.get("https://example.com/", "anime")
+        return events[0].timings
+
+    def test_challenge_time(self):
+        timings = self._timings(Scraper(challenges=1))
+        self.assertGreaterEqual(timings["challenge"], 0.05)
+        self.assertLessEqual(timings["challenge"], timings["total"])
+
+    def test_no_challenge(self):
+        self.assertNotIn("challenge", self._timings(Scraper(challenges=0)))
+
+    def test_replaced_hook_is_still_called(self):
+        scraper = Scraper(challenges=0)
+        seen = []
+        scraper.requestPostHook = lambda scraper, response: seen.append(response.text) or response
+        self._timings(scraper)
+        self.assertEqual(seen, ["answer"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+import json
+import os
+import unittest
+from typing import Any, Callable, List, Tuple
+
+from pydantic import BaseModel
+
+import animeflv.parser
+import jkanime.parser
+from animeflv import EpisodeFormat
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "fixtures")
+
+
+def _fixture(provider: str, name: str) -> str:
+    with open(os.path.join(FIXTURES, provider, name), encoding="utf-8") as file:
+        return file.read()
+
+
+def _dump(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: _dump(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_dump(item) for item in value]
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    return value
+
+
+def _types(value: Any) -> Any:
+    # The type of every value held, as model_dump turns a str subclass into a plain str.
+    if isinstance(value, BaseModel):
+        return {name: _types(item) for name, item in value.__dict__.items()}
+    if isinstance(value, dict):
+        return {key: _types(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [type(value), *(_types(item) for item in value)]
+    return type(value)
+
+
+def _jkanime_calls() -> List[Tuple[str, Callable]]:
+    def anime_info(parser):
+        information, pages = parser.anime_details(_fixture("jkanime", "anime.html"), "tensei")
+        information["episodes"] = [
+            episode
+            for page in range(1, pages + 1)
+            for episode in parser.episodes(json.loads(_fixture("jkanime", f"pagination_{page}.json")), "tensei")
+        ]
+        return parser.anime_info(information)
+
+    return [
+        *[(f"directory[{page}]", lambda p, page=page: p.directory(_fixture("jkanime", f"directorio_{page}.html"), page)) for page in (1, 2, 3)],
+        ("search", lambda p: p.search(_fixture("jkanime", "buscar_1.html"), 1)),
+        ("homepage", lambda p: p.homepage(_fixture("jkanime", "home.html"))),
+        ("schedule", lambda p: p.schedule(_fixture("jkanime", "horario.html"))),
+        ("anime_info", anime_info),
+        ("iframe_urls", lambda p: p.iframe_urls(_fixture("jkanime", "episode.html"))),
+    ]
+
+
+def _animeflv_calls() -> List[Tuple[str, Callable]]:
+    both = EpisodeFormat.Subtitled | EpisodeFormat.Dubbed
+    return [
+        *[(f"anime_list[{page}]", lambda p, page=page: p.anime_list(_fixture("animeflv", f"browse_{page}.html"))) for page in (1, 2, 3)],
+        ("anime_list[search]", lambda p: p.anime_list(_fixture("animeflv", "search.html"))),
+        ("homepage", lambda p: p.homepage(_fixture("animeflv", "home.html"))),
+        ("links", lambda p: p.links(_fixture("animeflv", "ver.html"), both)),
+        ("video_servers", lambda p: p.video_servers(_fixture("animeflv", "ver.html"), both)),
+        ("anime_info", lambda p: p.anime_info(_fixture("animeflv", "anime.html"), "one-piece")),
+    ]
+
+
+class ParserEquivalenceTest(unittest.TestCase):
+    """
+    SoupParser and LxmlParser, validated or trusted, return the same data for every fixture.
+    Trusted objects must also hold the same Python values, of the same types (a tuple where validation
+    makes a list, a bs4 NavigableString where it makes a str, ...).
+    """
+
+    def _check(self, module, calls: List[Tuple[str, Callable]]) -> None:
+        parsers = {
+            (name, trusted): getattr(module, name)(trusted=trusted)
+            for name in ("SoupParser", "LxmlParser")
+            for trusted in (False, True)
+        }
+        for call, parse in calls:
+            with self.subTest(call=call):
+                expected = parse(parsers["SoupParser", False])
+                for (name, trusted), parser in parsers.items():
+                    result = parse(parser)
+                    self.assertEqual(_dump(result), _dump(expected), f"{name}(trusted={trusted})")
+                    self.assertEqual(result, expected, f"{name}(trusted={trusted})")
+                    self.assertEqual(_types(result), _types(expected), f"{name}(trusted={trusted})")
+
+    def test_jkanime(self):
+        self._check(jkanime.parser, _jkanime_calls())
+
+    def test_animeflv(self):
+        self._check(animeflv.parser, _animeflv_calls())
+
+
+class JKAnimeLinksTest(unittest.TestCase):
+    """
+    The download links pair the remote and the servers declared by the same script.
+    """
+
+    PAGE = """<html><head>
+<script>var remote = 'https://one.example'; var servers = [{"slug": "a"}, {"slug": "b"}];</script>
+<script>var servers = [{"slug": "orphan"}];</script>
+<script src="player.js"></script>
+<script>var remote = 'https://two.example';
+var servers = [{"slug": "c"}];</script>
+</head></html>"""
+
+    def test_remote_of_each_script(self):
+        for name in ("SoupParser", "LxmlParser"):
+            with self.subTest(parser=name):
+                links = getattr(jkanime.parser, name)().links(self.PAGE)
+                self.assertEqual(
+                    links.urls,
+                    ["https://one.example/d/a", "https://one.example/d/b", "https://two.example/d/c"],
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import asyncio
+import json
+import unittest
+
+from animeapi.deadline import bounded, remaining
+from animeapi.exception import DeadlineExceeded
+from animeapi.server import AnimeServer
+
+
+class Slow(object):
+    """
+    Provider whose calls take ``delay`` seconds, or fail at their deadline when it is sooner.
+    """
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.calls = 0
+
+    @bounded
+    async def get_anime_info(self, id: str) -> dict:
+        self.calls += 1
+        left = remaining()
+        if left is not None and left < self.delay:
+            await asyncio.sleep(left)
+            raise DeadlineExceeded("deadline exceeded")
+        await asyncio.sleep(self.delay)
+        return {"id": id}
+
+    async def close(self) -> None:
+        pass
+
+
+class AnimeServerTest(unittest.TestCase):
+    def _run(self, provider, requests):
+        async def main():
+            server = AnimeServer(port=0, providers={"slow": provider}, call_timeout=None)
+            await server.start()
+            try:
+                replies = await asyncio.gather(*[server._call("/slow/get_anime_info", query) for query in requests])
+            finally:
+                await server.stop()
+            return [(reply.status, json.loads(reply.body)) for reply in replies]
+
+        return asyncio.run(main())
+
+    def test_shared_call_runs_again_for_a_later_deadline(self):
+        provider = Slow(0.3)
+        replies = self._run(provider, [[("id", "a"), ("timeout", "0.1")], [("id", "a"), ("timeout", "2")]])
+
+        self.assertEqual(replies[0][0], 504)
+        self.assertEqual(replies[1], (200, {"id": "a"}))
+        self.assertEqual(provider.calls, 2)
+
+    def test_shared_call_waits_until_the_own_deadline(self):
+        provider = Slow(0.5)
+        replies = self._run(provider, [[("id", "a"), ("timeout", "2")], [("id", "a"), ("timeout", "0.1")]])
+
+        self.assertEqual(replies[0], (200, {"id": "a"}))
+        self.assertEqual(replies[1][0], 504)
+        self.assertEqual(provider.calls, 1)
+
+    def test_timeout_must_be_finite(self):
+        for value in ("nan", "inf", "-inf", "0", "-1"):
+            with self.subTest(timeout=value):
+                status, body = self._run(Slow(0), [[("id", "a"), ("timeout", value)]])[0]
+                self.assertEqual(status, 400)
+                self.assertIn("timeout", body["message"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from animeapi.deadline import deadline
+from animeapi.exception import DeadlineExceeded
+from animeapi.singleflight import AsyncSingleFlight, SingleFlight
+
+
+class SingleFlightDeadlineTest(unittest.TestCase):
+    def test_follower_stops_waiting_at_its_deadline(self):
+        flights = SingleFlight()
+        started = threading.Event()
+
+        def slow():
+            started.set()
+            time.sleep(1)
+            return "done"
+
+        leader = threading.Thread(target=flights.do, args=("key", slow))
+        leader.start()
+        started.wait()
+
+        start = time.monotonic()
+        with self.assertRaises(DeadlineExceeded), deadline(0.1):
+            flights.do("key", slow)
+        self.assertLess(time.monotonic() - start, 0.5)
+        leader.join()
+
+    def test_leader_deadline_is_not_passed_to_followers(self):
+        flights = SingleFlight()
+        started = threading.Event()
+        runs = []
+
+        def call():
+            runs.append(threading.current_thread().name)
+            started.set()
+            time.sleep(0.2)
+            if len(runs) == 1:
+                raise DeadlineExceeded("leader out of time")
+            return "done"
+
+        errors = []
+
+        def lead():
+            try:
+                flights.do("key", call)
+            except DeadlineExceeded as exc:
+                errors.append(exc)
+
+        leader = threading.Thread(target=lead)
+        leader.start()
+        started.wait()
+        with deadline(5):
+            self.assertEqual(flights.do("key", call), "done")
+        leader.join()
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(len(runs), 2)
+
+
+class AsyncSingleFlightDeadlineTest(unittest.TestCase):
+    def test_follower_stops_waiting_at_its_deadline(self):
+        async def main():
+            flights = AsyncSingleFlight()
+
+            async def slow():
+                await asyncio.sleep(1)
+                return "done"
+
+            leader = asyncio.ensure_future(flights.do("key", slow))
+            await asyncio.sleep(0)
+            start = time.monotonic()
+            with self.assertRaises(DeadlineExceeded), deadline(0.1):
+                await flights.do("key", slow)
+            self.assertLess(time.monotonic() - start, 0.5)
+            self.assertEqual(await leader, "done")
+
+        asyncio.run(main())
+
+    def test_leader_deadline_is_not_passed_to_followers(self):
+        async def main():
+            flights = AsyncSingleFlight()
+            runs = []
+
+            async def call():
+                runs.append(None)
+                await asyncio.sleep(0.1)
+                if len(runs) == 1:
+                    raise DeadlineExceeded("leader out of time")
+                return "done"
+
+            async def lead():
+                with deadline(0.05):
+                    return await flights.do("key", call)
+
+            leader = asyncio.ensure_future(lead())
+            await asyncio.sleep(0)
+            with deadline(5):
+                self.assertEqual(await flights.do("key", call), "done")
+            with self.assertRaises(DeadlineExceeded):
+                await leader
+            self.assertEqual(len(runs), 2)
+
+        asyncio.run(main())
+
+
+if __name__ == "__main__":
+    unittest.main()